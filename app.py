@@ -8,365 +8,963 @@ import os
 import json
 import time
 import threading
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, Any
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, render_template, send_from_directory, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
+from werkzeug.local import LocalProxy
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import paypalrestsdk
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from db_pool import ConnectionPool
+from query_cache import QueryCache
+from response_cache import ResponseCache
+from bulk_writer import bulk_upsert
+from standings_engine import StandingsEngine, load_engine
+from match_store import STORE_COLUMNS, MatchStore, team_form, team_overview
+from leaderboards import MAX_LIMIT as MAX_LEADERBOARD_LIMIT, PLAYER_COLUMNS, Leaderboards, metric_filter
+from team_map import TeamMap
+from team_resolver import TeamResolver
+from live_feed import LiveFeed
+from change_feed import ChangeEvent, ChangeFeed, set_origin
+from migrations import migrate
+from pagination import (InvalidParameter, decode_rank_cursor, limit_filter, match_filters, order_filter,
+                        page_of, season_filter, status_filter)
+from seasons import current_season, season_bounds
+import queries
+from queries import matches_query
+from streaming import STREAM_FETCH_SIZE, export_format, stream_rows
+from metrics import REGISTRY, current_method, instrument_app, stats_collector, storage_method, timed_query
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
-CORS(app)
-
 # Database connection
 def get_db_connection():
-    """Get database connection using environment variables"""
+    """Open a new database connection using environment variables"""
+    return psycopg2.connect(
+        os.getenv('DATABASE_URL'),
+        cursor_factory=RealDictCursor
+    )
+
+def migrate_database() -> List[int]:
+    """Apply pending schema migrations on a dedicated connection.
+    
+    A deploy step run once (``python migrations.py`` or the launcher), not
+    something every worker repeats on startup.
+    """
+    conn = get_db_connection()
     try:
-        conn = psycopg2.connect(
-            os.getenv('DATABASE_URL'),
-            cursor_factory=RealDictCursor
-        )
-        return conn
-    except Exception as e:
-        print(f"Database connection error: {e}")
-        return None
+        return migrate(conn)
+    finally:
+        conn.close()
 
-# PayPal Configuration
-paypal_client_id = os.getenv('PAYPAL_CLIENT_ID')
-paypal_client_secret = os.getenv('PAYPAL_CLIENT_SECRET')
+# PayPal Configuration: the SDK is imported and configured on the first payment request
+_paypal = None
+_paypal_lock = threading.Lock()
 
-if not paypal_client_id or not paypal_client_secret:
-    raise ValueError("Missing PayPal credentials: PAYPAL_CLIENT_ID and PAYPAL_CLIENT_SECRET required")
+def paypal_credentials() -> Tuple[Optional[str], Optional[str]]:
+    return os.getenv('PAYPAL_CLIENT_ID'), os.getenv('PAYPAL_CLIENT_SECRET')
 
-paypalrestsdk.configure({
-    "mode": "sandbox" if os.getenv('NODE_ENV') != 'production' else "live",
-    "client_id": paypal_client_id,
-    "client_secret": paypal_client_secret
-})
+def get_paypal():
+    """The configured paypalrestsdk module; raises ValueError without credentials"""
+    global _paypal
+    if _paypal is None:
+        with _paypal_lock:
+            if _paypal is None:
+                client_id, client_secret = paypal_credentials()
+                if not client_id or not client_secret:
+                    raise ValueError("Missing PayPal credentials: PAYPAL_CLIENT_ID and PAYPAL_CLIENT_SECRET required")
+                import paypalrestsdk
+                paypalrestsdk.configure({
+                    "mode": "sandbox" if os.getenv('NODE_ENV') != 'production' else "live",
+                    "client_id": client_id,
+                    "client_secret": client_secret
+                })
+                _paypal = paypalrestsdk
+    return _paypal
+
+# Whole rows back from upserts: the standings engine needs a few match columns,
+# the match store all of them, the leaderboards every player column
+_RETURNING = {'matches': STORE_COLUMNS, 'players': PLAYER_COLUMNS}
 
 class FootballDataStorage:
     """Storage class for football data operations"""
     
-    def __init__(self):
-        self.conn = None
-        self._connect()
-        self._init_tables()
+    def __init__(self, pool: Optional[ConnectionPool] = None, cache: Optional[QueryCache] = None,
+                 use_match_store: bool = False):
+        self.pool = pool or ConnectionPool.from_env(get_db_connection)
+        self.cache = cache or QueryCache()
+        # Built from stored matches on the first match write
+        self.standings_engine: Optional[StandingsEngine] = None
+        self._standings_lock = threading.Lock()
+        # With use_match_store, every match in memory for the team views; loaded on first use
+        self.use_match_store = use_match_store
+        self.match_store: Optional[MatchStore] = None
+        self._match_store_lock = threading.Lock()
+        # Player leaderboards, loaded on first use and updated in place from then on
+        self.leaderboards: Optional[Leaderboards] = None
+        self._leaderboards_lock = threading.Lock()
+        # Tags this process's writes on the change feed; their events are already handled
+        self.origin = uuid.uuid4().hex
     
-    def _connect(self):
-        """Establish database connection"""
-        self.conn = get_db_connection()
+    def invalidate(self, *tables: str):
+        """Drop cached reads for tables that were just written (all tables if none given)"""
+        self.cache.invalidate(*tables)
     
-    def _init_tables(self):
-        """Initialize database tables if they don't exist"""
-        if not self.conn:
+    def apply_change(self, event: ChangeEvent):
+        """Change feed subscriber: drop what another process just rewrote"""
+        if event.origin == self.origin:
             return
-            
-        try:
-            with self.conn.cursor() as cur:
-                # Teams table
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS teams (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    nickname TEXT NOT NULL,
-                    slug TEXT NOT NULL UNIQUE,
-                    primary_color TEXT NOT NULL,
-                    secondary_color TEXT NOT NULL,
-                    logo TEXT,
-                    stadium TEXT,
-                    city TEXT
-                )
-                """)
-                
-                # Matches table
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS matches (
-                    id SERIAL PRIMARY KEY,
-                    home_team_id INTEGER NOT NULL,
-                    away_team_id INTEGER NOT NULL,
-                    home_score INTEGER,
-                    away_score INTEGER,
-                    status TEXT NOT NULL,
-                    match_date TIMESTAMP NOT NULL,
-                    venue TEXT,
-                    minute INTEGER,
-                    competition TEXT DEFAULT 'Liga MX'
-                )
-                """)
-                
-                # Standings table
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS standings (
-                    id SERIAL PRIMARY KEY,
-                    team_id INTEGER NOT NULL,
-                    position INTEGER NOT NULL,
-                    matches_played INTEGER NOT NULL DEFAULT 0,
-                    wins INTEGER NOT NULL DEFAULT 0,
-                    draws INTEGER NOT NULL DEFAULT 0,
-                    losses INTEGER NOT NULL DEFAULT 0,
-                    goals_for INTEGER NOT NULL DEFAULT 0,
-                    goals_against INTEGER NOT NULL DEFAULT 0,
-                    goal_difference INTEGER NOT NULL DEFAULT 0,
-                    points INTEGER NOT NULL DEFAULT 0,
-                    season TEXT NOT NULL DEFAULT '2024-25'
-                )
-                """)
-                
-                # Players table
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS players (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    team_id INTEGER NOT NULL,
-                    position TEXT,
-                    goals INTEGER NOT NULL DEFAULT 0,
-                    assists INTEGER NOT NULL DEFAULT 0,
-                    appearances INTEGER NOT NULL DEFAULT 0
-                )
-                """)
-                
-                self.conn.commit()
-                print("✅ Database tables initialized")
-                
-        except Exception as e:
-            print(f"❌ Error initializing tables: {e}")
-            self.conn.rollback()
+        if event.table == 'matches':
+            with self._standings_lock:
+                self.standings_engine = None
+            self._refresh_match_store(event.ids)
+        elif event.table == 'players':
+            self._refresh_leaderboards(event.ids)
+        self.invalidate(event.table)
+    
+    def _refresh_match_store(self, ids: Optional[Tuple[int, ...]]):
+        """Re-read matches another process changed into the match store; all of them if ``ids`` is None"""
+        with self._match_store_lock:
+            if self.match_store is None:
+                return
+            if ids is None:
+                # Reloaded on next use
+                self.match_store = None
+                return
+            try:
+                rows = self._fetch_all(queries.MATCHES_BY_ID, (list(ids),))
+            except Exception as e:
+                print(f"Error refreshing match store: {e}")
+                self.match_store = None
+                return
+            found = {row['id'] for row in rows}
+            self.match_store.apply(rows, [match_id for match_id in ids if match_id not in found])
+
+    def _refresh_leaderboards(self, ids: Optional[Tuple[int, ...]]):
+        """Re-read players another process changed into the leaderboards; all of them if ``ids`` is None"""
+        with self._leaderboards_lock:
+            if self.leaderboards is None:
+                return
+            if ids is None:
+                self.leaderboards = None
+                return
+            try:
+                rows = self._fetch_all(queries.PLAYERS_BY_ID, (list(ids),))
+            except Exception as e:
+                print(f"Error refreshing leaderboards: {e}")
+                self.leaderboards = None
+                return
+            found = {row['id'] for row in rows}
+            self.leaderboards.apply(rows, [player_id for player_id in ids if player_id not in found])
+    
+    @storage_method
+    def upsert_batches(self, batches: Dict[str, List[Dict]], prune: bool = False) -> Dict[str, Dict[str, int]]:
+        """Merge whole batches of rows into their tables in one transaction.
+        
+        ``batches`` maps table name to rows and is applied in order, so teams
+        go before the tables that reference them. With ``prune`` rows missing
+        from a batch are deleted, making this a full refresh that readers only
+        ever see complete.
+        """
+        written = set(batches)
+        with self.pool.connection() as conn, self._standings_lock:
+            try:
+                with conn.cursor() as cur:
+                    set_origin(cur, self.origin)
+                if 'standings' in batches:
+                    # Matches are the source of truth: reload below so the derived rows overwrite these
+                    self.standings_engine = None
+                counts = {}
+                for table, rows in batches.items():
+                    counts[table] = bulk_upsert(conn, table, rows, prune=prune, returning=_RETURNING.get(table, ()))
+                changed = counts.get('matches', {}).get('rows', [])
+                deleted = counts.get('matches', {}).get('deleted_rows', [])
+                players = counts.get('players', {})
+                changed_players, deleted_players = players.pop('rows', []), players.pop('deleted_rows', [])
+                if ('matches' in counts or 'standings' in counts) and \
+                        self._apply_match_changes(conn, counts.get('matches', {})):
+                    written.add('standings')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                # The engine may hold deltas that never committed; rebuild it next time
+                self.standings_engine = None
+                raise
+            # Still under the standings lock, so the store sees this process's writes in commit order
+            if changed or deleted:
+                with self._match_store_lock:
+                    if self.match_store is not None:
+                        self.match_store.apply(changed, [row['id'] for row in deleted])
+            if changed_players or deleted_players:
+                with self._leaderboards_lock:
+                    if self.leaderboards is not None:
+                        self.leaderboards.apply(changed_players, [row['id'] for row in deleted_players])
+        self.invalidate(*written)
+        return counts
+    
+    def _apply_match_changes(self, conn, counts: Dict) -> int:
+        """Feed changed matches to the standings engine and write the rows that moved"""
+        if self.standings_engine is None or self.standings_engine.season != current_season():
+            # Loading inside this transaction already sees the new matches
+            self.standings_engine = load_engine(conn)
+        else:
+            for match in counts.pop('rows', []):
+                self.standings_engine.apply_match(match)
+            for match in counts.pop('deleted_rows', []):
+                self.standings_engine.remove(match['id'])
+        counts.pop('rows', None)
+        counts.pop('deleted_rows', None)
+        return self.standings_engine.flush(conn)
+    
+    def upsert_teams(self, rows: List[Dict], prune: bool = False) -> Dict[str, int]:
+        """Insert or update teams by slug"""
+        return self.upsert_batches({'teams': rows}, prune=prune)['teams']
+    
+    def upsert_standings(self, rows: List[Dict], prune: bool = False) -> Dict[str, int]:
+        """Insert or update standings by (team_id, season); rows that disagree with the matches are re-derived"""
+        return self.upsert_batches({'standings': rows}, prune=prune)['standings']
+    
+    def upsert_players(self, rows: List[Dict], prune: bool = False) -> Dict[str, int]:
+        """Insert or update players by (team_id, name)"""
+        return self.upsert_batches({'players': rows}, prune=prune)['players']
+    
+    def upsert_matches(self, rows: List[Dict], prune: bool = False) -> Dict[str, int]:
+        """Insert or update matches by (home_team_id, away_team_id, match_date)"""
+        return self.upsert_batches({'matches': rows}, prune=prune)['matches']
     
+    def _fetch_all(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Run a read query on a pooled connection and return all rows; a dropped connection is retried once"""
+        def fetch(conn) -> List[Dict]:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return [dict(row) for row in cur.fetchall()]
+
+        with timed_query() as rows:
+            result = self.pool.run(fetch)
+            rows.append(len(result))
+        return result
+    
+    def _stream(self, query: str, params: tuple = (), fetch_size: int = STREAM_FETCH_SIZE,
+                hydrate: Callable[[Dict], Dict] = lambda row: row) -> Iterator[Dict]:
+        """Yield rows of a read query through a server-side (named) cursor.
+        
+        Only ``fetch_size`` rows are held in memory at a time; each passes
+        through ``hydrate`` (e.g. TeamMap.match) on its way out. The pooled
+        connection stays checked out until the generator is exhausted or
+        closed, e.g. when the client of a streamed response disconnects.
+        """
+        # The body is iterated after the storage method returned, so take its name now
+        method = current_method()
+
+        def rows() -> Iterator[Dict]:
+            with timed_query(method) as count, self.pool.connection() as conn:
+                with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+                    cur.itersize = fetch_size
+                    cur.execute(query, params)
+                    seen = 0
+                    for row in cur:
+                        seen += 1
+                        yield hydrate(dict(row))
+                    count.append(seen)
+                conn.rollback()
+        return rows()
+    
+    @storage_method
+    def get_team_map(self) -> TeamMap:
+        """Every team by id and slug, loaded once per version of the teams table"""
+        return self.cache.get_or_load("team_map", (), lambda: TeamMap(self._fetch_all(queries.TEAMS)))
+    
+    @storage_method
     def get_teams(self) -> List[Dict]:
         """Get all teams"""
-        if not self.conn:
-            return []
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("SELECT * FROM teams ORDER BY name")
-                return [dict(row) for row in cur.fetchall()]
+            return list(self.get_team_map().teams)
         except Exception as e:
             print(f"Error fetching teams: {e}")
             return []
     
+    @storage_method
     def get_team_by_slug(self, slug: str) -> Optional[Dict]:
         """Get team by slug"""
-        if not self.conn:
-            return None
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("SELECT * FROM teams WHERE slug = %s", (slug,))
-                row = cur.fetchone()
-                return dict(row) if row else None
+            return self.get_team_map().by_slug.get(slug)
         except Exception as e:
             print(f"Error fetching team by slug: {e}")
             return None
     
-    def get_matches(self) -> List[Dict]:
-        """Get all matches with team information"""
-        if not self.conn:
-            return []
+    @storage_method
+    def get_matches_page(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                         competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                         date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                         limit: int = 50, order: str = 'desc') -> Dict[str, Any]:
+        """One page of matches with team information in (match_date, id) order.
+        
+        Keyset pagination: ``cursor`` is the (match_date, id) of the last row
+        already seen, so every page costs one short index range scan however
+        deep it is. ``next_cursor`` is None on the last page.
+        """
+        key = (team, statuses, competition, date_from, date_to, cursor, limit, order)
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                SELECT m.*, 
-                       ht.name as home_team_name, ht.nickname as home_team_nickname,
-                       ht.primary_color as home_team_primary_color, ht.secondary_color as home_team_secondary_color,
-                       at.name as away_team_name, at.nickname as away_team_nickname,
-                       at.primary_color as away_team_primary_color, at.secondary_color as away_team_secondary_color
-                FROM matches m
-                JOIN teams ht ON m.home_team_id = ht.id
-                JOIN teams at ON m.away_team_id = at.id
-                ORDER BY m.match_date DESC
-                """)
-                return [dict(row) for row in cur.fetchall()]
+            return self.cache.get_or_load("matches", key, lambda: self._load_matches_page(*key))
         except Exception as e:
             print(f"Error fetching matches: {e}")
-            return []
+            return {"data": [], "next_cursor": None}
+    
+    def _load_matches_page(self, team, statuses, competition, date_from, date_to, cursor, limit, order) -> Dict[str, Any]:
+        teams = self.get_team_map()
+        # One extra row tells us whether there is a next page
+        query, params = matches_query(teams.id_of(team) if team else None, statuses, competition,
+                                      date_from, date_to, cursor, order, limit + 1)
+        return page_of(teams.matches(self._fetch_all(query, params)), limit)
     
+    @storage_method
+    def stream_matches(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                       competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                       order: str = 'desc') -> Iterator[Dict]:
+        """Every matching match, in page order, read through a server-side cursor"""
+        teams = self.get_team_map()
+        query, params = matches_query(teams.id_of(team) if team else None, statuses, competition,
+                                      date_from, date_to, cursor, order, None)
+        return self._stream(query, params, hydrate=teams.match)
+    
+    @storage_method
+    def load_live_matches(self) -> List[Dict]:
+        """Live matches straight from the database, bypassing the cache"""
+        return self.get_team_map().matches(
+            self._fetch_all(queries.LIVE_MATCHES, (season_bounds(current_season())[0],)))
+
+    @storage_method
     def get_live_matches(self) -> List[Dict]:
         """Get live matches"""
-        if not self.conn:
-            return []
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                SELECT m.*, 
-                       ht.name as home_team_name, ht.nickname as home_team_nickname,
-                       ht.primary_color as home_team_primary_color, ht.secondary_color as home_team_secondary_color,
-                       at.name as away_team_name, at.nickname as away_team_nickname,
-                       at.primary_color as away_team_primary_color, at.secondary_color as away_team_secondary_color
-                FROM matches m
-                JOIN teams ht ON m.home_team_id = ht.id
-                JOIN teams at ON m.away_team_id = at.id
-                WHERE m.status = 'live'
-                ORDER BY m.match_date DESC
-                """)
-                return [dict(row) for row in cur.fetchall()]
+            return self.cache.get_or_load("live_matches", (), self.load_live_matches)
         except Exception as e:
             print(f"Error fetching live matches: {e}")
             return []
     
+    @storage_method
     def get_upcoming_matches(self) -> List[Dict]:
         """Get upcoming matches"""
-        if not self.conn:
-            return []
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                SELECT m.*, 
-                       ht.name as home_team_name, ht.nickname as home_team_nickname,
-                       ht.primary_color as home_team_primary_color, ht.secondary_color as home_team_secondary_color,
-                       at.name as away_team_name, at.nickname as away_team_nickname,
-                       at.primary_color as away_team_primary_color, at.secondary_color as away_team_secondary_color
-                FROM matches m
-                JOIN teams ht ON m.home_team_id = ht.id
-                JOIN teams at ON m.away_team_id = at.id
-                WHERE m.status = 'upcoming'
-                ORDER BY m.match_date ASC
-                """)
-                return [dict(row) for row in cur.fetchall()]
+            starts = season_bounds(current_season())[0]
+            return self.cache.get_or_load("upcoming_matches", starts, lambda: self.get_team_map().matches(
+                self._fetch_all(queries.UPCOMING_MATCHES, (starts,))))
         except Exception as e:
             print(f"Error fetching upcoming matches: {e}")
             return []
     
-    def get_standings(self) -> List[Dict]:
-        """Get standings with team information"""
-        if not self.conn:
-            return []
+    @storage_method
+    def get_standings(self, season: Optional[str] = None) -> List[Dict]:
+        """Get standings with team information for a season (default: the current one)"""
+        season = season or current_season()
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                SELECT s.*, t.name as team_name, t.nickname as team_nickname,
-                       t.primary_color, t.secondary_color, t.logo
-                FROM standings s
-                JOIN teams t ON s.team_id = t.id
-                ORDER BY s.position ASC
-                """)
-                return [dict(row) for row in cur.fetchall()]
+            return self.cache.get_or_load("standings", season, lambda: self.get_team_map().standings(
+                self._fetch_all(queries.STANDINGS, (season,))))
         except Exception as e:
             print(f"Error fetching standings: {e}")
             return []
     
-    def get_top_scorers(self, limit: int = 10) -> List[Dict]:
-        """Get top scorers with team information"""
-        if not self.conn:
+    @storage_method
+    def get_top_scorers(self, limit: int = 10, season: Optional[str] = None) -> List[Dict]:
+        """Get top scorers with team information for a season (default: the current one)"""
+        return self.get_leaderboard('goals', season, limit=limit)['data']
+
+    @storage_method
+    def get_leaderboards(self) -> Leaderboards:
+        """Every player ranked per season, metric and team; loaded on first use, then kept current"""
+        boards = self.leaderboards
+        if boards is None:
+            # Writers wait on this lock to apply their rows, so none fall between the load and the boards
+            with self._leaderboards_lock:
+                boards = self.leaderboards
+                if boards is None:
+                    boards = self.leaderboards = Leaderboards(self._fetch_all(queries.LEADERBOARD_ROWS))
+        return boards
+
+    @storage_method
+    def get_leaderboard(self, metric: str, season: Optional[str] = None, team_id: Optional[int] = None,
+                        limit: int = 10, cursor: Optional[Tuple[float, int]] = None) -> Dict[str, Any]:
+        """One page of a season's players (default: the current season) ranked on ``metric``, best first"""
+        season = season or current_season()
+        try:
+            page = self.get_leaderboards().page(metric, season, team_id, limit, cursor)
+            self.get_team_map().players(page['data'])
+        except Exception as e:
+            print(f"Error fetching leaderboard: {e}")
+            page = {"data": [], "total": 0, "next_cursor": None}
+        return {"metric": metric, "season": season, **page}
+
+    @storage_method
+    def get_player_rank(self, player_id: int, metric: str = 'goals', team: bool = False,
+                        around: int = 2) -> Optional[Dict[str, Any]]:
+        """A player's rank on ``metric`` in their season (or their team), with the players around them"""
+        try:
+            rank = self.get_leaderboards().rank_of(player_id, metric, team, around)
+            if rank is not None:
+                self.get_team_map().players(rank['data'])
+        except Exception as e:
+            print(f"Error fetching player rank: {e}")
+            return None
+        return {"metric": metric, **rank} if rank is not None else None
+
+    @storage_method
+    def stream_players(self) -> Iterator[Dict]:
+        """Every player with team information, best scorers first, through a server-side cursor"""
+        return self._stream(queries.PLAYERS_EXPORT, hydrate=self.get_team_map().player)
+
+    @storage_method
+    def get_match_store(self) -> Optional[MatchStore]:
+        """The in-memory match store, loaded on first use; None unless use_match_store is set"""
+        if not self.use_match_store:
+            return None
+        store = self.match_store
+        if store is None:
+            # Writers wait on this lock to apply their rows, so none fall between the load and the store
+            with self._match_store_lock:
+                store = self.match_store
+                if store is None:
+                    store = self.match_store = self._load_match_store()
+        return store
+
+    def _load_match_store(self) -> MatchStore:
+        # Plain tuples through a server-side cursor: no per-row dict for rows that become array slots
+        def load(conn) -> MatchStore:
+            with conn.cursor(name=f"match_store_{uuid.uuid4().hex}", cursor_factory=psycopg2.extensions.cursor) as cur:
+                cur.itersize = STREAM_FETCH_SIZE
+                cur.execute(queries.MATCH_STORE_ROWS)
+                store = MatchStore(cur)
+            conn.rollback()
+            return store
+
+        with timed_query() as rows:
+            store = self.pool.run(load)
+            rows.append(len(store))
+        return store
+
+    def _team_matches(self, namespace: str, key: Tuple, read: Callable[[MatchStore], List[Dict]],
+                      query: Tuple[str, tuple]) -> List[Dict]:
+        """Matches with team information, from the match store when it is on, else SQL through the cache"""
+        store = self.get_match_store()
+        if store is not None:
+            return self.get_team_map().matches(read(store))
+        return self.cache.get_or_load(namespace, key, lambda: self.get_team_map().matches(
+            self._fetch_all(*query)))
+
+    @storage_method
+    def get_team_fixtures(self, team_id: int, statuses: Optional[tuple] = None, order: str = 'desc',
+                          limit: int = 20) -> List[Dict]:
+        """A team's matches, home and away, newest first by default"""
+        try:
+            return self._team_matches(
+                "team_fixtures", (team_id, statuses, order, limit),
+                lambda store: store.fixtures(team_id, statuses, order, limit),
+                matches_query(team_id, statuses, None, None, None, None, order, limit))
+        except Exception as e:
+            print(f"Error fetching team fixtures: {e}")
             return []
+
+    @storage_method
+    def get_team_form(self, team_id: int, last: int = 5) -> Dict[str, Any]:
+        """Results of a team's last ``last`` finished matches, newest first, and their totals"""
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                SELECT p.*, t.name as team_name, t.nickname as team_nickname,
-                       t.primary_color, t.secondary_color
-                FROM players p
-                JOIN teams t ON p.team_id = t.id
-                ORDER BY p.goals DESC
-                LIMIT %s
-                """, (limit,))
-                return [dict(row) for row in cur.fetchall()]
+            matches = self._team_matches(
+                "team_form", (team_id, last),
+                lambda store: store.fixtures(team_id, ('finished',), 'desc', last),
+                matches_query(team_id, ('finished',), None, None, None, None, 'desc', last))
+        except Exception as e:
+            print(f"Error fetching team form: {e}")
+            matches = []
+        return {"team_id": team_id, **team_form(team_id, matches), "matches": matches}
+
+    @storage_method
+    def get_head_to_head(self, team_id: int, opponent_id: int, limit: int = 10) -> Dict[str, Any]:
+        """Record of a team against another over all their meetings, and the latest ``limit`` of them"""
+        try:
+            store = self.get_match_store()
+            if store is not None:
+                record = store.head_to_head_record(team_id, opponent_id)
+                matches = self.get_team_map().matches(store.head_to_head(team_id, opponent_id, limit=limit))
+            else:
+                meetings = self.cache.get_or_load("head_to_head", (team_id, opponent_id), lambda: (
+                    self.get_team_map().matches(self._fetch_all(
+                        queries.HEAD_TO_HEAD, (team_id, opponent_id, opponent_id, team_id)))))
+                record, matches = team_form(team_id, meetings), meetings[:limit]
+        except Exception as e:
+            print(f"Error fetching head-to-head: {e}")
+            record, matches = team_form(team_id, ()), []
+        del record['form']
+        return {"team_id": team_id, "opponent_id": opponent_id, **record, "matches": matches}
+
+    @storage_method
+    def get_team_overview(self, team_id: int, results: int = 5, fixtures: int = 5,
+                          scorers: int = 5) -> Optional[Dict[str, Any]]:
+        """A team page in one query: standing, latest results and form, next fixtures, top scorers"""
+        key = (team_id, current_season(), results, fixtures, scorers)
+        try:
+            return self.cache.get_or_load("team_overview", key, lambda: self._load_team_overview(*key))
         except Exception as e:
-            print(f"Error fetching top scorers: {e}")
+            print(f"Error fetching team overview: {e}")
+            return None
+
+    def _load_team_overview(self, team_id, season, results, fixtures, scorers) -> Dict[str, Any]:
+        store = self.get_match_store()
+        # With the store on, SQL only fetches the standing and scorers; LIMIT 0 skips the match scans
+        limits = (0, 0) if store is not None else (results, fixtures)
+        standing, top, recent, upcoming = queries.overview_sections(self._fetch_all(
+            *queries.team_overview_query(team_id, season, *limits, scorers)))
+        if store is not None:
+            recent = store.fixtures(team_id, ('finished',), 'desc', results)
+            upcoming = store.fixtures(team_id, ('upcoming',), 'asc', fixtures)
+        return team_overview(self.get_team_map(), team_id, season, standing, top, recent, upcoming)
+
+    @storage_method
+    def get_seasons(self) -> List[Dict]:
+        """Every season, newest first, marking the current one"""
+        try:
+            seasons = self.cache.get_or_load("seasons", (), lambda: self._fetch_all(queries.SEASONS))
+        except Exception as e:
+            print(f"Error fetching seasons: {e}")
             return []
+        current = current_season()
+        return [{**season, "current": season['season'] == current} for season in seasons]
 
-# Initialize storage
-storage = FootballDataStorage()
+    @storage_method
+    def get_team_resolver(self) -> TeamResolver:
+        """Name resolver over teams and team_aliases, rebuilt only after either changes"""
+        return self.cache.get_or_load("team_resolver", (), lambda: TeamResolver(
+            self.get_team_map().teams, self._fetch_all(queries.TEAM_ALIASES)))
+
+    @storage_method
+    def get_scrape_jobs(self) -> List[Dict]:
+        """Last run, duration and error of every scrape job, whichever worker ran it"""
+        try:
+            return self._fetch_all(queries.SCRAPE_JOBS)
+        except Exception as e:
+            print(f"Error fetching scrape jobs: {e}")
+            return []
+
+# Shared services. The caches are plain in-memory objects; everything that
+# connects to Postgres or starts a thread is built on first use, so importing
+# this module (e.g. in a preloading WSGI master) stays cheap and each worker
+# process opens its own connections after the fork.
+query_cache = QueryCache()
+responses = ResponseCache(query_cache)
+
+_services: Dict[str, Any] = {}
+_services_lock = threading.RLock()
+
+def _service(name: str, build) -> Any:
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = build()
+    return service
+
+def _build_storage() -> "FootballDataStorage":
+    storage = FootballDataStorage(
+        cache=query_cache, use_match_store=os.getenv('MATCH_STORE', '').lower() in ('1', 'true', 'yes'))
+    # Cross-process invalidation starts together with the storage it keeps fresh
+    get_change_feed()
+    return storage
+
+def _wake_live_feed(event: ChangeEvent):
+    feed = _services.get('live_feed')
+    if feed is not None:
+        feed.notify()
+
+def _build_change_feed() -> ChangeFeed:
+    feed = ChangeFeed(get_db_connection)
+    feed.subscribe(lambda event: get_storage().apply_change(event))
+    feed.subscribe(_wake_live_feed, tables=('matches',))
+    feed.start()
+    return feed
+
+def _build_live_feed() -> LiveFeed:
+    return LiveFeed(
+        get_storage().load_live_matches,
+        dumps=current_app.json.dumps,
+        # Match changes wake the feed through the change feed; this poll is only a safety net
+        interval=float(os.getenv('LIVE_POLL_INTERVAL', 10.0)),
+        # Every open stream holds one of the worker's WEB_THREADS threads; leave the rest for the API
+        max_streams=int(os.getenv('LIVE_STREAM_LIMIT', max(int(os.getenv('WEB_THREADS', 4)) // 2, 1))),
+    )
+
+def _ingest(data) -> Tuple[Dict[str, Dict[str, int]], Set[str]]:
+    """Scheduler write path: map scraped team names to ids and upsert the rows"""
+    from scheduler import scraped_batches
+    batches, unresolved = scraped_batches(data, get_storage().get_team_resolver())
+    return get_storage().upsert_batches(batches), unresolved
+
+def _build_scheduler() -> "ScrapeScheduler":
+    # Imported here so serving the API never loads the scraping stack
+    from scheduler import ScrapeScheduler
+    scheduler = ScrapeScheduler.from_env(_ingest, get_db_connection)
+    # Live scores written by another worker switch this one to the live cadence too
+    get_change_feed().subscribe(lambda event: scheduler.notify(), tables=('matches',))
+    return scheduler
+
+def get_storage() -> "FootballDataStorage":
+    return _service('storage', _build_storage)
+
+def get_change_feed() -> ChangeFeed:
+    return _service('change_feed', _build_change_feed)
+
+def get_live_feed() -> LiveFeed:
+    """The live match feed, created on the first request that needs it"""
+    return _service('live_feed', _build_live_feed)
+
+def get_scheduler() -> "ScrapeScheduler":
+    return _service('scheduler', _build_scheduler)
+
+def start_scheduler() -> Optional["ScrapeScheduler"]:
+    """Start background scraping in this process when SCRAPE_SCHEDULER is set"""
+    if os.getenv('SCRAPE_SCHEDULER', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    scheduler = get_scheduler()
+    scheduler.start()
+    return scheduler
+
+def shutdown_services():
+    """Stop the scheduler and change feed and close the pool of this process"""
+    with _services_lock:
+        if 'scheduler' in _services:
+            _services.pop('scheduler').stop()
+        if 'change_feed' in _services:
+            _services.pop('change_feed').stop()
+        _services.pop('live_feed', None)
+        if 'storage' in _services:
+            _services.pop('storage').pool.close()
+
+storage: "FootballDataStorage" = LocalProxy(get_storage)
+change_feed: ChangeFeed = LocalProxy(get_change_feed)
+live_feed: LiveFeed = LocalProxy(get_live_feed)
+
+def _started_stats(name: str, stats=lambda service: service.stats()):
+    """Stats of a service if this process started it; scraping /metrics must not start it"""
+    return lambda: stats(_services[name]) if name in _services else {}
+
+REGISTRY.add_collector(stats_collector(
+    'db_pool', _started_stats('storage', lambda storage: storage.pool.stats()),
+    counters=('checkouts', 'saturated_waits', 'timeouts', 'reconnects', 'discarded')))
+REGISTRY.add_collector(stats_collector(
+    'change_feed', _started_stats('change_feed'),
+    counters=('events', 'replayed', 'resyncs', 'reconnects', 'errors')))
+REGISTRY.add_collector(stats_collector(
+    'live_feed', _started_stats('live_feed'), counters=('polls', 'errors', 'rejected')))
+REGISTRY.add_collector(stats_collector(
+    'scrape_scheduler', _started_stats('scheduler'), counters=('runs', 'unchanged_runs', 'failures', 'skipped', 'errors')))
+REGISTRY.add_collector(stats_collector(
+    'query_cache', query_cache.stats,
+    counters=('hits', 'misses', 'coalesced', 'evictions', 'invalidations')))
+REGISTRY.add_collector(stats_collector(
+    'response_cache', responses.stats, counters=('not_modified', 'hits', 'rebuilds')))
+
+def _cache_namespace_metrics():
+    """Per-namespace hit and miss counters of the query cache"""
+    namespaces = query_cache.stats().get('namespaces', {})
+    return [
+        (f"query_cache_namespace_{field}_total", 'counter', f"query cache {field} by namespace",
+         [({'namespace': name}, counts.get(field, 0)) for name, counts in sorted(namespaces.items())])
+        for field in ('hits', 'misses')
+    ]
+
+REGISTRY.add_collector(_cache_namespace_metrics)
 
 # Routes
-@app.route('/')
+routes = Blueprint('football', __name__)
+
+@routes.route('/')
 def index():
     """Main application route"""
     return render_template('index.html')
 
-@app.route('/api/health')
+@routes.route('/api/health')
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "OK", "timestamp": datetime.now().isoformat()})
+    return jsonify({
+        "status": "OK",
+        "timestamp": datetime.now().isoformat(),
+        "pool": storage.pool.stats(),
+        "cache": storage.cache.stats(),
+        "responses": responses.stats(),
+        "live_feed": live_feed.stats(),
+        "change_feed": change_feed.stats(),
+        "match_store": storage.match_store.stats() if storage.match_store is not None else None,
+        "leaderboards": storage.leaderboards.stats() if storage.leaderboards is not None else None
+    })
 
 # Teams endpoints
-@app.route('/api/teams')
+@routes.route('/api/teams')
+@responses.cached('teams')
 def get_teams():
     """Get all teams"""
     try:
-        teams = storage.get_teams()
-        return jsonify(teams)
+        return storage.get_teams()
     except Exception as e:
         return jsonify({"message": "Failed to fetch teams", "error": str(e)}), 500
 
-@app.route('/api/teams/<slug>')
+@routes.route('/api/teams/<slug>')
+@responses.cached('team_by_slug')
 def get_team_by_slug(slug):
     """Get team by slug"""
     try:
         team = storage.get_team_by_slug(slug)
         if not team:
             return jsonify({"message": "Team not found"}), 404
-        return jsonify(team)
+        return team
     except Exception as e:
         return jsonify({"message": "Failed to fetch team", "error": str(e)}), 500
 
+@routes.route('/api/teams/<slug>/fixtures')
+@responses.cached('team_fixtures', vary=('status', 'order', 'limit'))
+def get_team_fixtures(slug):
+    """Get a team's matches: ?status=&order=&limit="""
+    try:
+        statuses, order = status_filter(request.args), order_filter(request.args)
+        limit = limit_filter(request.args, default=20)
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        team = storage.get_team_by_slug(slug)
+        if not team:
+            return jsonify({"message": "Team not found"}), 404
+        return storage.get_team_fixtures(team['id'], statuses, order, limit)
+    except Exception as e:
+        return jsonify({"message": "Failed to fetch fixtures", "error": str(e)}), 500
+
+@routes.route('/api/teams/<slug>/form')
+@responses.cached('team_form', vary=('last',))
+def get_team_form(slug):
+    """Get a team's recent results: ?last="""
+    try:
+        last = limit_filter(request.args, default=5, maximum=50, name='last')
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        team = storage.get_team_by_slug(slug)
+        if not team:
+            return jsonify({"message": "Team not found"}), 404
+        return storage.get_team_form(team['id'], last)
+    except Exception as e:
+        return jsonify({"message": "Failed to fetch form", "error": str(e)}), 500
+
+@routes.route('/api/teams/<slug>/head-to-head/<opponent>')
+@responses.cached('head_to_head', vary=('limit',))
+def get_head_to_head(slug, opponent):
+    """Get a team's record against another and their latest meetings: ?limit="""
+    try:
+        limit = limit_filter(request.args, default=10)
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        team, other = storage.get_team_by_slug(slug), storage.get_team_by_slug(opponent)
+        if not team or not other:
+            return jsonify({"message": "Team not found"}), 404
+        return storage.get_head_to_head(team['id'], other['id'], limit)
+    except Exception as e:
+        return jsonify({"message": "Failed to fetch head-to-head", "error": str(e)}), 500
+
+@routes.route('/api/teams/<slug>/overview')
+@responses.cached('team_overview', vary=('results', 'fixtures', 'scorers'))
+def get_team_overview(slug):
+    """Get everything a team page shows in one response: ?results=&fixtures=&scorers="""
+    try:
+        results = limit_filter(request.args, default=5, maximum=50, name='results')
+        fixtures = limit_filter(request.args, default=5, maximum=50, name='fixtures')
+        scorers = limit_filter(request.args, default=5, maximum=50, name='scorers')
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        team = storage.get_team_by_slug(slug)
+        if not team:
+            return jsonify({"message": "Team not found"}), 404
+        overview = storage.get_team_overview(team['id'], results, fixtures, scorers)
+        if overview is None:
+            return jsonify({"message": "Failed to fetch team overview"}), 500
+        return overview
+    except Exception as e:
+        return jsonify({"message": "Failed to fetch team overview", "error": str(e)}), 500
+
 # Matches endpoints
-@app.route('/api/matches')
+@routes.route('/api/matches')
+@responses.cached('matches', vary=('team', 'status', 'competition', 'season', 'from', 'to', 'cursor', 'limit',
+                                   'order'))
 def get_matches():
-    """Get all matches"""
+    """Get a page of matches: ?team=&status=&competition=&season=&from=&to=&limit=&order=&cursor="""
+    try:
+        filters = match_filters(request.args)
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
     try:
-        matches = storage.get_matches()
-        return jsonify(matches)
+        return storage.get_matches_page(**filters)
     except Exception as e:
         return jsonify({"message": "Failed to fetch matches", "error": str(e)}), 500
 
-@app.route('/api/matches/live')
+@routes.route('/api/matches/live')
+@responses.cached('live_matches')
 def get_live_matches():
     """Get live matches"""
     try:
-        matches = storage.get_live_matches()
-        return jsonify(matches)
+        return storage.get_live_matches()
     except Exception as e:
         return jsonify({"message": "Failed to fetch live matches", "error": str(e)}), 500
 
-@app.route('/api/matches/upcoming')
+@routes.route('/api/matches/live/stream')
+def stream_live_matches():
+    """Server-Sent Events stream of live match changes, up to LIVE_STREAM_LIMIT per worker"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    chunks = live_feed.open_stream(last_event_id)
+    if chunks is None:
+        # Clients reconnect after Retry-After; the ASGI server has no such cap
+        return jsonify({"message": "Too many live streams, try again later"}), 503, {'Retry-After': '30'}
+    return Response(
+        stream_with_context(chunks),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@routes.route('/api/matches/upcoming')
+@responses.cached('upcoming_matches')
 def get_upcoming_matches():
     """Get upcoming matches"""
     try:
-        matches = storage.get_upcoming_matches()
-        return jsonify(matches)
+        return storage.get_upcoming_matches()
     except Exception as e:
         return jsonify({"message": "Failed to fetch upcoming matches", "error": str(e)}), 500
 
 # Standings endpoint
-@app.route('/api/standings')
+@routes.route('/api/standings')
+@responses.cached('standings', vary=('season',))
 def get_standings():
-    """Get standings"""
+    """Get standings: ?season= (default: the current season)"""
     try:
-        standings = storage.get_standings()
-        return jsonify(standings)
+        season = season_filter(request.args)
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        return storage.get_standings(season)
     except Exception as e:
         return jsonify({"message": "Failed to fetch standings", "error": str(e)}), 500
 
+# Seasons endpoint
+@routes.route('/api/seasons')
+@responses.cached('seasons')
+def get_seasons():
+    """Get seasons, newest first"""
+    try:
+        return storage.get_seasons()
+    except Exception as e:
+        return jsonify({"message": "Failed to fetch seasons", "error": str(e)}), 500
+
 # Players endpoints
-@app.route('/api/players/top-scorers')
+@routes.route('/api/players/top-scorers')
+@responses.cached('top_scorers', vary=('limit', 'season'))
 def get_top_scorers():
-    """Get top scorers"""
+    """Get top scorers: ?limit=&season= (default: the current season)"""
     try:
-        limit = request.args.get('limit', 10, type=int)
-        top_scorers = storage.get_top_scorers(limit)
-        return jsonify(top_scorers)
+        season = season_filter(request.args)
+        limit = limit_filter(request.args, default=10, maximum=MAX_LEADERBOARD_LIMIT)
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        return storage.get_top_scorers(limit, season)
     except Exception as e:
         return jsonify({"message": "Failed to fetch top scorers", "error": str(e)}), 500
 
+@routes.route('/api/players/leaderboards/<metric>')
+@responses.cached('leaderboards', vary=('season', 'team', 'limit', 'cursor'))
+def get_leaderboard(metric):
+    """Get players ranked on goals, assists, contributions or goals_per_appearance: ?season=&team=&limit=&cursor="""
+    try:
+        metric = metric_filter(metric)
+        season = season_filter(request.args)
+        limit = limit_filter(request.args, default=10, maximum=MAX_LEADERBOARD_LIMIT)
+        cursor = decode_rank_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        team_id = None
+        if request.args.get('team'):
+            team = storage.get_team_by_slug(request.args['team'])
+            if not team:
+                return jsonify({"message": "Team not found"}), 404
+            team_id = team['id']
+        return storage.get_leaderboard(metric, season, team_id, limit, cursor)
+    except Exception as e:
+        return jsonify({"message": "Failed to fetch leaderboard", "error": str(e)}), 500
+
+@routes.route('/api/players/<int:player_id>/rank')
+@responses.cached('leaderboards', vary=('metric', 'scope', 'around'))
+def get_player_rank(player_id):
+    """Get a player's rank and the players around them: ?metric=&scope=league|team&around="""
+    try:
+        metric = metric_filter(request.args.get('metric', 'goals'))
+        scope = request.args.get('scope', 'league')
+        if scope not in ('league', 'team'):
+            raise InvalidParameter("scope must be 'league' or 'team'")
+        around = limit_filter(request.args, default=2, maximum=MAX_LEADERBOARD_LIMIT // 2, name='around')
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        rank = storage.get_player_rank(player_id, metric, scope == 'team', around)
+        if rank is None:
+            return jsonify({"message": "Player not found"}), 404
+        return rank
+    except Exception as e:
+        return jsonify({"message": "Failed to fetch player rank", "error": str(e)}), 500
+
+@routes.route('/api/scrape/jobs')
+def get_scrape_jobs():
+    """Last run of every scrape job, plus this worker's schedule if it runs the scheduler"""
+    scheduler = _services.get('scheduler')
+    return jsonify({
+        "jobs": storage.get_scrape_jobs(),
+        "scheduler": {**scheduler.stats(), "jobs": scheduler.status()} if scheduler else None
+    })
+
+@routes.route('/api/scrape/teams')
+def get_scrape_teams():
+    """Scraped team names this worker could not resolve or matched fuzzily"""
+    try:
+        return jsonify(storage.get_team_resolver().report())
+    except Exception as e:
+        return jsonify({"message": "Failed to build team resolver", "error": str(e)}), 500
+
+# Export endpoints: streamed as a JSON array, or NDJSON with ?format=ndjson
+@routes.route('/api/matches/export')
+def export_matches():
+    """Stream every match matching the /api/matches filters"""
+    try:
+        filters = match_filters(request.args)
+    except InvalidParameter as e:
+        return jsonify({"message": str(e)}), 400
+    filters.pop('limit')
+    return stream_rows(storage.stream_matches(**filters), export_format(request.args, request.headers))
+
+@routes.route('/api/players/export')
+def export_players():
+    """Stream every player"""
+    return stream_rows(storage.stream_players(), export_format(request.args, request.headers))
+
 # PayPal endpoints
-@app.route('/api/paypal/setup')
+@routes.route('/api/paypal/setup')
 def paypal_setup():
     """Get PayPal client token"""
     try:
+        get_paypal()
         return jsonify({
-            "clientToken": paypal_client_id  # For client-side PayPal SDK
+            "clientToken": paypal_credentials()[0]  # For client-side PayPal SDK
         })
     except Exception as e:
         return jsonify({"error": "Failed to setup PayPal"}), 500
 
-@app.route('/api/paypal/order', methods=['POST'])
+@routes.route('/api/paypal/order', methods=['POST'])
 def create_paypal_order():
     """Create PayPal order"""
     try:
@@ -378,7 +976,7 @@ def create_paypal_order():
         if not amount or float(amount) <= 0:
             return jsonify({"error": "Invalid amount"}), 400
         
-        payment = paypalrestsdk.Payment({
+        payment = get_paypal().Payment({
             "intent": intent.lower(),
             "payer": {
                 "payment_method": "paypal"
@@ -413,11 +1011,11 @@ def create_paypal_order():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/paypal/order/<order_id>/capture', methods=['POST'])
+@routes.route('/api/paypal/order/<order_id>/capture', methods=['POST'])
 def capture_paypal_order(order_id):
     """Capture PayPal order"""
     try:
-        payment = paypalrestsdk.Payment.find(order_id)
+        payment = get_paypal().Payment.find(order_id)
         
         request_json = request.get_json() or {}
         if payment.execute({"payer_id": request_json.get('payer_id')}):
@@ -429,7 +1027,7 @@ def capture_paypal_order(order_id):
         return jsonify({"error": str(e)}), 500
 
 # Static files
-@app.route('/static/<path:filename>')
+@routes.route('/static/<path:filename>')
 def static_files(filename):
     """Serve static files"""
     return send_from_directory('static', filename)
@@ -465,9 +1063,29 @@ def initialize_data():
     except Exception as e:
         print(f"❌ Failed to initialize data: {e}")
 
+def create_app() -> Flask:
+    """Build the Flask application without touching the database.
+    
+    Storage, the change feed and PayPal are set up lazily by the first
+    request that needs them.
+    """
+    app = Flask(__name__, template_folder='templates', static_folder='static')
+    CORS(app)
+    instrument_app(app)
+    app.register_blueprint(routes)
+    
+    if not all(paypal_credentials()):
+        print("⚠️ PAYPAL_CLIENT_ID / PAYPAL_CLIENT_SECRET not set; PayPal endpoints will fail")
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
+    # The dev server migrates in-process; production runs this once from the launcher
+    migrate_database()
     # Initialize data
     initialize_data()
+    start_scheduler()
     
     # Start Flask app
     port = int(os.getenv('PORT', 8000))  # Use port 8000 to avoid conflict
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+ASGI server mode: the read API on asyncpg, served by Starlette under uvicorn
+
+The /api read endpoints answer exactly as the Flask views do (same bodies,
+ETags and status codes) without a thread per request or per live stream.
+Pages, static files and PayPal keep running on the Flask app, mounted
+underneath; writes keep going through the synchronous storage.
+
+    uvicorn asgi_app:app --workers 4
+"""
+
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Sequence
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as wsgi
+from async_storage import AsyncFootballDataStorage
+from change_feed import ChangeFeed
+from live_feed import AsyncLiveFeed
+from metrics import CONTENT_TYPE, REGISTRY, SERIALIZE_DURATION, ASGIMetrics, failed_queries, stats_collector
+from leaderboards import MAX_LIMIT as MAX_LEADERBOARD_LIMIT, metric_filter
+from pagination import InvalidParameter, decode_rank_cursor, limit_filter, match_filters, season_filter
+from streaming import NDJSON_MIMETYPE, export_format, json_array_chunks_async, ndjson_chunks_async
+
+# Encoded like flask.json.response outside debug mode, so both servers hand
+# out byte-identical bodies and therefore the same ETags
+_dumps = partial(wsgi.app.json.dumps, indent=None, separators=(',', ':'))
+
+
+def _encode(data: Any) -> bytes:
+    return (_dumps(data) + '\n').encode()
+
+
+def json_response(data: Any, status: int = 200) -> Response:
+    return Response(_encode(data), status_code=status, media_type='application/json')
+
+
+async def cached(request: Request, namespace: str, load: Callable[[], Awaitable[Any]],
+                 vary: Sequence[str] = ()) -> Response:
+    """ResponseCache.cached for coroutine views: 304s and cached bodies skip ``load`` entirely.
+
+    As there, a failed query turns the result into a 500 that is not stored.
+    """
+    responses = wsgi.responses
+    key = (
+        namespace,
+        tuple(sorted(request.path_params.items())),
+        tuple((name, request.query_params.get(name)) for name in vary),
+    )
+    versions = responses.query_cache.version(responses.query_cache.tables_for(namespace))
+
+    entry = responses.lookup(key, versions)
+    if entry is None:
+        with failed_queries() as failures:
+            result = await load()
+        if failures:
+            return json_response({"message": "Failed to fetch data", "error": failures[0][1]}, 500)
+        if isinstance(result, Response):
+            return result
+        with SERIALIZE_DURATION.time(namespace=namespace):
+            body = _encode(result)
+        entry = responses.store(key, namespace, body, versions)
+
+    not_modified, headers = responses.validate(
+        entry, request.headers.get('if-none-match'), request.headers.get('if-modified-since'))
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type='application/json', headers=headers)
+
+
+async def stream_rows(rows: AsyncIterator[Dict], fmt: str = 'json') -> Response:
+    """streaming.stream_rows for async row iterators"""
+    dumps = partial(wsgi.app.json.dumps, separators=(',', ':'))
+    encode = ndjson_chunks_async if fmt == 'ndjson' else json_array_chunks_async
+
+    # Run the query before committing to a 200, so a failing one still gets a 500
+    try:
+        head = [await rows.__anext__()]
+    except StopAsyncIteration:
+        head = []
+    except Exception as e:
+        await rows.aclose()
+        print(f"Error starting export: {e}")
+        return json_response({"message": "Failed to export", "error": str(e)}, 500)
+
+    async def chained() -> AsyncIterator[Dict]:
+        for row in head:
+            yield row
+        async for row in rows:
+            yield row
+
+    async def generate() -> AsyncIterator[str]:
+        try:
+            async for chunk in encode(chained(), dumps):
+                yield chunk
+        except Exception as e:
+            print(f"Error streaming export: {e}")
+            if fmt == 'ndjson':
+                yield dumps({"error": str(e)}) + '\n'
+        finally:
+            # Hands the connection back even if the client went away mid-stream
+            await rows.aclose()
+
+    mimetype = NDJSON_MIMETYPE if fmt == 'ndjson' else 'application/json'
+    return StreamingResponse(generate(), media_type=mimetype,
+                             headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-store'})
+
+
+# Routes
+async def health_check(request: Request) -> Response:
+    """Health check endpoint"""
+    state = request.app.state
+    return json_response({
+        "status": "OK",
+        "timestamp": datetime.now().isoformat(),
+        "pool": state.storage.stats(),
+        "cache": wsgi.query_cache.stats(),
+        "responses": wsgi.responses.stats(),
+        "live_feed": state.live_feed.stats(),
+        "change_feed": state.change_feed.stats()
+    })
+
+
+async def get_teams(request: Request) -> Response:
+    """Get all teams"""
+    return await cached(request, 'teams', request.app.state.storage.get_teams)
+
+
+async def get_team_by_slug(request: Request) -> Response:
+    """Get team by slug"""
+    async def load():
+        team = await request.app.state.storage.get_team_by_slug(request.path_params['slug'])
+        if not team:
+            return json_response({"message": "Team not found"}, 404)
+        return team
+    return await cached(request, 'team_by_slug', load)
+
+
+async def get_team_overview(request: Request) -> Response:
+    """Get everything a team page shows in one response: ?results=&fixtures=&scorers="""
+    async def load():
+        params = request.query_params
+        try:
+            results = limit_filter(params, default=5, maximum=50, name='results')
+            fixtures = limit_filter(params, default=5, maximum=50, name='fixtures')
+            scorers = limit_filter(params, default=5, maximum=50, name='scorers')
+        except InvalidParameter as e:
+            return json_response({"message": str(e)}, 400)
+        storage = request.app.state.storage
+        team = await storage.get_team_by_slug(request.path_params['slug'])
+        if not team:
+            return json_response({"message": "Team not found"}, 404)
+        overview = await storage.get_team_overview(team['id'], results, fixtures, scorers)
+        if overview is None:
+            return json_response({"message": "Failed to fetch team overview"}, 500)
+        return overview
+    return await cached(request, 'team_overview', load, vary=('results', 'fixtures', 'scorers'))
+
+
+async def get_matches(request: Request) -> Response:
+    """Get a page of matches: ?team=&status=&competition=&season=&from=&to=&limit=&order=&cursor="""
+    async def load():
+        try:
+            filters = match_filters(request.query_params)
+        except InvalidParameter as e:
+            return json_response({"message": str(e)}, 400)
+        return await request.app.state.storage.get_matches_page(**filters)
+    return await cached(request, 'matches', load,
+                        vary=('team', 'status', 'competition', 'season', 'from', 'to', 'cursor', 'limit', 'order'))
+
+
+async def get_live_matches(request: Request) -> Response:
+    """Get live matches"""
+    return await cached(request, 'live_matches', request.app.state.storage.get_live_matches)
+
+
+async def stream_live_matches(request: Request) -> Response:
+    """Server-Sent Events stream of live match changes"""
+    last_event_id = request.headers.get('last-event-id') or request.query_params.get('lastEventId')
+    return StreamingResponse(
+        request.app.state.live_feed.stream(last_event_id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def get_upcoming_matches(request: Request) -> Response:
+    """Get upcoming matches"""
+    return await cached(request, 'upcoming_matches', request.app.state.storage.get_upcoming_matches)
+
+
+async def get_standings(request: Request) -> Response:
+    """Get standings: ?season= (default: the current season)"""
+    async def load():
+        try:
+            season = season_filter(request.query_params)
+        except InvalidParameter as e:
+            return json_response({"message": str(e)}, 400)
+        return await request.app.state.storage.get_standings(season)
+    return await cached(request, 'standings', load, vary=('season',))
+
+
+async def get_seasons(request: Request) -> Response:
+    """Get seasons, newest first"""
+    return await cached(request, 'seasons', request.app.state.storage.get_seasons)
+
+
+async def get_top_scorers(request: Request) -> Response:
+    """Get top scorers: ?limit=&season= (default: the current season)"""
+    async def load():
+        try:
+            season = season_filter(request.query_params)
+            limit = limit_filter(request.query_params, default=10, maximum=MAX_LEADERBOARD_LIMIT)
+        except InvalidParameter as e:
+            return json_response({"message": str(e)}, 400)
+        return await request.app.state.storage.get_top_scorers(limit, season)
+    return await cached(request, 'top_scorers', load, vary=('limit', 'season'))
+
+
+async def get_leaderboard(request: Request) -> Response:
+    """Get players ranked on goals, assists, contributions or goals_per_appearance: ?season=&team=&limit=&cursor="""
+    async def load():
+        params = request.query_params
+        try:
+            metric = metric_filter(request.path_params['metric'])
+            season = season_filter(params)
+            limit = limit_filter(params, default=10, maximum=MAX_LEADERBOARD_LIMIT)
+            cursor = decode_rank_cursor(params['cursor']) if params.get('cursor') else None
+        except InvalidParameter as e:
+            return json_response({"message": str(e)}, 400)
+        storage = request.app.state.storage
+        team_id = None
+        if params.get('team'):
+            team = await storage.get_team_by_slug(params['team'])
+            if not team:
+                return json_response({"message": "Team not found"}, 404)
+            team_id = team['id']
+        return await storage.get_leaderboard(metric, season, team_id, limit, cursor)
+    return await cached(request, 'leaderboards', load, vary=('season', 'team', 'limit', 'cursor'))
+
+
+async def get_player_rank(request: Request) -> Response:
+    """Get a player's rank and the players around them: ?metric=&scope=league|team&around="""
+    async def load():
+        params = request.query_params
+        try:
+            metric = metric_filter(params.get('metric', 'goals'))
+            scope = params.get('scope', 'league')
+            if scope not in ('league', 'team'):
+                raise InvalidParameter("scope must be 'league' or 'team'")
+            around = limit_filter(params, default=2, maximum=MAX_LEADERBOARD_LIMIT // 2, name='around')
+        except InvalidParameter as e:
+            return json_response({"message": str(e)}, 400)
+        rank = await request.app.state.storage.get_player_rank(
+            request.path_params['player_id'], metric, scope == 'team', around)
+        if rank is None:
+            return json_response({"message": "Player not found"}, 404)
+        return rank
+    return await cached(request, 'leaderboards', load, vary=('metric', 'scope', 'around'))
+
+
+async def export_matches(request: Request) -> Response:
+    """Stream every match matching the /api/matches filters"""
+    try:
+        filters = match_filters(request.query_params)
+    except InvalidParameter as e:
+        return json_response({"message": str(e)}, 400)
+    filters.pop('limit')
+    storage = request.app.state.storage
+    return await stream_rows(storage.stream_matches(**filters),
+                             export_format(request.query_params, request.headers))
+
+
+async def export_players(request: Request) -> Response:
+    """Stream every player"""
+    return await stream_rows(request.app.state.storage.stream_players(),
+                             export_format(request.query_params, request.headers))
+
+
+async def metrics(request: Request) -> Response:
+    return Response(REGISTRY.render(), headers={'Content-Type': CONTENT_TYPE})
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """Per worker process: async pool, live feed producer, change feed listener and scrape scheduler"""
+    storage = await AsyncFootballDataStorage.create(cache=wsgi.query_cache)
+    live_feed = AsyncLiveFeed(
+        storage.load_live_matches,
+        dumps=wsgi.app.json.dumps,
+        # Match changes wake the feed through the change feed; this poll is only a safety net
+        interval=float(os.getenv('LIVE_POLL_INTERVAL', 10.0)),
+    )
+    change_feed = ChangeFeed(wsgi.get_db_connection)
+    change_feed.subscribe(lambda event: storage.invalidate(event.table))
+    change_feed.subscribe(lambda event: live_feed.notify(), tables=('matches',))
+    change_feed.start()
+
+    REGISTRY.add_collector(stats_collector('async_db_pool', storage.stats))
+    REGISTRY.add_collector(stats_collector(
+        'change_feed', change_feed.stats, counters=('events', 'replayed', 'resyncs', 'reconnects', 'errors')))
+    REGISTRY.add_collector(stats_collector('live_feed', live_feed.stats, counters=('polls', 'errors')))
+
+    # Writes, the scheduler's included, go through the synchronous storage
+    wsgi.start_scheduler()
+
+    app.state.storage = storage
+    app.state.live_feed = live_feed
+    app.state.change_feed = change_feed
+    try:
+        yield
+    finally:
+        change_feed.stop()
+        await live_feed.close()
+        await storage.close()
+        wsgi.shutdown_services()
+
+
+def create_app() -> Starlette:
+    """The ASGI application; everything not routed here falls through to Flask"""
+    routes = [
+        Route('/api/health', health_check),
+        Route('/api/teams', get_teams),
+        Route('/api/teams/{slug}', get_team_by_slug),
+        Route('/api/teams/{slug}/overview', get_team_overview),
+        Route('/api/matches', get_matches),
+        Route('/api/matches/live', get_live_matches),
+        Route('/api/matches/live/stream', stream_live_matches),
+        Route('/api/matches/upcoming', get_upcoming_matches),
+        Route('/api/matches/export', export_matches),
+        Route('/api/standings', get_standings),
+        Route('/api/seasons', get_seasons),
+        Route('/api/players/top-scorers', get_top_scorers),
+        Route('/api/players/leaderboards/{metric}', get_leaderboard),
+        Route('/api/players/{player_id:int}/rank', get_player_rank),
+        Route('/api/players/export', export_players),
+        Route('/metrics', metrics),
+        Mount('/', app=WSGIMiddleware(wsgi.app)),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan, middleware=[Middleware(ASGIMetrics)])
+
+
+app = create_app()
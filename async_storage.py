@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+asyncio storage backend on asyncpg for the ASGI server
+"""
+
+import os
+from datetime import datetime
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import asyncpg
+from psycopg2.extensions import parse_dsn
+
+import queries
+from leaderboards import Leaderboards
+from match_store import team_overview
+from metrics import current_method, storage_method, timed_query
+from pagination import page_of
+from seasons import current_season, season_bounds
+from query_cache import QueryCache
+from streaming import STREAM_FETCH_SIZE
+from team_map import TeamMap
+
+
+# libpq keyword -> asyncpg connect() argument
+_DSN_KEYWORDS = {'host': 'host', 'port': 'port', 'user': 'user', 'password': 'password', 'dbname': 'database',
+                 'sslmode': 'ssl'}
+
+
+def connect_args(dsn: str) -> Dict[str, Any]:
+    """asyncpg only parses URLs; turn a libpq ``key=value`` DSN into keyword arguments"""
+    if '://' in dsn:
+        return {'dsn': dsn}
+    return {_DSN_KEYWORDS[key]: value for key, value in parse_dsn(dsn).items() if key in _DSN_KEYWORDS}
+
+
+class AsyncFootballDataStorage:
+    """The read side of FootballDataStorage as coroutines on an asyncpg pool.
+
+    Runs the same SQL (``queries``) through the same cache namespaces and
+    returns the same shapes, so both servers answer the /api contract
+    identically. Writes stay on the synchronous storage; this process
+    learns about them through the change feed.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, cache: Optional[QueryCache] = None, timeout: float = 10.0):
+        self.pool = pool
+        self.cache = cache or QueryCache()
+        # Seconds to wait for a free connection, like ConnectionPool.timeout
+        self.timeout = timeout
+
+    @classmethod
+    async def create(cls, dsn: Optional[str] = None, cache: Optional[QueryCache] = None) -> "AsyncFootballDataStorage":
+        """Open a pool sized from ASYNC_DB_POOL_MIN / ASYNC_DB_POOL_MAX / DB_POOL_TIMEOUT"""
+        pool = await asyncpg.create_pool(
+            **connect_args(dsn or os.getenv('DATABASE_URL')),
+            min_size=int(os.getenv('ASYNC_DB_POOL_MIN', 2)),
+            max_size=int(os.getenv('ASYNC_DB_POOL_MAX', 20)),
+        )
+        return cls(pool, cache, timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)))
+
+    async def close(self):
+        await self.pool.close()
+
+    def invalidate(self, *tables: str):
+        """Drop cached reads for tables that were just written (all tables if none given)"""
+        self.cache.invalidate(*tables)
+
+    async def _fetch_all(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Run a read query on a pooled connection and return all rows"""
+        with timed_query() as rows:
+            async with self.pool.acquire(timeout=self.timeout) as conn:
+                result = [dict(row) for row in await conn.fetch(queries.numbered(query), *params)]
+            rows.append(len(result))
+        return result
+
+    def _stream(self, query: str, params: tuple = (), fetch_size: int = STREAM_FETCH_SIZE,
+                hydrate: Callable[[Dict], Dict] = lambda row: row,
+                method: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Yield rows through a cursor, ``fetch_size`` at a time, each passed through ``hydrate``.
+
+        The connection stays acquired until the iterator is exhausted or
+        closed with ``aclose()``.
+        """
+        method = method or current_method()
+
+        async def rows() -> AsyncIterator[Dict]:
+            with timed_query(method) as count:
+                async with self.pool.acquire(timeout=self.timeout) as conn:
+                    # asyncpg cursors only live inside a transaction
+                    async with conn.transaction(readonly=True):
+                        seen = 0
+                        async for row in conn.cursor(queries.numbered(query), *params, prefetch=fetch_size):
+                            seen += 1
+                            yield hydrate(dict(row))
+                        count.append(seen)
+        return rows()
+
+    def _stream_with_teams(self, build: Callable[[TeamMap], Tuple[str, tuple]],
+                           hydrate: Callable[[TeamMap, Dict], Dict]) -> AsyncIterator[Dict]:
+        """_stream for a query built from the team map, e.g. to filter by a team's id.
+
+        The map is awaited on the first ``__anext__``, so a failure to load
+        it surfaces where a failing query would.
+        """
+        method = current_method()
+
+        async def rows() -> AsyncIterator[Dict]:
+            teams = await self.get_team_map()
+            query, params = build(teams)
+            stream = self._stream(query, params, hydrate=partial(hydrate, teams), method=method)
+            try:
+                async for row in stream:
+                    yield row
+            finally:
+                await stream.aclose()
+        return rows()
+
+    @storage_method
+    async def get_team_map(self) -> TeamMap:
+        """Every team by id and slug; shared with the synchronous storage through the cache"""
+        async def load() -> TeamMap:
+            return TeamMap(await self._fetch_all(queries.TEAMS))
+        return await self.cache.get_or_load_async("team_map", (), load)
+
+    @storage_method
+    async def get_teams(self) -> List[Dict]:
+        """Get all teams"""
+        try:
+            return list((await self.get_team_map()).teams)
+        except Exception as e:
+            print(f"Error fetching teams: {e}")
+            return []
+
+    @storage_method
+    async def get_team_by_slug(self, slug: str) -> Optional[Dict]:
+        """Get team by slug"""
+        try:
+            return (await self.get_team_map()).by_slug.get(slug)
+        except Exception as e:
+            print(f"Error fetching team by slug: {e}")
+            return None
+
+    @storage_method
+    async def get_matches_page(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                               competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                               date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                               limit: int = 50, order: str = 'desc') -> Dict[str, Any]:
+        """One keyset page of matches; see FootballDataStorage.get_matches_page"""
+        key = (team, statuses, competition, date_from, date_to, cursor, limit, order)
+        try:
+            return await self.cache.get_or_load_async("matches", key, lambda: self._load_matches_page(*key))
+        except Exception as e:
+            print(f"Error fetching matches: {e}")
+            return {"data": [], "next_cursor": None}
+
+    async def _load_matches_page(self, team, statuses, competition, date_from, date_to, cursor, limit,
+                                 order) -> Dict[str, Any]:
+        teams = await self.get_team_map()
+        # One extra row tells us whether there is a next page
+        query, params = queries.matches_query(teams.id_of(team) if team else None, statuses, competition,
+                                              date_from, date_to, cursor, order, limit + 1)
+        return page_of(teams.matches(await self._fetch_all(query, params)), limit)
+
+    @storage_method
+    def stream_matches(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                       competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                       order: str = 'desc') -> AsyncIterator[Dict]:
+        """Every matching match, in page order, read through a cursor"""
+        return self._stream_with_teams(lambda teams: queries.matches_query(
+            teams.id_of(team) if team else None, statuses, competition, date_from, date_to, cursor, order, None),
+            TeamMap.match)
+
+    @storage_method
+    async def load_live_matches(self) -> List[Dict]:
+        """Live matches straight from the database, bypassing the cache"""
+        teams = await self.get_team_map()
+        return teams.matches(await self._fetch_all(queries.LIVE_MATCHES, (season_bounds(current_season())[0],)))
+
+    @storage_method
+    async def get_live_matches(self) -> List[Dict]:
+        """Get live matches"""
+        try:
+            return await self.cache.get_or_load_async("live_matches", (), self.load_live_matches)
+        except Exception as e:
+            print(f"Error fetching live matches: {e}")
+            return []
+
+    @storage_method
+    async def get_upcoming_matches(self) -> List[Dict]:
+        """Get upcoming matches"""
+        try:
+            starts = season_bounds(current_season())[0]
+            async def load() -> List[Dict]:
+                teams = await self.get_team_map()
+                return teams.matches(await self._fetch_all(queries.UPCOMING_MATCHES, (starts,)))
+            return await self.cache.get_or_load_async("upcoming_matches", starts, load)
+        except Exception as e:
+            print(f"Error fetching upcoming matches: {e}")
+            return []
+
+    @storage_method
+    async def get_standings(self, season: Optional[str] = None) -> List[Dict]:
+        """Get standings with team information for a season (default: the current one)"""
+        season = season or current_season()
+        try:
+            async def load() -> List[Dict]:
+                teams = await self.get_team_map()
+                return teams.standings(await self._fetch_all(queries.STANDINGS, (season,)))
+            return await self.cache.get_or_load_async("standings", season, load)
+        except Exception as e:
+            print(f"Error fetching standings: {e}")
+            return []
+
+    @storage_method
+    async def get_top_scorers(self, limit: int = 10, season: Optional[str] = None) -> List[Dict]:
+        """Get top scorers with team information for a season (default: the current one)"""
+        return (await self.get_leaderboard('goals', season, limit=limit))['data']
+
+    @storage_method
+    async def get_leaderboards(self) -> Leaderboards:
+        """Every player ranked per season, metric and team, rebuilt after players change"""
+        async def load() -> Leaderboards:
+            return Leaderboards(await self._fetch_all(queries.LEADERBOARD_ROWS))
+        return await self.cache.get_or_load_async("player_boards", (), load)
+
+    @storage_method
+    async def get_leaderboard(self, metric: str, season: Optional[str] = None, team_id: Optional[int] = None,
+                              limit: int = 10, cursor: Optional[Tuple[float, int]] = None) -> Dict[str, Any]:
+        """One page of a season's players (default: the current season) ranked on ``metric``, best first"""
+        season = season or current_season()
+        try:
+            page = (await self.get_leaderboards()).page(metric, season, team_id, limit, cursor)
+            (await self.get_team_map()).players(page['data'])
+        except Exception as e:
+            print(f"Error fetching leaderboard: {e}")
+            page = {"data": [], "total": 0, "next_cursor": None}
+        return {"metric": metric, "season": season, **page}
+
+    @storage_method
+    async def get_player_rank(self, player_id: int, metric: str = 'goals', team: bool = False,
+                              around: int = 2) -> Optional[Dict[str, Any]]:
+        """A player's rank on ``metric`` in their season (or their team), with the players around them"""
+        try:
+            rank = (await self.get_leaderboards()).rank_of(player_id, metric, team, around)
+            if rank is not None:
+                (await self.get_team_map()).players(rank['data'])
+        except Exception as e:
+            print(f"Error fetching player rank: {e}")
+            return None
+        return {"metric": metric, **rank} if rank is not None else None
+
+    @storage_method
+    async def get_team_overview(self, team_id: int, results: int = 5, fixtures: int = 5,
+                                scorers: int = 5) -> Optional[Dict[str, Any]]:
+        """A team page in one query: standing, latest results and form, next fixtures, top scorers"""
+        season = current_season()
+        try:
+            async def load() -> Dict[str, Any]:
+                teams = await self.get_team_map()
+                sections = queries.overview_sections(await self._fetch_all(
+                    *queries.team_overview_query(team_id, season, results, fixtures, scorers)))
+                return team_overview(teams, team_id, season, *sections)
+            return await self.cache.get_or_load_async(
+                "team_overview", (team_id, season, results, fixtures, scorers), load)
+        except Exception as e:
+            print(f"Error fetching team overview: {e}")
+            return None
+
+    @storage_method
+    async def get_seasons(self) -> List[Dict]:
+        """Every season, newest first, marking the current one"""
+        try:
+            seasons = await self.cache.get_or_load_async("seasons", (), lambda: self._fetch_all(queries.SEASONS))
+        except Exception as e:
+            print(f"Error fetching seasons: {e}")
+            return []
+        current = current_season()
+        return [{**season, "current": season['season'] == current} for season in seasons]
+
+    @storage_method
+    def stream_players(self) -> AsyncIterator[Dict]:
+        """Every player with team information, best scorers first, through a cursor"""
+        return self._stream_with_teams(lambda teams: (queries.PLAYERS_EXPORT, ()), TeamMap.player)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy, in the spirit of ConnectionPool.stats"""
+        size = self.pool.get_size()
+        idle = self.pool.get_idle_size()
+        return {
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+        }
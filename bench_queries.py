@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Latency and EXPLAIN plans of the hot read queries on synthetic data.
+
+Seeds a throwaway schema with N matches, then times each query with and
+without the index migrations. Nothing outside the schema is
+touched; it is dropped at the end unless --keep is given.
+"""
+
+import time
+import argparse
+import statistics
+from typing import Dict, List, Tuple
+
+from migrations import MIGRATIONS, migrate
+
+INDEX_MIGRATIONS = ('hot_query_indexes', 'keyset_indexes')
+
+# Matches as the storage reads them: team details come from its TeamMap
+MATCH_SELECT = "SELECT m.* FROM matches m "
+
+# ...and as it read them before, joining teams twice, for comparison
+JOINED_MATCH_SELECT = """
+    SELECT m.*,
+           ht.name as home_team_name, ht.nickname as home_team_nickname,
+           ht.primary_color as home_team_primary_color, ht.secondary_color as home_team_secondary_color,
+           at.name as away_team_name, at.nickname as away_team_nickname,
+           at.primary_color as away_team_primary_color, at.secondary_color as away_team_secondary_color
+    FROM matches m
+    JOIN teams ht ON m.home_team_id = ht.id
+    JOIN teams at ON m.away_team_id = at.id
+"""
+
+# The queries FootballDataStorage issues, plus the bounded shapes the API
+# is moving to (a first page of matches, one season of standings)
+QUERIES: List[Tuple[str, str, tuple]] = [
+    ('live_matches', MATCH_SELECT + "WHERE m.status = 'live' ORDER BY m.match_date DESC", ()),
+    ('upcoming_matches', MATCH_SELECT + "WHERE m.status = 'upcoming' ORDER BY m.match_date ASC", ()),
+    ('matches_first_page', MATCH_SELECT + "ORDER BY m.match_date DESC, m.id DESC LIMIT 50", ()),
+    ('matches_first_joined', JOINED_MATCH_SELECT + "ORDER BY m.match_date DESC, m.id DESC LIMIT 50", ()),
+    ('matches_deep_page', MATCH_SELECT + "WHERE (m.match_date, m.id) < (TIMESTAMP '2025-05-01', 0) "
+                                         "ORDER BY m.match_date DESC, m.id DESC LIMIT 50", ()),
+    ('team_fixtures', MATCH_SELECT + "WHERE m.home_team_id = 1 OR m.away_team_id = 1 "
+                                     "ORDER BY m.match_date DESC LIMIT 20", ()),
+    ('team_fixtures_joined', JOINED_MATCH_SELECT + "WHERE m.home_team_id = 1 OR m.away_team_id = 1 "
+                                                   "ORDER BY m.match_date DESC LIMIT 20", ()),
+    ('standings_season', """
+        SELECT s.* FROM standings s
+        WHERE s.season = %s
+        ORDER BY s.position ASC
+    """, ('2024-25',)),
+    ('top_scorers', """
+        SELECT p.* FROM players p
+        ORDER BY p.goals DESC
+        LIMIT %s
+    """, (10,)),
+]
+
+TEAMS = 18
+
+
+def _index_names() -> List[str]:
+    return [s.split(' IF NOT EXISTS ')[1].split()[0]
+            for _, name, statements in MIGRATIONS if name in INDEX_MIGRATIONS
+            for s in statements if s.startswith('CREATE INDEX')]
+
+
+def seed(conn, matches: int):
+    """Fill the current schema with ``matches`` matches and proportional players and standings"""
+    seasons = max(1, matches // 306)  # 18 teams, double round robin
+    players = max(TEAMS * 25, matches // 20)
+    with conn.cursor() as cur:
+        # A partition for every season the matches below fall in
+        cur.execute("SELECT football_ensure_seasons(TIMESTAMP '2025-06-01' - make_interval(mins => %s * 7), "
+                    "TIMESTAMP '2025-06-01' + INTERVAL '400 days')", (matches,))
+        # Keep the change feed out of it: these rows are not real changes
+        for table in ('teams', 'matches', 'standings', 'players'):
+            cur.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+        cur.execute("""
+            INSERT INTO teams (name, nickname, slug, primary_color, secondary_color, stadium, city)
+            SELECT 'Team ' || i, 'T' || i, 'team-' || i, '#000000', '#FFFFFF', 'Stadium ' || i, 'City'
+            FROM generate_series(1, %s) i
+        """, (TEAMS,))
+        # ~0.1%% live, ~5%% upcoming, the rest finished, spread over the seasons
+        cur.execute("""
+            INSERT INTO matches (home_team_id, away_team_id, home_score, away_score, status, match_date, venue, minute)
+            SELECT h, a, (i %% 5), (i %% 3),
+                   CASE WHEN i %% 1000 = 0 THEN 'live' WHEN i %% 20 = 0 THEN 'upcoming' ELSE 'finished' END,
+                   TIMESTAMP '2025-06-01' - make_interval(mins => i * 7) + make_interval(days => (i %% 20 = 0)::int * 400),
+                   'Stadium ' || h, CASE WHEN i %% 1000 = 0 THEN 45 END
+            FROM (
+                SELECT i, 1 + (i %% %s) AS h, 1 + ((i / %s + 1 + i %% %s) %% %s) AS a
+                FROM generate_series(1, %s) i
+            ) g
+            WHERE h <> a
+        """, (TEAMS, TEAMS, TEAMS, TEAMS, matches))
+        cur.execute("""
+            INSERT INTO standings (team_id, position, points, season)
+            SELECT t, t, 100 - t, CASE WHEN s = 0 THEN '2024-25' ELSE 'synthetic-' || s END
+            FROM generate_series(1, %s) t, generate_series(0, %s - 1) s
+        """, (TEAMS, seasons))
+        cur.execute("""
+            INSERT INTO players (name, team_id, position, goals, assists, appearances)
+            SELECT 'Player ' || i, 1 + i %% %s, 'Delantero', (i * 7919) %% 40, i %% 15, i %% 34
+            FROM generate_series(1, %s) i
+        """, (TEAMS, players))
+        for table in ('teams', 'matches', 'standings', 'players'):
+            cur.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+def _plan_summary(conn, sql: str, params: tuple) -> Tuple[str, float]:
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        row = cur.fetchone()
+    plan = (row['QUERY PLAN'] if isinstance(row, dict) else row[0])[0]
+
+    nodes = []
+
+    def walk(node, depth=0):
+        label = node['Node Type']
+        if node.get('Index Name'):
+            label += f" using {node['Index Name']}"
+        elif node.get('Relation Name'):
+            label += f" on {node['Relation Name']}"
+        nodes.append('  ' * depth + label)
+        for child in node.get('Plans', ()):
+            walk(child, depth + 1)
+
+    walk(plan['Plan'])
+    return '\n'.join(nodes), plan['Execution Time']
+
+
+def time_queries(conn, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for name, sql, params in QUERIES:
+        samples = []
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            cur.fetchall()  # warm the cache
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+                samples.append((time.perf_counter() - started) * 1000)
+        conn.rollback()
+        plan, exec_ms = _plan_summary(conn, sql, params)
+        conn.rollback()
+        samples.sort()
+        results[name] = {
+            'rows': len(rows),
+            'p50_ms': statistics.median(samples),
+            'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'exec_ms': exec_ms,
+            'plan': plan,
+        }
+    return results
+
+
+def set_indexes(conn, enabled: bool):
+    with conn.cursor() as cur:
+        if enabled:
+            for _, name, statements in MIGRATIONS:
+                if name in INDEX_MIGRATIONS:
+                    for statement in statements:
+                        cur.execute(statement)
+        else:
+            for index in _index_names():
+                cur.execute(f"DROP INDEX IF EXISTS {index}")
+            for table in ('matches', 'standings', 'players'):
+                cur.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+def main():
+    """Benchmark hot queries with and without the schema indexes"""
+    from populate_db import get_db_connection
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma-separated match counts')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--schema', default='football_bench')
+    parser.add_argument('--plans', action='store_true', help='print the plan tree of every query')
+    parser.add_argument('--keep', action='store_true', help='leave the benchmark schema in place')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        for size in (int(s) for s in args.sizes.split(',')):
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE")
+                cur.execute(f"CREATE SCHEMA {args.schema}")
+                cur.execute(f"SET search_path TO {args.schema}")
+            conn.commit()
+            migrate(conn)
+
+            started = time.perf_counter()
+            seed(conn, size)
+            print(f"\n📊 {size:,} matches (seeded in {time.perf_counter() - started:.1f}s)")
+
+            runs = {}
+            for label, enabled in (('no indexes', False), ('indexed', True)):
+                set_indexes(conn, enabled)
+                runs[label] = time_queries(conn, args.repeat)
+
+            print(f"  {'query':<20} {'rows':>6} {'no idx p50':>11} {'indexed p50':>12} {'p95':>8} {'speedup':>8}  plan (indexed)")
+            for name, _, _ in QUERIES:
+                before, after = runs['no indexes'][name], runs['indexed'][name]
+                speedup = before['p50_ms'] / after['p50_ms'] if after['p50_ms'] else float('inf')
+                top = after['plan'].splitlines()
+                scan = next((line.strip() for line in top if 'Scan' in line), top[0].strip())
+                print(f"  {name:<20} {after['rows']:>6} {before['p50_ms']:>9.2f}ms {after['p50_ms']:>10.2f}ms "
+                      f"{after['p95_ms']:>6.2f}ms {speedup:>7.1f}x  {scan}")
+                if args.plans:
+                    for label in ('no indexes', 'indexed'):
+                        print(f"      [{label}] execution {runs[label][name]['exec_ms']:.2f}ms")
+                        for line in runs[label][name]['plan'].splitlines():
+                            print(f"        {line}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cur:
+                conn.rollback()
+                cur.execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE")
+            conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the storage layer and the HTTP API.
+
+    python bench_suite.py seed --matches 100000
+    python bench_suite.py micro
+    python bench_suite.py store
+    python bench_suite.py load --concurrency 16 --duration 20
+    python bench_suite.py parse --fixtures fixtures/scraper
+    python bench_suite.py all --save-baseline bench_baseline.json
+    python bench_suite.py all --baseline bench_baseline.json
+
+Everything runs against a disposable database named after DATABASE_URL's
+with a ``_bench`` suffix. ``seed`` recreates it; ``all`` seeds, runs both
+suites and drops it again unless --keep is given. ``parse`` needs no
+database: it times the scraper parsers on saved pages. With --baseline the
+results are compared against a saved run and the exit status is 1 when
+anything regressed by more than --tolerance.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import threading
+import subprocess
+import statistics
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extensions import make_dsn, parse_dsn
+from psycopg2.extras import RealDictCursor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Endpoints the load generator cycles through, weighted by repetition
+LOAD_ENDPOINTS = [
+    '/api/standings',
+    '/api/matches/live',
+    '/api/matches/live',
+    '/api/matches?limit=50',
+    '/api/matches/upcoming',
+    '/api/players/top-scorers?limit=10',
+    '/api/teams',
+    '/api/teams/america',
+]
+
+# Regressions smaller than these are treated as noise
+NOISE_FLOOR_MICRO_US = 20.0
+NOISE_FLOOR_LOAD_MS = 2.0
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples``"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize_samples(samples: List[float]) -> Dict[str, float]:
+    return {
+        'n': len(samples),
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'mean': statistics.fmean(samples) if samples else 0.0,
+    }
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return 0.0
+
+
+# --- Disposable database -------------------------------------------------
+
+def bench_dsn(database_url: str, name: Optional[str] = None) -> Tuple[str, str]:
+    """(dsn of the benchmark database, its name)"""
+    name = name or f"{parse_dsn(database_url).get('dbname', 'football')}_bench"
+    return make_dsn(database_url, dbname=name), name
+
+
+def create_database(database_url: str, name: str):
+    admin = psycopg2.connect(database_url)
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s", (name,))
+            cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+            cur.execute(f"CREATE DATABASE \"{name}\" ENCODING 'UTF8' TEMPLATE template0")
+    finally:
+        admin.close()
+
+
+def drop_database(database_url: str, name: str):
+    admin = psycopg2.connect(database_url)
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s", (name,))
+            cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+    finally:
+        admin.close()
+
+
+def seed(dsn: str, matches: int, players: int):
+    """Migrate and fill the benchmark database.
+
+    Teams and the named players come from populate_db; matches and extra
+    players are synthetic, spread over the real team ids, with a handful
+    live, 5% upcoming and the rest finished. Standings are derived from the
+    finished matches like populate_db does.
+    """
+    from migrations import migrate
+    from populate_db import populate_players, populate_standings, populate_teams
+
+    started = time.perf_counter()
+    conn = psycopg2.connect(dsn, cursor_factory=RealDictCursor)
+    try:
+        migrate(conn)
+        populate_teams(conn)
+        populate_players(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT football_ensure_seasons(LOCALTIMESTAMP - make_interval(mins => %s * 7), "
+                        "LOCALTIMESTAMP + make_interval(hours => %s / 20))", (matches, matches))
+            cur.execute("""
+                WITH t AS (SELECT array_agg(id ORDER BY id) AS ids, count(*)::int AS n FROM teams)
+                INSERT INTO matches (home_team_id, away_team_id, home_score, away_score, status,
+                                     match_date, venue, minute, competition)
+                SELECT ids[1 + i %% n],
+                       ids[1 + (i %% n + 1 + (i / n) %% (n - 1)) %% n],
+                       CASE WHEN i %% 20 = 0 THEN NULL ELSE (i * 7) %% 5 END,
+                       CASE WHEN i %% 20 = 0 THEN NULL ELSE (i * 3) %% 4 END,
+                       CASE WHEN i <= 9 THEN 'live' WHEN i %% 20 = 0 THEN 'upcoming' ELSE 'finished' END,
+                       CASE WHEN i %% 20 = 0 THEN NOW() + make_interval(hours => i / 20)
+                            ELSE NOW() - make_interval(mins => i * 7) END,
+                       'Estadio',
+                       CASE WHEN i <= 9 THEN i * 9 END,
+                       'Liga MX'
+                FROM t, generate_series(1, %s) i
+            """, (matches,))
+            cur.execute("""
+                WITH t AS (SELECT array_agg(id ORDER BY id) AS ids, count(*)::int AS n FROM teams)
+                INSERT INTO players (name, team_id, position, goals, assists, appearances)
+                SELECT 'Jugador ' || i, ids[1 + i %% n],
+                       (ARRAY['Delantero', 'Mediocampista', 'Defensa', 'Portero'])[1 + i %% 4],
+                       (i * 7919) %% 30, (i * 104729) %% 20, i %% 34
+                FROM t, generate_series(1, %s) i
+            """, (players,))
+        populate_standings(conn)
+        conn.commit()
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE")
+    finally:
+        conn.close()
+    print(f"✅ Seeded {matches:,} matches and {players:,} extra players in {time.perf_counter() - started:.1f}s")
+
+
+# --- Micro-benchmarks ----------------------------------------------------
+
+def _import_app(dsn: str):
+    """Import app.py against the benchmark database"""
+    os.environ['DATABASE_URL'] = dsn
+    import app
+    return app
+
+
+def micro_cases(storage) -> List[Tuple[str, Callable[[], Any]]]:
+    return [
+        ('get_teams', storage.get_teams),
+        ('get_team_by_slug', lambda: storage.get_team_by_slug('america')),
+        ('get_matches_page', lambda: storage.get_matches_page(limit=50)),
+        ('get_matches_page_team', lambda: storage.get_matches_page(team='america', limit=50)),
+        ('get_live_matches', storage.get_live_matches),
+        ('get_upcoming_matches', storage.get_upcoming_matches),
+        ('get_standings', storage.get_standings),
+        ('get_top_scorers', lambda: storage.get_top_scorers(10)),
+        ('get_leaderboard_rate', lambda: storage.get_leaderboard('goals_per_appearance', limit=10)),
+    ]
+
+
+def run_micro(dsn: str, iterations: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Time every storage method uncached (database + decoding), cached, and its JSON encoding.
+
+    Times are in microseconds.
+    """
+    module = _import_app(dsn)
+    storage, flask_app = module.storage, module.app
+    results = {}
+
+    for name, call in micro_cases(storage):
+        db, cached, encode = [], [], []
+        call()  # warm up connections and plans
+        for _ in range(iterations):
+            storage.invalidate()
+            started = time.perf_counter_ns()
+            data = call()
+            db.append((time.perf_counter_ns() - started) / 1000)
+
+            started = time.perf_counter_ns()
+            call()
+            cached.append((time.perf_counter_ns() - started) / 1000)
+
+            with flask_app.app_context():
+                started = time.perf_counter_ns()
+                flask_app.json.response(data).get_data()
+                encode.append((time.perf_counter_ns() - started) / 1000)
+
+        results[name] = {
+            'db': summarize_samples(db),
+            'cached': summarize_samples(cached),
+            'serialize': summarize_samples(encode),
+        }
+
+    # Streaming path: rows per second through the server-side cursor
+    started = time.perf_counter()
+    rows = sum(1 for _ in storage.stream_matches())
+    elapsed = time.perf_counter() - started
+    results['stream_matches'] = {'db': {'n': rows, 'rows_per_s': rows / elapsed if elapsed else 0.0,
+                                        'p50': elapsed * 1e6, 'p95': elapsed * 1e6, 'p99': elapsed * 1e6}}
+
+    # Let go of the benchmark database so it can be dropped
+    module.shutdown_services()
+    return results
+
+
+def print_micro(results: Dict[str, Dict[str, Dict[str, float]]]):
+    print(f"\n🔬 Storage micro-benchmarks (µs)")
+    print(f"  {'method':<24} {'db p50':>9} {'db p95':>9} {'db p99':>9} {'cached p50':>11} {'json p50':>9} {'json p95':>9}")
+    for name, parts in results.items():
+        db = parts['db']
+        if 'rows_per_s' in db:
+            print(f"  {name:<24} {db['n']:,} rows streamed at {db['rows_per_s']:,.0f} rows/s")
+            continue
+        print(f"  {name:<24} {db['p50']:>9.0f} {db['p95']:>9.0f} {db['p99']:>9.0f} "
+              f"{parts['cached']['p50']:>11.1f} {parts['serialize']['p50']:>9.0f} {parts['serialize']['p95']:>9.0f}")
+
+
+# --- In-memory match store -----------------------------------------------
+
+def run_store(dsn: str, iterations: int) -> Dict[str, Any]:
+    """Time the team views on the SQL path (uncached) and on the in-memory match store.
+
+    Times are in microseconds; both paths include hydrating team details.
+    """
+    from query_cache import QueryCache
+    module = _import_app(dsn)
+    sql = module.FootballDataStorage(cache=QueryCache())
+    memory = module.FootballDataStorage(cache=QueryCache(), use_match_store=True)
+
+    started = time.perf_counter()
+    store = memory.get_match_store()
+    load_s = time.perf_counter() - started
+    team, opponent = (memory.get_team_by_slug(slug)['id'] for slug in ('america', 'chivas'))
+
+    cases = [
+        ('team_fixtures', lambda storage: storage.get_team_fixtures(team, limit=20)),
+        ('team_results', lambda storage: storage.get_team_fixtures(team, ('finished',), limit=20)),
+        ('team_upcoming', lambda storage: storage.get_team_fixtures(team, ('upcoming',), 'asc', 10)),
+        ('team_form', lambda storage: storage.get_team_form(team, 5)),
+        ('head_to_head', lambda storage: storage.get_head_to_head(team, opponent, 10)),
+    ]
+    results: Dict[str, Any] = {'cases': {}, 'load_s': load_s, 'stats': store.stats()}
+    for name, call in cases:
+        same = call(sql) == call(memory)
+        timings = {}
+        for label, storage in (('sql', sql), ('store', memory)):
+            samples = []
+            for _ in range(iterations):
+                storage.invalidate('matches')
+                started = time.perf_counter_ns()
+                call(storage)
+                samples.append((time.perf_counter_ns() - started) / 1000)
+            timings[label] = summarize_samples(samples)
+        results['cases'][name] = {**timings, 'identical': same}
+
+    for storage in (sql, memory):
+        storage.pool.close()
+    module.shutdown_services()
+    return results
+
+
+def print_store(results: Dict[str, Any]):
+    stats = results['stats']
+    print(f"\n🗃️  Match store: {stats['matches']:,} matches loaded in {results['load_s']:.2f}s, "
+          f"{(stats['column_bytes'] + stats['index_bytes']) / 1024 / 1024:.1f} MB of arrays (µs)")
+    print(f"  {'view':<16} {'sql p50':>9} {'sql p95':>9} {'store p50':>10} {'store p95':>10} {'speedup':>8}  same")
+    for name, entry in results['cases'].items():
+        sql, store = entry['sql'], entry['store']
+        speedup = sql['p50'] / store['p50'] if store['p50'] else float('inf')
+        print(f"  {name:<16} {sql['p50']:>9.0f} {sql['p95']:>9.0f} {store['p50']:>10.1f} {store['p95']:>10.1f} "
+              f"{speedup:>7.0f}x  {'✅' if entry['identical'] else '❌'}")
+
+
+# --- Scraper parsers -----------------------------------------------------
+
+def run_parse(fixtures: str, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """Time the lxml fast path and the BeautifulSoup fallback on every saved page.
+
+    Times are in microseconds. ``elements`` counts the tree each parser
+    builds: the extracted subtree for lxml, the whole page for bs4.
+    """
+    import glob
+    from bs4 import BeautifulSoup
+    from scraper import DEFAULT_SOURCES
+
+    results = {}
+    for source_cls in DEFAULT_SOURCES:
+        source = source_cls()
+        for kind, extractor in sorted(source.extractors.items()):
+            paths = sorted(glob.glob(os.path.join(fixtures, f'{source.name}_{kind}.*')))
+            if not paths:
+                continue
+            with open(paths[0], encoding='utf-8') as f:
+                body = f.read()
+
+            entry: Dict[str, Any] = {'bytes': len(body.encode())}
+            outputs = {}
+            for parser, parse, elements in (
+                ('lxml', lambda: extractor.run(source, body),
+                 lambda: sum(1 for _ in extractor.subtree.find(body).iter())),
+                ('bs4', lambda: source.parse_soup(kind, body),
+                 lambda: len(BeautifulSoup(body, 'html.parser').find_all(True))),
+            ):
+                outputs[parser] = parse()
+                samples = []
+                for _ in range(iterations):
+                    started = time.perf_counter_ns()
+                    parse()
+                    samples.append((time.perf_counter_ns() - started) / 1000)
+                entry[parser] = {**summarize_samples(samples), 'elements': elements()}
+
+            data = outputs['lxml']
+            entry['rows'] = len(data.matches) + len(data.standings) + len(data.players)
+            entry['identical'] = outputs['lxml'] == outputs['bs4']
+            entry['speedup'] = entry['bs4']['p50'] / entry['lxml']['p50'] if entry['lxml']['p50'] else 0.0
+            results[f'{source.name}_{kind}'] = entry
+    return results
+
+
+def print_parse(results: Dict[str, Dict[str, Any]]):
+    print(f"\n🧩 Scraper parsers on saved pages (µs)")
+    print(f"  {'page':<22} {'KB':>5} {'rows':>5} {'lxml p50':>9} {'lxml p95':>9} {'bs4 p50':>9} {'bs4 p95':>9} "
+          f"{'speedup':>8} {'elements':>13}  same")
+    for name, entry in results.items():
+        lxml, bs4 = entry['lxml'], entry['bs4']
+        print(f"  {name:<22} {entry['bytes'] / 1024:>5.0f} {entry['rows']:>5} {lxml['p50']:>9.0f} {lxml['p95']:>9.0f} "
+              f"{bs4['p50']:>9.0f} {bs4['p95']:>9.0f} {entry['speedup']:>7.0f}x "
+              f"{lxml['elements']:>5} / {bs4['elements']:<5}  {'✅' if entry['identical'] else '❌'}")
+
+
+# --- HTTP load generator -------------------------------------------------
+
+class Server:
+    """The API served in a child process, so its RSS is measured on its own.
+
+    app.py on the threaded Flask server, or asgi_app.py under uvicorn.
+    """
+
+    def __init__(self, dsn: str, port: int, asgi: bool = False):
+        self.port = port
+        env = dict(os.environ, DATABASE_URL=dsn)
+        if asgi:
+            command = [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1',
+                       '--port', str(port), '--no-access-log']
+        else:
+            command = [sys.executable, '-c',
+                       f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+        self.process = subprocess.Popen(
+            command,
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.url = f"http://127.0.0.1:{port}"
+
+    def wait_ready(self, timeout: float = 30.0):
+        import requests
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with status {self.process.returncode}")
+            try:
+                if requests.get(self.url + '/api/health', timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("server did not become ready")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def run_load(base_url: str, concurrency: int, duration: float, warmup: float = 1.0,
+             pid: Optional[int] = None, endpoints: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Closed-loop load: ``concurrency`` clients issue requests back to back for ``duration`` seconds.
+
+    Latencies are in milliseconds. RSS is sampled from ``pid`` when given.
+    """
+    import requests
+
+    endpoints = endpoints or LOAD_ENDPOINTS
+    samples: Dict[str, List[float]] = {e: [] for e in endpoints}
+    errors: Dict[str, int] = {e: 0 for e in endpoints}
+    lock = threading.Lock()
+    stop = threading.Event()
+    measuring = threading.Event()
+    rss_samples: List[float] = []
+
+    def client(offset: int):
+        session = requests.Session()
+        i = offset
+        while not stop.is_set():
+            endpoint = endpoints[i % len(endpoints)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + endpoint, timeout=30)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - started) * 1000
+            if measuring.is_set():
+                with lock:
+                    if ok:
+                        samples[endpoint].append(elapsed)
+                    else:
+                        errors[endpoint] += 1
+
+    def sampler():
+        while not stop.is_set():
+            if pid:
+                rss_samples.append(rss_mb(pid))
+            stop.wait(0.2)
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(concurrency)]
+    threads.append(threading.Thread(target=sampler, daemon=True))
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(duration)
+    measuring.clear()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=35)
+
+    total = sum(len(s) for s in samples.values())
+    all_samples = [x for s in samples.values() for x in s]
+    return {
+        'concurrency': concurrency,
+        'duration_s': elapsed,
+        'requests': total,
+        'errors': sum(errors.values()),
+        'throughput_rps': total / elapsed if elapsed else 0.0,
+        'latency_ms': summarize_samples(all_samples),
+        'endpoints': {e: dict(summarize_samples(s), errors=errors[e]) for e, s in samples.items()},
+        'rss_mb': {'peak': max(rss_samples, default=0.0), 'final': rss_samples[-1] if rss_samples else 0.0},
+    }
+
+
+def print_load(results: Dict[str, Any]):
+    overall = results['latency_ms']
+    print(f"\n🚦 HTTP load: {results['concurrency']} clients for {results['duration_s']:.1f}s")
+    print(f"  {results['requests']:,} requests, {results['errors']} errors, "
+          f"{results['throughput_rps']:,.0f} req/s, p50 {overall['p50']:.1f}ms "
+          f"p95 {overall['p95']:.1f}ms p99 {overall['p99']:.1f}ms")
+    if results['rss_mb']['peak']:
+        print(f"  server RSS peak {results['rss_mb']['peak']:.0f} MB, final {results['rss_mb']['final']:.0f} MB")
+    print(f"  {'endpoint':<36} {'n':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint, stats in results['endpoints'].items():
+        print(f"  {endpoint:<36} {stats['n']:>7} {stats['p50']:>8.2f} {stats['p95']:>8.2f} "
+              f"{stats['p99']:>8.2f} {stats['errors']:>7}")
+
+
+# --- Baselines -----------------------------------------------------------
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions of ``current`` against ``baseline``"""
+    regressions = []
+
+    def check(label: str, now: float, before: float, floor: float, higher_is_better: bool = False):
+        if not before:
+            return
+        worse = before - now if higher_is_better else now - before
+        if worse > floor and worse / before > tolerance:
+            regressions.append(f"{label}: {before:.2f} -> {now:.2f} ({worse / before:+.0%})")
+
+    for name, entry in current.get('parse', {}).items():
+        old = baseline.get('parse', {}).get(name)
+        if old:
+            check(f"parse {name} lxml p50 µs", entry['lxml']['p50'], old['lxml']['p50'], NOISE_FLOOR_MICRO_US)
+        if not entry['identical']:
+            regressions.append(f"parse {name}: lxml and bs4 results differ")
+
+    for name, entry in current.get('store', {}).get('cases', {}).items():
+        old = baseline.get('store', {}).get('cases', {}).get(name)
+        if old:
+            check(f"store {name} p50 µs", entry['store']['p50'], old['store']['p50'], NOISE_FLOOR_MICRO_US)
+        if not entry['identical']:
+            regressions.append(f"store {name}: store and SQL results differ")
+
+    for name, parts in current.get('micro', {}).items():
+        for part, stats in parts.items():
+            old = baseline.get('micro', {}).get(name, {}).get(part)
+            if old and 'rows_per_s' not in stats:
+                # Medians: micro tails are dominated by scheduler noise
+                check(f"micro {name} {part} p50 µs", stats['p50'], old['p50'], NOISE_FLOOR_MICRO_US)
+
+    load, old_load = current.get('load'), baseline.get('load')
+    if load and old_load:
+        check("load throughput req/s", load['throughput_rps'], old_load['throughput_rps'], 1.0, higher_is_better=True)
+        check("load p95 ms", load['latency_ms']['p95'], old_load['latency_ms']['p95'], NOISE_FLOOR_LOAD_MS)
+        check("load p99 ms", load['latency_ms']['p99'], old_load['latency_ms']['p99'], NOISE_FLOOR_LOAD_MS)
+        check("server peak RSS MB", load['rss_mb']['peak'], old_load['rss_mb']['peak'], 10.0)
+        for endpoint, stats in load['endpoints'].items():
+            old = old_load['endpoints'].get(endpoint)
+            if old:
+                check(f"load {endpoint} p95 ms", stats['p95'], old['p95'], NOISE_FLOOR_LOAD_MS)
+            if stats['errors'] > (old or {}).get('errors', 0):
+                regressions.append(f"load {endpoint}: {stats['errors']} errors")
+    return regressions
+
+
+def main():
+    """Seed a disposable database and benchmark the storage layer, HTTP API and scraper parsers"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('command', choices=('seed', 'micro', 'store', 'load', 'parse', 'all', 'drop'))
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--bench-db', help='name of the disposable database (default: <db>_bench)')
+    parser.add_argument('--matches', type=int, default=100000)
+    parser.add_argument('--players', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=200, help='micro-benchmark iterations per method')
+    parser.add_argument('--fixtures', default='fixtures/scraper', help='saved pages for the parse benchmark')
+    parser.add_argument('--parse-iterations', type=int, default=50, help='parse-benchmark iterations per page')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15.0, help='load test seconds')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--url', help='load test an already running server instead of starting one')
+    parser.add_argument('--pid', type=int, help='process to sample RSS from when using --url')
+    parser.add_argument('--asgi', action='store_true', help='load test asgi_app under uvicorn instead of app.py')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='compare against a saved results file; exit 1 on regressions')
+    parser.add_argument('--save-baseline', help='write results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--keep', action='store_true', help="don't drop the database after 'all'")
+    args = parser.parse_args()
+
+    if args.command == 'parse':
+        dsn = name = None
+    elif not args.database_url:
+        parser.error("DATABASE_URL is not set")
+    else:
+        dsn, name = bench_dsn(args.database_url, args.bench_db)
+
+    if args.command == 'drop':
+        drop_database(args.database_url, name)
+        print(f"✅ Dropped {name}")
+        return
+
+    results: Dict[str, Any] = {'meta': {
+        'matches': args.matches, 'players': args.players, 'concurrency': args.concurrency, 'asgi': args.asgi,
+        'iterations': args.iterations, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }}
+
+    try:
+        if args.command in ('parse', 'all'):
+            results['parse'] = run_parse(args.fixtures, args.parse_iterations)
+            print_parse(results['parse'])
+
+        if args.command in ('seed', 'all'):
+            create_database(args.database_url, name)
+            seed(dsn, args.matches, args.players)
+
+        if args.command in ('micro', 'all'):
+            results['micro'] = run_micro(dsn, args.iterations)
+            print_micro(results['micro'])
+
+        if args.command in ('store', 'all'):
+            results['store'] = run_store(dsn, args.iterations)
+            print_store(results['store'])
+
+        if args.command in ('load', 'all'):
+            server = None
+            if args.url:
+                base_url, pid = args.url.rstrip('/'), args.pid
+            else:
+                server = Server(dsn, args.port, asgi=args.asgi)
+                server.wait_ready()
+                base_url, pid = server.url, server.process.pid
+            try:
+                results['load'] = run_load(base_url, args.concurrency, args.duration, pid=pid)
+            finally:
+                if server:
+                    server.stop()
+            print_load(results['load'])
+    finally:
+        if args.command == 'all' and not args.keep:
+            drop_database(args.database_url, name)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
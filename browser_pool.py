@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Pooled headless Chrome workers for JavaScript-rendered sources
+"""
+
+import os
+import time
+import queue
+import shutil
+import signal
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+
+
+CHROME_CANDIDATES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+CHROME_ARGS = (
+    '--headless=new',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--no-first-run',
+    '--blink-settings=imagesEnabled=false',
+    '--window-size=1280,2000',
+)
+
+
+class BrowserUnavailable(Exception):
+    """No Chrome binary or Selenium install; browser-backed sources are skipped"""
+
+
+class BrowserPoolBusy(Exception):
+    """The job queue is full; callers should back off rather than pile up"""
+
+
+class BrowserJobTimeout(Exception):
+    """A job overran its deadline and its driver was killed"""
+
+
+def find_chrome() -> Optional[str]:
+    """Locate a Chrome/Chromium binary via CHROME_BIN or PATH"""
+    configured = os.getenv('CHROME_BIN')
+    if configured:
+        return configured if os.path.exists(configured) else None
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _process_tree(root_pid: int) -> List[int]:
+    """``root_pid`` and all its descendants, read from /proc (Linux only)"""
+    children: Dict[int, List[int]] = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The command name may contain spaces; ppid follows the closing paren
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    except OSError:
+        return [root_pid]
+
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+
+def _rss_mb(pids: List[int]) -> float:
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class _Worker:
+    """One long-lived driver plus the bookkeeping used to decide when to recycle it"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.driver = None
+        self.pages = 0
+        self.busy_since: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.killed = False
+
+    def driver_pids(self) -> List[int]:
+        process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        return _process_tree(process.pid) if process else []
+
+
+class _Job:
+    __slots__ = ('func', 'future', 'deadline')
+
+    def __init__(self, func: Callable[[Any], Any], deadline: float):
+        self.func = func
+        self.future: Future = Future()
+        self.deadline = deadline
+
+
+class BrowserPool:
+    """Fixed-size pool of headless Chrome drivers fed from a bounded queue.
+
+    Each worker thread owns one driver and reuses it across pages. Drivers
+    are recycled after ``max_pages`` jobs or once the driver process tree
+    grows past ``max_rss_mb``. A job that overruns its timeout has its driver
+    killed, which unblocks the worker and gets it a fresh browser. When no
+    Chrome binary (or Selenium) is present the pool reports itself
+    unavailable and every call raises BrowserUnavailable straight away.
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 50, max_rss_mb: float = 600.0,
+                 queue_size: int = 8, job_timeout: float = 30.0,
+                 driver_factory: Optional[Callable[[], Any]] = None):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.job_timeout = job_timeout
+
+        self._driver_factory = driver_factory
+        self.chrome_binary = None
+        if driver_factory is None:
+            self.chrome_binary = find_chrome()
+            if self.chrome_binary:
+                try:
+                    import selenium  # noqa: F401
+                except ImportError:
+                    self.chrome_binary = None
+        self.available = driver_factory is not None or self.chrome_binary is not None
+
+        self._jobs: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=queue_size)
+        self._workers = [_Worker(i) for i in range(size)]
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+        self._launched = 0
+        self._recycled = 0
+        self._killed = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "BrowserPool":
+        return cls(
+            size=int(os.getenv('BROWSER_POOL_SIZE', 2)),
+            max_pages=int(os.getenv('BROWSER_MAX_PAGES', 50)),
+            max_rss_mb=float(os.getenv('BROWSER_MAX_RSS_MB', 600)),
+            queue_size=int(os.getenv('BROWSER_QUEUE_SIZE', 8)),
+            job_timeout=float(os.getenv('BROWSER_JOB_TIMEOUT', 30)),
+        )
+
+    def render(self, url: str, wait_css: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """Load ``url`` in a pooled browser and return the rendered DOM"""
+        def load(driver):
+            driver.get(url)
+            if wait_css:
+                from selenium.webdriver.common.by import By
+                from selenium.webdriver.support import expected_conditions
+                from selenium.webdriver.support.ui import WebDriverWait
+                WebDriverWait(driver, timeout or self.job_timeout).until(
+                    expected_conditions.presence_of_element_located((By.CSS_SELECTOR, wait_css)))
+            return driver.page_source
+
+        return self.run(load, timeout=timeout)
+
+    def run(self, func: Callable[[Any], Any], timeout: Optional[float] = None,
+            enqueue_timeout: float = 0.0) -> Any:
+        """Run ``func(driver)`` on a pooled driver and return its result.
+
+        Raises BrowserPoolBusy if the queue stays full for ``enqueue_timeout``
+        seconds and BrowserJobTimeout if the job overruns ``timeout``.
+        """
+        if not self.available:
+            raise BrowserUnavailable("browser unavailable: no Chrome binary found")
+        if self._closed:
+            raise BrowserUnavailable("browser pool is closed")
+        self._ensure_started()
+
+        timeout = timeout or self.job_timeout
+        job = _Job(func, time.monotonic() + timeout)
+        try:
+            if enqueue_timeout > 0:
+                self._jobs.put(job, timeout=enqueue_timeout)
+            else:
+                self._jobs.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise BrowserPoolBusy(f"browser queue full ({self._jobs.maxsize} jobs waiting)")
+
+        try:
+            # Queue wait counts against the deadline too
+            return job.future.result(timeout=max(0.0, job.deadline - time.monotonic()) + 1.0)
+        except FutureTimeout:
+            job.future.cancel()
+            raise BrowserJobTimeout(f"browser job exceeded {timeout:.1f}s")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for worker in self._workers:
+                thread = threading.Thread(target=self._work, args=(worker,),
+                                          name=f'browser-{worker.index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            watchdog = threading.Thread(target=self._watchdog, name='browser-watchdog', daemon=True)
+            watchdog.start()
+            self._threads.append(watchdog)
+
+    def _work(self, worker: _Worker):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            if time.monotonic() >= job.deadline:
+                job.future.set_exception(BrowserJobTimeout("browser job expired while queued"))
+                continue
+
+            try:
+                if worker.driver is None:
+                    worker.driver = self._launch()
+                    worker.pages = 0
+                    worker.killed = False
+                worker.busy_since = time.monotonic()
+                worker.deadline = job.deadline
+                worker.driver.set_page_load_timeout(max(1.0, job.deadline - time.monotonic()))
+                result = job.func(worker.driver)
+                worker.pages += 1
+                job.future.set_result(result)
+                with self._lock:
+                    self._completed += 1
+            except Exception as e:
+                if worker.killed:
+                    e = BrowserJobTimeout("browser job exceeded its deadline; driver killed")
+                job.future.set_exception(e)
+                with self._lock:
+                    self._failed += 1
+                # A failed page may leave the driver wedged; start clean next time
+                self._discard(worker)
+            finally:
+                worker.busy_since = None
+                worker.deadline = None
+
+            if worker.driver is not None and self._should_recycle(worker):
+                self._discard(worker)
+                with self._lock:
+                    self._recycled += 1
+
+    def _watchdog(self):
+        """Kill drivers whose job has run past its deadline"""
+        while not self._closed:
+            time.sleep(0.5)
+            now = time.monotonic()
+            for worker in self._workers:
+                started, deadline = worker.busy_since, worker.deadline
+                if deadline is not None and now > deadline and not worker.killed:
+                    worker.killed = True
+                    self._kill(worker)
+                    with self._lock:
+                        self._killed += 1
+                    print(f"❌ Browser worker {worker.index} hung for {now - started:.0f}s, killed")
+
+    def _launch(self):
+        with self._lock:
+            self._launched += 1
+        if self._driver_factory:
+            return self._driver_factory()
+
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.binary_location = self.chrome_binary
+        options.page_load_strategy = 'eager'
+        for arg in CHROME_ARGS:
+            options.add_argument(arg)
+        return webdriver.Chrome(options=options)
+
+    def _should_recycle(self, worker: _Worker) -> bool:
+        if worker.pages >= self.max_pages:
+            return True
+        pids = worker.driver_pids()
+        return bool(pids) and _rss_mb(pids) > self.max_rss_mb
+
+    def _discard(self, worker: _Worker):
+        driver, worker.driver = worker.driver, None
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception:
+            self._kill_driver(driver)
+
+    def _kill(self, worker: _Worker):
+        if worker.driver is not None:
+            self._kill_driver(worker.driver)
+
+    @staticmethod
+    def _kill_driver(driver):
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        if process is None:
+            return
+        # Chrome's renderers outlive chromedriver unless the whole tree goes
+        for pid in reversed(_process_tree(process.pid)):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "available": self.available,
+                "size": self.size,
+                "queued": self._jobs.qsize(),
+                "busy": sum(1 for w in self._workers if w.busy_since is not None),
+                "launched": self._launched,
+                "recycled": self._recycled,
+                "killed": self._killed,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def close(self):
+        """Stop the workers and quit every driver"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._started:
+            for _ in self._workers:
+                try:
+                    self._jobs.put_nowait(None)
+                except queue.Full:
+                    break
+        for worker in self._workers:
+            self._discard(worker)
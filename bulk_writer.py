@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Bulk upsert write path: COPY into a staging table, then one merge per table
+"""
+
+import io
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from seasons import ensure_partitions
+
+
+class TableSpec:
+    """Writable columns of a table and the natural key rows are merged on.
+
+    ``prepare(conn, rows)`` runs before a batch is merged, e.g. to create
+    the partitions its rows go to. A ``partitioned`` table cannot return
+    xmax, so its new rows are told apart from updated ones by a key lookup.
+    """
+
+    def __init__(self, table: str, columns: Sequence[str], key: Sequence[str],
+                 prepare: Optional[Callable[[Any, List[Mapping[str, Any]]], None]] = None,
+                 partitioned: bool = False):
+        self.table = table
+        self.columns = tuple(columns)
+        self.key = tuple(key)
+        self.prepare = prepare
+        self.partitioned = partitioned
+
+
+TABLES: Dict[str, TableSpec] = {
+    'teams': TableSpec(
+        'teams',
+        ('name', 'nickname', 'slug', 'primary_color', 'secondary_color', 'logo', 'stadium', 'city'),
+        ('slug',),
+    ),
+    'standings': TableSpec(
+        'standings',
+        ('team_id', 'position', 'matches_played', 'wins', 'draws', 'losses',
+         'goals_for', 'goals_against', 'goal_difference', 'points', 'season'),
+        ('team_id', 'season'),
+    ),
+    'players': TableSpec(
+        'players',
+        ('name', 'team_id', 'position', 'goals', 'assists', 'appearances', 'season'),
+        ('team_id', 'name', 'season'),
+    ),
+    'matches': TableSpec(
+        'matches',
+        ('home_team_id', 'away_team_id', 'home_score', 'away_score', 'status',
+         'match_date', 'venue', 'minute', 'competition'),
+        ('home_team_id', 'away_team_id', 'match_date'),
+        prepare=ensure_partitions,
+        partitioned=True,
+    ),
+    'team_aliases': TableSpec('team_aliases', ('alias', 'team_id'), ('alias',)),
+}
+
+# Unique indexes backing ON CONFLICT; duplicates left by the old
+# delete-and-insert path are removed first so the index can be built.
+# These are the keys as of the natural_keys migration; tables created or
+# re-keyed later get their key in that migration.
+_ORIGINAL_KEYS = {
+    'standings': ('team_id', 'season'),
+    'players': ('team_id', 'name'),
+    'matches': ('home_team_id', 'away_team_id', 'match_date'),
+}
+
+NATURAL_KEY_DDL = [
+    f"""
+    DELETE FROM {table} a USING {table} b
+    WHERE a.id > b.id AND {' AND '.join(f'a.{c} = b.{c}' for c in key)}
+    """
+    for table, key in _ORIGINAL_KEYS.items()
+] + [
+    f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_natural_key ON {table} ({', '.join(key)})"
+    for table, key in _ORIGINAL_KEYS.items()
+]
+
+
+def _copy_value(value: Any) -> str:
+    """Encode one value for COPY ... FROM STDIN in text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _copy_buffer(rows: List[Mapping[str, Any]], columns: Sequence[str]) -> io.StringIO:
+    buf = io.StringIO()
+    for ordinal, row in enumerate(rows):
+        buf.write('\t'.join([str(ordinal)] + [_copy_value(row.get(c)) for c in columns]))
+        buf.write('\n')
+    buf.seek(0)
+    return buf
+
+
+def bulk_upsert(conn, table: str, rows: Iterable[Mapping[str, Any]], prune: bool = False,
+                returning: Sequence[str] = ()) -> Dict[str, Any]:
+    """Merge ``rows`` into ``table`` on its natural key without committing.
+
+    Rows are streamed into a temporary staging table with COPY and merged by a
+    single ``INSERT ... ON CONFLICT DO UPDATE``; rows whose values did not
+    change are left untouched. With ``prune`` every existing row whose key is
+    not in the batch is deleted, so a full refresh replaces the table
+    atomically once the caller commits. Only columns present in the first row
+    are written, which leaves column defaults (``season``, ``competition``)
+    in charge when a batch omits them.
+
+    With ``returning`` the result also carries ``rows`` (inserted or changed
+    rows) and ``deleted_rows`` (pruned rows) with those columns.
+    """
+    spec = TABLES[table]
+    rows = list(rows)
+    if rows and spec.prepare is not None:
+        spec.prepare(conn, rows)
+    if not rows:
+        counts: Dict[str, Any] = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        if returning:
+            counts['rows'], counts['deleted_rows'] = [], []
+        if prune:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM {spec.table} RETURNING 1{''.join(f', {c}' for c in returning)}")
+                deleted_rows = cur.fetchall()
+            counts['deleted'] = len(deleted_rows)
+            if returning:
+                counts['deleted_rows'] = deleted_rows
+        return counts
+
+    extra = ''.join(f', {c}' for c in returning)
+    columns = [c for c in spec.columns if c in rows[0]]
+    missing = [c for c in spec.key if c not in columns]
+    if missing:
+        raise ValueError(f"{table} rows must include key columns {missing}")
+
+    stage = f"_stage_{spec.table}"
+    col_list = ', '.join(columns)
+    key_list = ', '.join(spec.key)
+    updatable = [c for c in columns if c not in spec.key]
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {stage}")
+        cur.execute(f"""
+            CREATE TEMP TABLE {stage} ON COMMIT DROP AS
+            SELECT 0 AS _ord, {col_list} FROM {spec.table} WITH NO DATA
+        """)
+        cur.copy_expert(f"COPY {stage} (_ord, {col_list}) FROM STDIN", _copy_buffer(rows, columns))
+
+        if updatable:
+            conflict = f"""DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in updatable)}
+                WHERE ({', '.join(f'{spec.table}.{c}' for c in updatable)})
+                      IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in updatable)})"""
+        else:
+            conflict = "DO NOTHING"
+
+        if spec.partitioned:
+            # RETURNING subqueries see the table as it was before the INSERT
+            inserted_expr = f"""NOT EXISTS (
+                SELECT 1 FROM {spec.table} t
+                WHERE {' AND '.join(f't.{c} = {spec.table}.{c}' for c in spec.key)})"""
+        else:
+            inserted_expr = "xmax = 0"
+
+        # DISTINCT ON keeps the last occurrence of a key within the batch
+        cur.execute(f"""
+            INSERT INTO {spec.table} ({col_list})
+            SELECT DISTINCT ON ({key_list}) {col_list}
+            FROM {stage}
+            ORDER BY {key_list}, _ord DESC
+            ON CONFLICT ({key_list}) {conflict}
+            RETURNING ({inserted_expr}) AS inserted{extra}
+        """)
+        merged = cur.fetchall()
+        inserted = sum(1 for row in merged if _first(row))
+
+        deleted_rows: List[Any] = []
+        if prune:
+            cur.execute(f"""
+                DELETE FROM {spec.table} t
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {stage} s WHERE {' AND '.join(f's.{c} = t.{c}' for c in spec.key)}
+                )
+                RETURNING 1{''.join(f', t.{c}' for c in returning)}
+            """)
+            deleted_rows = cur.fetchall()
+
+        cur.execute(f"DROP TABLE {stage}")
+
+    counts = {'inserted': inserted, 'updated': len(merged) - inserted, 'deleted': len(deleted_rows)}
+    if returning:
+        counts['rows'] = merged
+        counts['deleted_rows'] = deleted_rows
+    return counts
+
+
+def bulk_upsert_many(conn, batches: Mapping[str, Iterable[Mapping[str, Any]]],
+                     prune: bool = False) -> Dict[str, Dict[str, int]]:
+    """Run bulk_upsert for several tables in order inside the caller's transaction"""
+    return {table: bulk_upsert(conn, table, rows, prune=prune) for table, rows in batches.items()}
+
+
+def team_ids(conn) -> Dict[str, int]:
+    """Map of team slug to id, for building rows that reference teams"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, slug FROM teams")
+        return {_get(row, 'slug', 1): _get(row, 'id', 0) for row in cur.fetchall()}
+
+
+def _first(row) -> Any:
+    return row['inserted'] if isinstance(row, Mapping) else row[0]
+
+
+def _get(row, name: str, index: int) -> Any:
+    return row[name] if isinstance(row, Mapping) else row[index]
+
+
+def summarize(counts: Dict[str, int]) -> str:
+    return f"{counts['inserted']} new, {counts['updated']} updated, {counts['deleted']} removed"
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Postgres LISTEN/NOTIFY change feed: triggers on the data tables plus an
+in-process listener that fans typed change events out to subscribers
+"""
+
+import json
+import time
+import random
+import select
+import threading
+from dataclasses import dataclass
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+CHANNEL = 'football_changes'
+
+# Tables with notify triggers: the data tables of the change_feed migration,
+# then those later migrations add with notify_triggers()
+WATCHED_TABLES = ('teams', 'matches', 'standings', 'players', 'team_aliases')
+
+# Transaction-local setting a writer fills with set_origin; the trigger logs and
+# notifies it so the writing process can recognise its own changes
+ORIGIN_SETTING = 'football.origin'
+
+# Notification payloads must stay under 8000 bytes; bigger statements send
+# no ids and subscribers treat the whole table as changed
+MAX_NOTIFY_IDS = 500
+
+# Most seqs a listener remembers as not yet seen below its high-water mark
+MAX_GAPS = 1000
+
+
+# One statement-level trigger per table and operation. Transition tables hold
+# every row a statement touched, so a bulk upsert of 500 rows costs one
+# change_log row and one notification rather than 500 of each.
+def notify_triggers(table: str) -> List[str]:
+    """DDL putting ``table`` on the change feed; it needs an integer ``id`` column"""
+    return [
+        statement
+        for op, referencing in (('INSERT', 'NEW TABLE AS new_rows'),
+                                ('UPDATE', 'NEW TABLE AS new_rows'),
+                                ('DELETE', 'OLD TABLE AS old_rows'),
+                                ('TRUNCATE', None))
+        for statement in (
+            f"DROP TRIGGER IF EXISTS {table}_notify_{op.lower()} ON {table}",
+            f"""
+            CREATE TRIGGER {table}_notify_{op.lower()}
+            AFTER {op} ON {table}
+            {f'REFERENCING {referencing}' if referencing else ''}
+            FOR EACH STATEMENT EXECUTE FUNCTION football_notify_change()
+            """,
+        )
+    ]
+
+
+CHANGE_FEED_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS change_log (
+        id BIGSERIAL PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        op TEXT NOT NULL,
+        row_ids BIGINT[],
+        backend_pid INTEGER NOT NULL DEFAULT pg_backend_pid(),
+        changed_at TIMESTAMP DEFAULT NOW()
+    )
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION football_notify_change() RETURNS trigger AS $$
+    DECLARE
+        ids BIGINT[];
+        seq BIGINT;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            SELECT array_agg(id) INTO ids FROM old_rows;
+        ELSIF TG_OP <> 'TRUNCATE' THEN
+            SELECT array_agg(id) INTO ids FROM new_rows;
+        END IF;
+        IF ids IS NULL AND TG_OP <> 'TRUNCATE' THEN
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO change_log (table_name, op, row_ids)
+        VALUES (TG_TABLE_NAME, TG_OP, ids)
+        RETURNING id INTO seq;
+
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'seq', seq,
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'ids', CASE WHEN cardinality(ids) <= {MAX_NOTIFY_IDS} THEN ids END,
+            'pid', pg_backend_pid()
+        )::text);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+] + [
+    statement
+    for table in ('teams', 'matches', 'standings', 'players')
+    for statement in notify_triggers(table)
+]
+
+# Tags every change with the origin its transaction set. Unlike the backend
+# pid, an origin is never reused by another process.
+CHANGE_ORIGIN_DDL = [
+    "ALTER TABLE change_log ADD COLUMN IF NOT EXISTS origin TEXT",
+    f"""
+    CREATE OR REPLACE FUNCTION football_notify_change() RETURNS trigger AS $$
+    DECLARE
+        ids BIGINT[];
+        seq BIGINT;
+        origin TEXT := NULLIF(current_setting('{ORIGIN_SETTING}', true), '');
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            SELECT array_agg(id) INTO ids FROM old_rows;
+        ELSIF TG_OP <> 'TRUNCATE' THEN
+            SELECT array_agg(id) INTO ids FROM new_rows;
+        END IF;
+        IF ids IS NULL AND TG_OP <> 'TRUNCATE' THEN
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO change_log (table_name, op, row_ids, origin)
+        VALUES (TG_TABLE_NAME, TG_OP, ids, origin)
+        RETURNING id INTO seq;
+
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'seq', seq,
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'ids', CASE WHEN cardinality(ids) <= {MAX_NOTIFY_IDS} THEN ids END,
+            'pid', pg_backend_pid(),
+            'origin', origin
+        )::text);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """One committed statement against a watched table.
+
+    ``ids`` is None when the statement touched too many rows to list (or was
+    a TRUNCATE, or a resync after a gap in the log, or announced): treat the
+    whole table as changed. ``op`` is INSERT, UPDATE, DELETE, TRUNCATE or
+    RESYNC, or whatever ``announce`` was given. ``origin`` is what the
+    writing transaction passed to ``set_origin``, None if it did not.
+    """
+    seq: int
+    table: str
+    op: str
+    ids: Optional[Tuple[int, ...]]
+    pid: Optional[int] = None
+    origin: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "ChangeEvent":
+        data = json.loads(payload)
+        ids = data.get('ids')
+        return cls(data['seq'], data['table'], data['op'],
+                   tuple(ids) if ids is not None else None, data.get('pid'), data.get('origin'))
+
+
+Subscriber = Callable[[ChangeEvent], None]
+
+
+def set_origin(cur, origin: str):
+    """Tag the changes of the caller's transaction with ``origin``"""
+    cur.execute("SELECT set_config(%s, %s, true)", (ORIGIN_SETTING, origin))
+
+
+def announce(cur, table: str, op: str):
+    """Log and notify a change no trigger sees, e.g. a detached partition, in the caller's transaction"""
+    origin = f"NULLIF(current_setting('{ORIGIN_SETTING}', true), '')"
+    cur.execute(f"INSERT INTO change_log (table_name, op, row_ids, origin) VALUES (%s, %s, NULL, {origin}) "
+                "RETURNING id AS seq", (table, op))
+    seq = _value(cur.fetchone())
+    cur.execute("SELECT pg_notify(%s, json_build_object('seq', %s::bigint, 'table', %s::text, 'op', %s::text, "
+                f"'ids', NULL, 'pid', pg_backend_pid(), 'origin', {origin})::text)", (CHANNEL, seq, table, op))
+
+
+class ChangeFeed:
+    """Background LISTEN loop that turns notifications into ChangeEvents.
+
+    The listener owns one dedicated autocommit connection. If it drops, the
+    loop reconnects with jittered backoff, LISTENs again and then replays
+    ``change_log`` rows it missed, so subscribers see every change exactly
+    once. Seqs are allocated before commit, so a transaction can commit
+    after a later seq was delivered; seqs skipped over are kept as gaps for
+    ``gap_timeout`` seconds and replayed too if they turn up in the log
+    (ids of rolled-back transactions never do). When the missed rows have
+    already been trimmed a RESYNC event per table is sent instead. Subscribers run on the listener thread and must
+    be quick; exceptions they raise are logged and swallowed.
+    """
+
+    def __init__(self, connect: Callable[[], Any], channel: str = CHANNEL,
+                 poll_timeout: float = 5.0, retention: float = 3600.0, gap_timeout: float = 300.0,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0):
+        self.connect = connect
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.retention = retention
+        self.gap_timeout = gap_timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[Subscriber, Optional[Set[str]]]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._conn = None
+        self._last_seq: Optional[int] = None
+        # Concurrent transactions can commit out of seq order, so dedupe on a
+        # window of recent seqs rather than on the high-water mark alone
+        self._seen: Set[int] = set()
+        self._seen_order: Deque[int] = deque()
+        # Seqs below _last_seq not seen yet -> when they were first missed
+        self._gaps: Dict[int, float] = {}
+        self._last_trim = 0.0
+
+        self._connected = False
+        self._events = 0
+        self._replayed = 0
+        self._resyncs = 0
+        self._reconnects = 0
+        self._errors = 0
+        self._last_event_at: Optional[float] = None
+
+    def subscribe(self, callback: Subscriber, tables: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Call ``callback(event)`` for changes to ``tables`` (all if None); returns an unsubscribe function"""
+        entry = (callback, set(tables) if tables is not None else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.poll_timeout + 1)
+        self._thread = None
+        self._close()
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                attempt = 0
+                self._loop()
+            except Exception as e:
+                self._errors += 1
+                self._connected = False
+                self._close()
+                if self._stop.is_set():
+                    break
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                attempt += 1
+                self._reconnects += 1
+                print(f"❌ Change feed listener lost ({str(e).strip()}); reconnecting in {delay:.1f}s")
+                self._stop.wait(delay)
+
+    def _listen(self):
+        conn = self.connect()
+        conn.autocommit = True
+        self._conn = conn
+        with conn.cursor() as cur:
+            # LISTEN before reading the log so nothing can slip between the two
+            cur.execute(f"LISTEN {self.channel}")
+            if self._last_seq is None:
+                cur.execute("SELECT COALESCE(MAX(id), 0) AS seq FROM change_log")
+                self._last_seq = _value(cur.fetchone())
+            else:
+                self._catch_up(cur)
+        self._connected = True
+
+    def _catch_up(self, cur):
+        # An empty log still had every seq up to the sequence's last one, all trimmed
+        cur.execute("""
+            SELECT COALESCE(MIN(id), (SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END
+                                      FROM change_log_id_seq)) AS seq
+            FROM change_log
+        """)
+        oldest = _value(cur.fetchone())
+        if oldest > self._last_seq + 1:
+            # The log was trimmed past us; we can no longer say what changed
+            self._resyncs += 1
+            print(f"⚠️ Change feed missed log entries after {self._last_seq}; resyncing all tables")
+            for table in WATCHED_TABLES:
+                self._dispatch(ChangeEvent(oldest - 1, table, 'RESYNC', None))
+            # Don't resync again for the same entries on the next reconnect
+            self._last_seq = oldest - 1
+            self._gaps.clear()
+        cur.execute("""
+            SELECT id, table_name, op, row_ids, backend_pid, origin
+            FROM change_log WHERE id > %s OR id = ANY(%s::bigint[]) ORDER BY id
+        """, (self._last_seq, list(self._gaps)))
+        for row in cur.fetchall():
+            seq, table, op, ids, pid, origin = (
+                row[k] for k in ('id', 'table_name', 'op', 'row_ids', 'backend_pid', 'origin')
+            ) if isinstance(row, dict) else row
+            self._replayed += 1
+            self._deliver(ChangeEvent(seq, table, op, tuple(ids) if ids is not None else None, pid, origin))
+
+    def _loop(self):
+        conn = self._conn
+        while not self._stop.is_set():
+            if select.select([conn], [], [], self.poll_timeout) != ([], [], []):
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        event = ChangeEvent.from_payload(notify.payload)
+                    except (ValueError, KeyError) as e:
+                        print(f"Error decoding change notification: {e}")
+                        continue
+                    self._deliver(event)
+            else:
+                # Idle: make sure the connection is still alive
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+            self._maybe_trim()
+
+    def _deliver(self, event: ChangeEvent):
+        if event.seq in self._seen:
+            return
+        self._seen.add(event.seq)
+        self._seen_order.append(event.seq)
+        while len(self._seen_order) > 10000:
+            self._seen.discard(self._seen_order.popleft())
+        self._gaps.pop(event.seq, None)
+        if self._last_seq is not None and event.seq > self._last_seq + 1:
+            now = time.monotonic()
+            for seq in range(max(self._last_seq + 1, event.seq - MAX_GAPS), event.seq):
+                if seq not in self._seen:
+                    self._gaps.setdefault(seq, now)
+            while len(self._gaps) > MAX_GAPS:
+                del self._gaps[min(self._gaps)]
+        self._last_seq = max(self._last_seq or 0, event.seq)
+        self._dispatch(event)
+
+    def _dispatch(self, event: ChangeEvent):
+        self._events += 1
+        self._last_event_at = time.time()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, tables in subscribers:
+            if tables is not None and event.table not in tables:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in change feed subscriber: {e}")
+
+    def _maybe_trim(self):
+        now = time.monotonic()
+        if now - self._last_trim < 60:
+            return
+        self._last_trim = now
+        expired = [seq for seq, missed_at in self._gaps.items() if now - missed_at > self.gap_timeout]
+        for seq in expired:
+            del self._gaps[seq]
+        with self._conn.cursor() as cur:
+            cur.execute("DELETE FROM change_log WHERE changed_at < NOW() - make_interval(secs => %s)",
+                        (self.retention,))
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._connected,
+            "last_seq": self._last_seq,
+            "gaps": len(self._gaps),
+            "events": self._events,
+            "replayed": self._replayed,
+            "resyncs": self._resyncs,
+            "reconnects": self._reconnects,
+            "errors": self._errors,
+            "last_event_at": self._last_event_at,
+            "subscribers": len(self._subscribers),
+        }
+
+
+def _value(row) -> Any:
+    return row['seq'] if isinstance(row, dict) else row[0]
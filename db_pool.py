@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Thread-safe PostgreSQL connection pool for the Flask backend
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any, TypeVar
+
+import psycopg2
+from psycopg2 import extensions
+
+
+T = TypeVar('T')
+
+# What psycopg2 raises when the server or the socket went away
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the wait timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of psycopg2 connections shared by request threads.
+
+    Connections are checked out per query and returned straight after, so
+    concurrent requests only wait on each other once ``max_size`` connections
+    are busy. Connections idle for ``validate_after`` seconds or more are
+    validated with a round-trip on checkout and replaced if the server
+    dropped them. Younger ones are handed out unchecked; ``run`` covers them
+    by retrying once on a fresh connection when the first one turns out to
+    be dead. The first such failure also makes every idle connection be
+    validated on its next checkout.
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = 1, max_size: int = 10,
+                 timeout: float = 10.0, validate_after: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool bounds: min_size={min_size}, max_size={max_size}")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.validate_after = validate_after
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle: List[tuple] = []  # (connection, returned_at)
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._reconnects = 0
+        self._discarded = 0
+
+        for _ in range(min_size):
+            try:
+                conn = self._connect()
+            except Exception as e:
+                print(f"Database connection error: {e}")
+                break
+            self._size += 1
+            self._idle.append((conn, time.monotonic()))
+
+    @classmethod
+    def from_env(cls, connect: Callable[[], Any]) -> "ConnectionPool":
+        """Build a pool sized from DB_POOL_MIN / DB_POOL_MAX / DB_POOL_TIMEOUT"""
+        return cls(
+            connect,
+            min_size=int(os.getenv('DB_POOL_MIN', 1)),
+            max_size=int(os.getenv('DB_POOL_MAX', 10)),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            validate_after=float(os.getenv('DB_POOL_VALIDATE_AFTER', 30)),
+        )
+
+    @contextmanager
+    def connection(self):
+        """Check a connection out for the duration of a ``with`` block"""
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            # A statement timeout is an OperationalError too, but leaves the connection usable
+            broken = bool(conn.closed)
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def run(self, work: Callable[[Any], T]) -> T:
+        """``work(conn)`` on a checked-out connection, once more on another if the first was dead.
+
+        Only for work that is safe to repeat, such as a read: the first
+        attempt's transaction is discarded with its connection.
+        """
+        conn = None
+        try:
+            with self.connection() as conn:
+                return work(conn)
+        except CONNECTION_ERRORS as e:
+            # Only retry when the connection itself was lost (and discarded)
+            if conn is None or not conn.closed:
+                raise
+            print(f"Database connection lost ({str(e).strip()}); retrying on a fresh connection")
+        with self.connection() as conn:
+            return work(conn)
+
+    def getconn(self):
+        """Check out a validated connection, waiting up to ``timeout`` seconds"""
+        started = time.monotonic()
+        waited = False
+
+        with self._available:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now and connect outside the lock
+                    self._size += 1
+                    conn, returned_at = None, None
+                    break
+
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout:.1f}s "
+                                      f"({self.max_size} in use)")
+                self._available.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            wait_time = time.monotonic() - started
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+            if waited:
+                self._waits += 1
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._is_usable(conn, returned_at):
+                self._close_quietly(conn)
+                conn = self._connect()
+                with self._lock:
+                    self._reconnects += 1
+        except Exception:
+            self._release_slot()
+            raise
+        return conn
+
+    def putconn(self, conn, broken: bool = False):
+        """Return a connection to the pool, discarding it if it is no longer usable"""
+        if not broken and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    # Never hand out a connection with an open (or aborted) transaction
+                    conn.rollback()
+            except Exception:
+                broken = True
+
+        with self._available:
+            self._in_use -= 1
+            if broken or conn.closed or self._closed:
+                self._size -= 1
+                self._discarded += 1
+                discard = True
+                if broken:
+                    # Whatever dropped this one (a server restart, a proxy timeout) likely dropped the rest
+                    self._idle = [(idle, float('-inf')) for idle, _ in self._idle]
+            else:
+                self._idle.append((conn, time.monotonic()))
+                discard = False
+            self._available.notify()
+
+        if discard:
+            self._close_quietly(conn)
+
+    def _release_slot(self):
+        with self._available:
+            self._in_use -= 1
+            self._size -= 1
+            self._available.notify()
+
+    def _is_usable(self, conn, returned_at: float) -> bool:
+        """Cheap validity check; only round-trips for connections idle ``validate_after`` or more"""
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.validate_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage, wait-time and saturation counters"""
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "saturated_waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+                "reconnects": self._reconnects,
+                "discarded": self._discarded,
+            }
+
+    def close(self):
+        """Close idle connections and refuse further checkouts"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._available.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Local stand-in HTTP server that replays recorded scraper pages
+"""
+
+import time
+import hashlib
+import threading
+from email.utils import formatdate
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+CONTENT_TYPES = {
+    '.json': 'application/json; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+}
+
+
+class FixtureServer:
+    """Serves ``<directory>/<source>_<kind>.<ext>`` at ``/<source>/<kind>``.
+
+    ``delays`` maps a source name to seconds to sleep before answering, which
+    is how a slow or hung upstream site is simulated. Like most real sites it
+    sends ETag / Last-Modified and answers conditional requests with 304,
+    unless ``validators`` is False.
+    """
+
+    def __init__(self, directory: str, host: str = '127.0.0.1', port: int = 0,
+                 delays: Optional[Dict[str, float]] = None, validators: bool = True):
+        self.directory = Path(directory)
+        self.delays = dict(delays or {})
+        self.validators = validators
+        self.hits: Dict[str, int] = {}
+        self.not_modified = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.split('?', 1)[0].strip('/').split('/')
+                if len(parts) != 2:
+                    self.send_error(404)
+                    return
+                source, kind = parts
+                server.hits[self.path] = server.hits.get(self.path, 0) + 1
+                matches = sorted(server.directory.glob(f'{source}_{kind}.*'))
+                if not matches:
+                    self.send_error(404)
+                    return
+
+                delay = server.delays.get(source)
+                if delay:
+                    time.sleep(delay)
+
+                body = matches[0].read_bytes()
+                if server.validators:
+                    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        server.not_modified += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPES.get(matches[0].suffix, 'application/octet-stream'))
+                self.send_header('Content-Length', str(len(body)))
+                if server.validators:
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', formatdate(matches[0].stat().st_mtime, usegmt=True))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url_for(self, source: str, kind: str) -> str:
+        return f'{self.base_url}/{source}/{kind}'
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'FixtureServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
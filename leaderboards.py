@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Player leaderboards held in memory: every season's players ranked on each
+metric, league-wide and per team, kept sorted as player rows change
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from pagination import InvalidParameter, encode_rank_cursor
+
+# Every column of players, as the boards are loaded and updated with them
+PLAYER_COLUMNS = ('id', 'name', 'team_id', 'position', 'goals', 'assists', 'appearances', 'season')
+
+DEFAULT_LIMIT = 10
+# However large ?limit= is, no read walks further than this
+MAX_LIMIT = 100
+
+
+def _goals_per_appearance(player: Mapping[str, Any]) -> Optional[float]:
+    # Unranked until the player has appeared
+    return player['goals'] / player['appearances'] if player['appearances'] else None
+
+
+# metric -> score of a player row; None leaves the player off that board
+METRICS: Dict[str, Callable[[Mapping[str, Any]], Optional[float]]] = {
+    'goals': lambda player: player['goals'],
+    'assists': lambda player: player['assists'],
+    'contributions': lambda player: player['goals'] + player['assists'],
+    'goals_per_appearance': _goals_per_appearance,
+}
+
+
+def metric_filter(metric: str) -> str:
+    """A leaderboard metric name, checked"""
+    if metric not in METRICS:
+        raise InvalidParameter(f"unknown metric {metric!r}; expected {', '.join(METRICS)}")
+    return metric
+
+
+# A board entry, (-score, player id): best first, ties by player id
+Key = Tuple[float, int]
+
+
+class _Board:
+    """Players of one scope ranked on one metric: (-score, player id) keys kept sorted.
+
+    A bisect finds any entry or score; a change moves one key, which at
+    squad and league sizes is a short memmove rather than a tree rebalance.
+    """
+    __slots__ = ('keys',)
+
+    def __init__(self):
+        self.keys: List[Key] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: Key):
+        insort(self.keys, key)
+
+    def remove(self, key: Key):
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+
+    def index(self, key: Key) -> int:
+        return bisect_left(self.keys, key)
+
+    def rank(self, position: int) -> int:
+        """1-based rank of the entry at ``position``; players level on score share it"""
+        return bisect_left(self.keys, (self.keys[position][0],)) + 1
+
+
+class Leaderboards:
+    """Every player row by id plus a _Board per (season, team or None, metric).
+
+    ``apply`` moves only the changed players between positions, so the
+    boards never need rebuilding after a write. Reads walk a board from
+    a position: a page of ``limit`` rows costs one bisect and ``limit``
+    steps however long the board. Ranks are competition ranks (1, 2, 2, 4).
+    A lock makes each read and each write atomic with respect to the others.
+    """
+
+    def __init__(self, rows: Iterable[Mapping[str, Any]] = ()):
+        self._players: Dict[int, Dict[str, Any]] = {}
+        self._boards: Dict[Tuple[str, Optional[int], str], _Board] = {}
+        self._lock = threading.Lock()
+        # Appended unsorted and sorted once: a load is one sort per board, not an insort per entry
+        for row in rows:
+            player = {column: row[column] for column in PLAYER_COLUMNS}
+            self._players[player['id']] = player
+            for metric, key in self._keys(player):
+                for season, team_id in self._scopes(player):
+                    self._boards.setdefault((season, team_id, metric), _Board()).keys.append(key)
+        for board in self._boards.values():
+            board.keys.sort()
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    @staticmethod
+    def _scopes(player: Mapping[str, Any]) -> Tuple[Tuple[str, Optional[int]], ...]:
+        return (player['season'], None), (player['season'], player['team_id'])
+
+    @staticmethod
+    def _keys(player: Mapping[str, Any]) -> Iterator[Tuple[str, Key]]:
+        for metric, score_of in METRICS.items():
+            score = score_of(player)
+            if score is not None:
+                yield metric, (-score, player['id'])
+
+    def _place(self, player: Mapping[str, Any], sign: int):
+        for metric, key in self._keys(player):
+            for season, team_id in self._scopes(player):
+                if sign > 0:
+                    self._boards.setdefault((season, team_id, metric), _Board()).add(key)
+                else:
+                    board = self._boards.get((season, team_id, metric))
+                    if board is not None:
+                        board.remove(key)
+                        if not board:
+                            del self._boards[season, team_id, metric]
+
+    def apply(self, rows: Iterable[Mapping[str, Any]], deleted_ids: Iterable[int] = ()):
+        """Upsert player rows (mappings with every PLAYER_COLUMNS key) and drop deleted ids"""
+        with self._lock:
+            for player_id in deleted_ids:
+                old = self._players.pop(player_id, None)
+                if old is not None:
+                    self._place(old, -1)
+            for row in rows:
+                player = {column: row[column] for column in PLAYER_COLUMNS}
+                old = self._players.get(player['id'])
+                if old == player:
+                    continue
+                if old is not None:
+                    self._place(old, -1)
+                self._players[player['id']] = player
+                self._place(player, 1)
+
+    def _row(self, board: _Board, position: int, rank: int) -> Dict[str, Any]:
+        player = self._players[board.keys[position][1]]
+        rate = _goals_per_appearance(player)
+        return {
+            **player,
+            "contributions": player['goals'] + player['assists'],
+            "goals_per_appearance": round(rate, 3) if rate is not None else None,
+            "rank": rank,
+        }
+
+    def _rows(self, board: _Board, start: int, stop: int) -> List[Dict[str, Any]]:
+        rows, rank = [], None
+        for position in range(start, stop):
+            if rank is None or board.keys[position][0] != board.keys[position - 1][0]:
+                rank = board.rank(position) if rank is None else position + 1
+            rows.append(self._row(board, position, rank))
+        return rows
+
+    def _page(self, board: _Board, start: int, stop: int) -> Dict[str, Any]:
+        stop = min(stop, len(board))
+        next_cursor = None
+        if start < stop < len(board):
+            score, player_id = board.keys[stop - 1]
+            next_cursor = encode_rank_cursor(-score, player_id)
+        return {"data": self._rows(board, start, stop), "total": len(board), "next_cursor": next_cursor}
+
+    def page(self, metric: str, season: str, team_id: Optional[int] = None, limit: int = DEFAULT_LIMIT,
+             after: Optional[Tuple[float, int]] = None) -> Dict[str, Any]:
+        """Up to ``limit`` players of a board, best first, from just after ``after``.
+
+        ``after`` is a decoded rank cursor, (score, player id).
+        """
+        limit = min(limit, MAX_LIMIT)
+        with self._lock:
+            board = self._boards.get((season, team_id, metric))
+            if board is None:
+                return {"data": [], "total": 0, "next_cursor": None}
+            start = bisect_right(board.keys, (-after[0], after[1])) if after is not None else 0
+            return self._page(board, start, start + limit)
+
+    def rank_of(self, player_id: int, metric: str, team: bool = False,
+                around: int = 2) -> Optional[Dict[str, Any]]:
+        """A player's rank on their season's board (their team's, with ``team``), and ``around`` rows either side.
+
+        None for an unknown player; rank None when the metric does not
+        rank them yet (goals_per_appearance before their first appearance).
+        """
+        around = min(around, MAX_LIMIT // 2)
+        with self._lock:
+            player = self._players.get(player_id)
+            if player is None:
+                return None
+            season = player['season']
+            board = self._boards.get((season, player['team_id'] if team else None, metric))
+            score = METRICS[metric](player)
+            if board is None or score is None:
+                return {"player_id": player_id, "season": season, "rank": None, "total": len(board or ()),
+                        "data": [], "next_cursor": None}
+            position = board.index((-score, player_id))
+            start = max(position - around, 0)
+            return {"player_id": player_id, "season": season, "rank": board.rank(position),
+                    **self._page(board, start, position + around + 1)}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "players": len(self._players),
+                "boards": len(self._boards),
+                "entries": sum(len(board) for board in self._boards.values()),
+            }
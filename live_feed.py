@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Single-producer change feed of live match updates for Server-Sent Events
+"""
+
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Fields pushed as diffs; everything else about a live match is static
+DIFF_FIELDS = ('home_score', 'away_score', 'minute', 'status')
+
+# Client reconnect delay sent in the stream's retry field
+RETRY_MS = 2000
+
+
+class LiveFeed:
+    """Polls live matches once for every subscriber and fans out the diffs.
+
+    A single producer thread runs ``loader`` every ``interval`` seconds while
+    anyone is subscribed and turns the result into ``added``, ``update`` and
+    ``removed`` events. Each event is serialized once, numbered, and kept in
+    a bounded history, so a reconnecting client that sends Last-Event-ID gets
+    exactly what it missed; a client too far behind gets a fresh
+    ``snapshot`` instead.
+
+    Each subscriber of ``stream`` blocks the thread iterating it for as long
+    as the client stays connected. ``open_stream`` refuses subscribers past
+    ``max_streams`` (0: no cap) so a threaded server keeps threads for the
+    rest of its requests.
+    """
+
+    def __init__(self, loader: Callable[[], List[Dict[str, Any]]], dumps: Callable[[Any], str] = json.dumps,
+                 interval: float = 1.0, heartbeat: float = 15.0, history: int = 500,
+                 idle_timeout: float = 30.0, on_change: Optional[Callable[[], None]] = None,
+                 max_streams: int = 0):
+        self.loader = loader
+        self.dumps = dumps
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.idle_timeout = idle_timeout
+        self.on_change = on_change
+        self.max_streams = max_streams
+
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._events: Deque[Tuple[int, str]] = deque(maxlen=history)
+        self._seq = 0
+        self._state: Dict[Any, Dict[str, Any]] = {}
+        self._loaded = False
+        self._snapshot: Optional[Tuple[int, str]] = None
+        self._subscribers = 0
+        self._thread: Optional[threading.Thread] = None
+        # Streams handed out by open_stream and not yet closed
+        self._streams = 0
+        self._rejected = 0
+
+        self._polls = 0
+        self._errors = 0
+
+    def poll(self) -> int:
+        """Load live matches once and publish the differences; returns events published"""
+        try:
+            rows = self.loader()
+        except Exception as e:
+            self._errors += 1
+            print(f"Error polling live matches: {e}")
+            return 0
+        return self.publish(rows)
+
+    def publish(self, rows: List[Dict[str, Any]]) -> int:
+        """Diff freshly loaded live matches against the last state; returns events published"""
+        self._polls += 1
+        current = {row['id']: row for row in rows}
+        with self._cond:
+            if not self._loaded:
+                self._state = current
+                self._loaded = True
+                self._cond.notify_all()
+                return 0
+
+            events: List[Tuple[str, Any]] = []
+            for match_id, row in current.items():
+                previous = self._state.get(match_id)
+                if previous is None:
+                    events.append(('added', row))
+                    continue
+                changed = {f: row.get(f) for f in DIFF_FIELDS if row.get(f) != previous.get(f)}
+                if changed:
+                    changed['id'] = match_id
+                    events.append(('update', changed))
+            for match_id in self._state.keys() - current.keys():
+                events.append(('removed', {'id': match_id}))
+
+            self._state = current
+            for event, data in events:
+                self._seq += 1
+                self._events.append((self._seq, f"id: {self._seq}\nevent: {event}\ndata: {self.dumps(data)}\n\n"))
+            if events:
+                self._snapshot = None
+                self._cond.notify_all()
+
+        if events and self.on_change:
+            self.on_change()
+        return len(events)
+
+    def notify(self):
+        """Ask the producer to poll now instead of waiting for the next interval"""
+        self._wake.set()
+
+    def stream(self, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """SSE wire text for one subscriber: a snapshot or catch-up, then diffs and heartbeats"""
+        self._subscribe()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+
+            with self._cond:
+                if not self._loaded:
+                    self._cond.wait_for(lambda: self._loaded, timeout=self.heartbeat)
+                cursor, backlog = self._resume(last_event_id)
+            for chunk in backlog:
+                yield chunk
+
+            while True:
+                with self._cond:
+                    if self._seq == cursor:
+                        self._cond.wait(self.heartbeat)
+                    cursor, backlog = self._resume(str(cursor))
+                if backlog:
+                    for chunk in backlog:
+                        yield chunk
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            self._unsubscribe()
+
+    def open_stream(self, last_event_id: Optional[str] = None) -> Optional[Iterator[str]]:
+        """``stream`` if fewer than ``max_streams`` are open, else None; the slot is freed when it is closed"""
+        with self._cond:
+            if self.max_streams and self._streams >= self.max_streams:
+                self._rejected += 1
+                return None
+            self._streams += 1
+        chunks = self._held(last_event_id)
+        # Started here, so closing it frees the slot even if the server never iterates it
+        next(chunks)
+        return chunks
+
+    def _held(self, last_event_id: Optional[str]) -> Iterator[Optional[str]]:
+        try:
+            yield None
+            yield from self.stream(last_event_id)
+        finally:
+            with self._cond:
+                self._streams -= 1
+
+    def _resume(self, last_event_id: Optional[str]) -> Tuple[int, List[str]]:
+        """Events after ``last_event_id``, or a snapshot when they are no longer held"""
+        try:
+            last = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last = None
+
+        oldest = self._events[0][0] if self._events else self._seq + 1
+        if last is not None and oldest - 1 <= last <= self._seq:
+            return self._seq, [text for seq, text in self._events if seq > last]
+        return self._seq, [self._snapshot_text()]
+
+    def _snapshot_text(self) -> str:
+        if self._snapshot is None or self._snapshot[0] != self._seq:
+            data = self.dumps(list(self._state.values()))
+            self._snapshot = (self._seq, f"id: {self._seq}\nevent: snapshot\ndata: {data}\n\n")
+        return self._snapshot[1]
+
+    def _subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+                self._thread.start()
+
+    def _unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def _run(self):
+        idle_since = None
+        while True:
+            self.poll()
+            with self._cond:
+                if self._subscribers > 0:
+                    idle_since = None
+                else:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > self.idle_timeout:
+                        # Keep state so the next producer diffs against it
+                        self._thread = None
+                        return
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "subscribers": self._subscribers,
+                "rejected": self._rejected,
+                "live_matches": len(self._state),
+                "last_event_id": self._seq,
+                "polls": self._polls,
+                "errors": self._errors,
+                "running": self._thread is not None,
+            }
+
+
+class AsyncLiveFeed(LiveFeed):
+    """LiveFeed for an asyncio server: the producer is a task, subscribers are coroutines.
+
+    Diffing, history and snapshots are inherited. Waiting subscribers cost
+    one pending future each rather than a thread, so a single process can
+    hold thousands of open streams. ``notify`` may be called from any thread.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]], **kwargs):
+        super().__init__(loader, **kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._published: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def poll(self) -> int:
+        try:
+            rows = await self.loader()
+        except Exception as e:
+            self._errors += 1
+            print(f"Error polling live matches: {e}")
+            return 0
+        return self.publish(rows)
+
+    def publish(self, rows: List[Dict[str, Any]]) -> int:
+        was_loaded = self._loaded
+        count = super().publish(rows)
+        if count or not was_loaded:
+            # Swap the event so every waiter wakes once, whatever their number
+            published, self._published = self._published, asyncio.Event()
+            published.set()
+        return count
+
+    def notify(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """SSE wire text for one subscriber, as in ``LiveFeed.stream``"""
+        self._subscribe()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+
+            if not self._loaded:
+                await self._wait(self._published)
+            cursor, backlog = self._resume(last_event_id)
+            for chunk in backlog:
+                yield chunk
+
+            while True:
+                published = self._published
+                if self._seq == cursor:
+                    await self._wait(published)
+                cursor, backlog = self._resume(str(cursor))
+                if backlog:
+                    for chunk in backlog:
+                        yield chunk
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            self._unsubscribe()
+
+    async def _wait(self, event: asyncio.Event):
+        try:
+            await asyncio.wait_for(event.wait(), self.heartbeat)
+        except asyncio.TimeoutError:
+            pass
+
+    def _subscribe(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._published = asyncio.Event()
+            self._wakeup = asyncio.Event()
+        self._subscribers += 1
+        if self._task is None:
+            self._task = self._loop.create_task(self._run())
+
+    def _unsubscribe(self):
+        self._subscribers -= 1
+
+    async def _run(self):
+        idle_since = None
+        try:
+            while True:
+                await self.poll()
+                if self._subscribers > 0:
+                    idle_since = None
+                else:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > self.idle_timeout:
+                        return
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            # Keep state so the next producer diffs against it
+            self._task = None
+
+    async def close(self):
+        """Cancel the producer task, e.g. on server shutdown"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["running"] = self._task is not None
+        return stats
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Matches held in process memory as column arrays, indexed by team, status,
+date and pairing, for the per-team views: fixtures, form, head-to-head and the team overview
+"""
+
+import sys
+import heapq
+import itertools
+import operator
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from team_map import TeamMap
+
+# Every column of matches: what the store holds and hands back, like SELECT m.*.
+# Rows given to MatchStore() are tuples in this order.
+STORE_COLUMNS = ('id', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'status',
+                 'match_date', 'venue', 'minute', 'competition')
+
+# Dates are kept as microseconds since this instant, so they sort as integers
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# NULL in the score and minute columns; neither is ever negative
+_NULL = -1
+
+
+_values = operator.itemgetter(*STORE_COLUMNS)
+
+
+def _micros(moment: datetime) -> int:
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def _moment(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _intern(text: Optional[str]) -> Optional[str]:
+    # Venues and competitions repeat: keep one copy of each
+    return sys.intern(text) if text is not None else None
+
+
+class _DateIndex:
+    """Match ids in (match_date, id) order, as two parallel arrays"""
+    __slots__ = ('dates', 'ids')
+
+    def __init__(self, entries: Iterable[Tuple[int, int]] = ()):
+        entries = sorted(entries)
+        self.dates = array('q', [date for date, _ in entries])
+        self.ids = array('i', [match_id for _, match_id in entries])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _find(self, date: int, match_id: int) -> int:
+        position = bisect_left(self.dates, date)
+        end = bisect_right(self.dates, date, position)
+        while position < end and self.ids[position] < match_id:
+            position += 1
+        return position
+
+    def add(self, date: int, match_id: int):
+        position = self._find(date, match_id)
+        self.dates.insert(position, date)
+        self.ids.insert(position, match_id)
+
+    def remove(self, date: int, match_id: int):
+        position = self._find(date, match_id)
+        if position < len(self.ids) and self.ids[position] == match_id and self.dates[position] == date:
+            del self.dates[position]
+            del self.ids[position]
+
+    def ordered(self, descending: bool) -> Iterator[int]:
+        return reversed(self.ids) if descending else iter(self.ids)
+
+    def entries(self, descending: bool) -> Iterator[Tuple[int, int]]:
+        if descending:
+            return zip(reversed(self.dates), reversed(self.ids))
+        return zip(self.dates, self.ids)
+
+    def nbytes(self) -> int:
+        return (len(self.dates) * self.dates.itemsize + len(self.ids) * self.ids.itemsize)
+
+
+class MatchStore:
+    """Every match in a slot of parallel column arrays, plus secondary indexes.
+
+    A match is about fifty bytes of columns (venue and competition strings
+    are interned and shared) and one (date, id) entry per index: the
+    global date order, its status, each of its two teams together with
+    its status, and its pairing, which is the unordered (team, team) pair
+    so both legs of a head-to-head share one index. Lookups walk an index
+    in date order, merging a team's per-status indexes when they need
+    more than one, and only turn the matches they return into dicts.
+
+    Writes are incremental: ``apply`` upserts changed rows and drops
+    deleted ids, keeping every index sorted. A lock makes each read and
+    each write atomic with respect to the others.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]] = ()):
+        """Load ``rows``, tuples in STORE_COLUMNS order, a column at a time"""
+        self._lock = threading.RLock()
+        self._free: List[int] = []
+        self._status_codes: Dict[str, int] = {}
+        self._status_names: List[str] = []
+
+        rows = list(rows)
+        self._id = array('i', [row[0] for row in rows])
+        self._home = array('i', [row[1] for row in rows])
+        self._away = array('i', [row[2] for row in rows])
+        self._home_score = array('h', [_NULL if row[3] is None else row[3] for row in rows])
+        self._away_score = array('h', [_NULL if row[4] is None else row[4] for row in rows])
+        self._status = array('b', [self._code(row[5]) for row in rows])
+        self._date = array('q', [_micros(row[6]) for row in rows])
+        self._venue: List[Optional[str]] = [_intern(row[7]) for row in rows]
+        self._minute = array('h', [_NULL if row[8] is None else row[8] for row in rows])
+        self._competition: List[Optional[str]] = [_intern(row[9]) for row in rows]
+        self._slots: Dict[int, int] = {match_id: slot for slot, match_id in enumerate(self._id)}
+
+        # Sorted once here rather than kept sorted row by row
+        by_date, by_team, by_status, by_pair = [], {}, {}, {}
+        for slot, entry in enumerate(zip(self._date, self._id)):
+            status = self._status[slot]
+            by_date.append(entry)
+            by_status.setdefault(status, []).append(entry)
+            by_team.setdefault((self._home[slot], status), []).append(entry)
+            by_team.setdefault((self._away[slot], status), []).append(entry)
+            by_pair.setdefault(self._pair(slot), []).append(entry)
+        self._by_date = _DateIndex(by_date)
+        # (team id, status code) -> that team's matches with that status
+        self._by_team = {key: _DateIndex(entries) for key, entries in by_team.items()}
+        self._by_status = {key: _DateIndex(entries) for key, entries in by_status.items()}
+        self._by_pair = {key: _DateIndex(entries) for key, entries in by_pair.items()}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # --- Slots ------------------------------------------------------------
+
+    def _new_slot(self) -> int:
+        if self._free:
+            return self._free.pop()
+        self._id.append(0)
+        self._home.append(0)
+        self._away.append(0)
+        self._home_score.append(_NULL)
+        self._away_score.append(_NULL)
+        self._status.append(0)
+        self._date.append(0)
+        self._minute.append(_NULL)
+        self._venue.append(None)
+        self._competition.append(None)
+        return len(self._id) - 1
+
+    def _code(self, status: str) -> int:
+        code = self._status_codes.get(status)
+        if code is None:
+            code = self._status_codes[status] = len(self._status_names)
+            self._status_names.append(status)
+        return code
+
+    def _write(self, slot: int, values: Sequence[Any]):
+        match_id, home, away, home_score, away_score, status, match_date, venue, minute, competition = values
+        self._id[slot] = match_id
+        self._home[slot] = home
+        self._away[slot] = away
+        self._home_score[slot] = _NULL if home_score is None else home_score
+        self._away_score[slot] = _NULL if away_score is None else away_score
+        self._status[slot] = self._code(status)
+        self._date[slot] = _micros(match_date)
+        self._venue[slot] = _intern(venue)
+        self._minute[slot] = _NULL if minute is None else minute
+        self._competition[slot] = _intern(competition)
+        self._slots[match_id] = slot
+
+    def _pair(self, slot: int) -> Tuple[int, int]:
+        return self._key(self._home[slot], self._away[slot])
+
+    def _indexes(self, slot: int) -> Iterator[_DateIndex]:
+        """Every index the match in ``slot`` belongs to, created as needed"""
+        yield self._by_date
+        yield self._by_status.setdefault(self._status[slot], _DateIndex())
+        yield self._by_team.setdefault((self._home[slot], self._status[slot]), _DateIndex())
+        yield self._by_team.setdefault((self._away[slot], self._status[slot]), _DateIndex())
+        yield self._by_pair.setdefault(self._pair(slot), _DateIndex())
+
+    def _row(self, slot: int) -> Dict[str, Any]:
+        home_score, away_score, minute = self._home_score[slot], self._away_score[slot], self._minute[slot]
+        return {
+            'id': self._id[slot],
+            'home_team_id': self._home[slot],
+            'away_team_id': self._away[slot],
+            'home_score': None if home_score == _NULL else home_score,
+            'away_score': None if away_score == _NULL else away_score,
+            'status': self._status_names[self._status[slot]],
+            'match_date': _moment(self._date[slot]),
+            'venue': self._venue[slot],
+            'minute': None if minute == _NULL else minute,
+            'competition': self._competition[slot],
+        }
+
+    # --- Writes -----------------------------------------------------------
+
+    def apply(self, rows: Iterable[Mapping[str, Any]] = (), deleted: Iterable[int] = ()):
+        """Upsert changed match rows (all STORE_COLUMNS) and drop deleted match ids"""
+        with self._lock:
+            for match_id in deleted:
+                self._remove(match_id)
+            for row in rows:
+                slot = self._remove(row['id'], free=False)
+                if slot is None:
+                    slot = self._new_slot()
+                self._write(slot, _values(row))
+                for index in self._indexes(slot):
+                    index.add(self._date[slot], row['id'])
+
+    def _remove(self, match_id: int, free: bool = True) -> Optional[int]:
+        slot = self._slots.get(match_id)
+        if slot is None:
+            return None
+        for index in self._indexes(slot):
+            index.remove(self._date[slot], match_id)
+        if free:
+            del self._slots[match_id]
+            self._free.append(slot)
+        return slot
+
+    # --- Reads ------------------------------------------------------------
+
+    def _select(self, ids: Iterable[int], limit: Optional[int]) -> List[Dict[str, Any]]:
+        if limit is not None:
+            ids = itertools.islice(ids, limit)
+        slots = self._slots
+        return [self._row(slots[match_id]) for match_id in ids]
+
+    def _codes(self, statuses: Optional[Sequence[str]]) -> List[int]:
+        """Codes of ``statuses`` that occur at all, or of every status when none are given"""
+        if not statuses:
+            return list(range(len(self._status_names)))
+        return [self._status_codes[status] for status in statuses if status in self._status_codes]
+
+    def fixtures(self, team_id: int, statuses: Optional[Sequence[str]] = None, order: str = 'desc',
+                 limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """A team's matches, home and away, in (match_date, id) order"""
+        descending = order == 'desc'
+        with self._lock:
+            indexes = [self._by_team[team_id, code] for code in self._codes(statuses)
+                       if (team_id, code) in self._by_team]
+            if len(indexes) == 1:
+                ids = indexes[0].ordered(descending)
+            else:
+                merged = heapq.merge(*(index.entries(descending) for index in indexes), reverse=descending)
+                ids = (match_id for _, match_id in merged)
+            return self._select(ids, limit)
+
+    def head_to_head(self, team_id: int, opponent_id: int, order: str = 'desc',
+                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Matches between two teams, whichever was at home"""
+        with self._lock:
+            index = self._by_pair.get(self._key(team_id, opponent_id))
+            return self._select(index.ordered(order == 'desc'), limit) if index is not None else []
+
+    def head_to_head_record(self, team_id: int, opponent_id: int) -> Dict[str, Any]:
+        """team_form() of ``team_id`` over every meeting of the two, read straight from the columns"""
+        finished = self._status_codes.get('finished')
+        scored = []
+        with self._lock:
+            index = self._by_pair.get(self._key(team_id, opponent_id))
+            for match_id in index.ordered(True) if index is not None else ():
+                slot = self._slots[match_id]
+                home, away = self._home_score[slot], self._away_score[slot]
+                if self._status[slot] == finished and home != _NULL and away != _NULL:
+                    scored.append((home, away) if self._home[slot] == team_id else (away, home))
+        return _tally(scored)
+
+    @staticmethod
+    def _key(team_id: int, opponent_id: int) -> Tuple[int, int]:
+        return (team_id, opponent_id) if team_id < opponent_id else (opponent_id, team_id)
+
+    def by_status(self, status: str, order: str = 'desc', limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Matches with ``status`` in (match_date, id) order"""
+        with self._lock:
+            code = self._status_codes.get(status)
+            index = self._by_status.get(code) if code is not None else None
+            return self._select(index.ordered(order == 'desc'), limit) if index is not None else []
+
+    def stats(self) -> Dict[str, Any]:
+        """Size of the store and roughly how much memory its arrays take"""
+        with self._lock:
+            columns = sum(len(column) * column.itemsize for column in (
+                self._id, self._home, self._away, self._home_score, self._away_score,
+                self._status, self._date, self._minute))
+            indexes = [self._by_date, *self._by_team.values(), *self._by_status.values(), *self._by_pair.values()]
+            return {
+                "matches": len(self._slots),
+                "free_slots": len(self._free),
+                "teams": len({team_id for team_id, _ in self._by_team}),
+                "pairs": len(self._by_pair),
+                "column_bytes": columns + 16 * len(self._venue),
+                "index_bytes": sum(index.nbytes() for index in indexes),
+            }
+
+
+def _tally(scored: Sequence[Tuple[int, int]]) -> Dict[str, Any]:
+    """Form string and totals from (goals for, goals against) per match, newest first"""
+    results = ''.join('W' if ours > theirs else 'L' if ours < theirs else 'D' for ours, theirs in scored)
+    wins, draws = results.count('W'), results.count('D')
+    return {
+        "form": results,
+        "played": len(results),
+        "wins": wins,
+        "draws": draws,
+        "losses": len(results) - wins - draws,
+        "goals_for": sum(ours for ours, _ in scored),
+        "goals_against": sum(theirs for _, theirs in scored),
+        "points": 3 * wins + draws,
+    }
+
+
+def team_form(team_id: int, matches: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Results of ``team_id`` in finished ``matches``, newest first: 'W', 'D' or 'L' each, plus totals"""
+    return _tally([
+        (match['home_score'], match['away_score']) if match['home_team_id'] == team_id
+        else (match['away_score'], match['home_score'])
+        for match in matches
+        if match['status'] == 'finished' and match['home_score'] is not None and match['away_score'] is not None
+    ])
+
+
+def team_overview(teams: TeamMap, team_id: int, season: str, standing: Optional[Dict[str, Any]],
+                  scorers: List[Dict[str, Any]], results: List[Dict[str, Any]],
+                  fixtures: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """A team page: team, standing, form over ``results``, the matches and top scorers, all with team details"""
+    return {
+        "team": teams.by_id.get(team_id),
+        "season": season,
+        "standing": teams.standing(standing) if standing is not None else None,
+        "form": team_form(team_id, results),
+        "results": teams.matches(results),
+        "fixtures": teams.matches(fixtures),
+        "top_scorers": teams.players(scorers),
+    }
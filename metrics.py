@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style metrics: counters, gauges and histograms rendered in the
+text exposition format, plus the Flask and storage instrumentation hooks
+"""
+
+import time
+import inspect
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; spans a cached response (~100µs) up to a stalled scrape
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., sum, count]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_samples(self, items) -> List[str]:
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+# A collector returns (name, type, help, [(labels, value), ...]) families,
+# read fresh on every scrape from objects that already keep their own stats
+Family = Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]
+
+
+class Registry:
+    """Holds metrics and scrape-time collectors and renders them for /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Re-importing a module must not create a second series
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} "
+                                 f"{_format_value(float(value))}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Time from request start to response headers, by route template, method and status',
+    ('route', 'method', 'status'))
+HTTP_IN_FLIGHT = REGISTRY.gauge('http_requests_in_flight', 'Requests currently being handled')
+
+DB_QUERY_DURATION = REGISTRY.histogram(
+    'db_query_duration_seconds', 'Database time per FootballDataStorage method (cache misses only)',
+    ('method',))
+DB_ROWS = REGISTRY.histogram(
+    'db_rows_returned', 'Rows returned per query, by FootballDataStorage method', ('method',), ROW_BUCKETS)
+DB_QUERY_ERRORS = REGISTRY.counter(
+    'db_query_errors_total', 'Queries that raised, by FootballDataStorage method', ('method',))
+
+SERIALIZE_DURATION = REGISTRY.histogram(
+    'response_serialize_seconds', 'JSON encoding time of cached API responses, by cache namespace',
+    ('namespace',))
+
+SCRAPE_DURATION = REGISTRY.histogram(
+    'scrape_duration_seconds', 'Wall time per scrape source run, by outcome', ('source', 'outcome'))
+SCRAPE_REQUESTS = REGISTRY.counter(
+    'scrape_requests_total', 'HTTP fetches and browser renders issued, by source', ('source',))
+SCRAPE_ROWS = REGISTRY.counter(
+    'scrape_rows_total', 'Rows parsed, by source and kind', ('source', 'kind'))
+SCRAPE_PAGES = REGISTRY.counter(
+    'scrape_pages_total', 'Pages by source and outcome: changed, unchanged (same body hash) or not_modified (304)',
+    ('source', 'outcome'))
+SCRAPE_BYTES = REGISTRY.counter(
+    'scrape_bytes_total', 'Response body bytes downloaded, by source', ('source',))
+PARSE_DURATION = REGISTRY.histogram(
+    'scrape_parse_seconds', 'Parse time per page, by source, kind and parser (lxml fast path or bs4)',
+    ('source', 'kind', 'parser'))
+
+
+# --- Storage instrumentation ---------------------------------------------
+
+_current_method: contextvars.ContextVar[str] = contextvars.ContextVar('storage_method', default='other')
+
+
+def storage_method(func: Callable) -> Callable:
+    """Attribute queries run inside ``func`` (including cache loaders) to its name"""
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if _current_method.get() != 'other':
+                return await func(*args, **kwargs)
+            token = _current_method.set(func.__name__)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current_method.reset(token)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current_method.get() != 'other':
+            # The outermost storage method owns the query (e.g. a cache loader)
+            return func(*args, **kwargs)
+        token = _current_method.set(func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_method.reset(token)
+    return wrapper
+
+
+def current_method() -> str:
+    return _current_method.get()
+
+
+# Set while failed_queries() is active; timed_query appends (method, error) for each query that raises
+_failed_queries: contextvars.ContextVar[Optional[List[Tuple[str, str]]]] = contextvars.ContextVar(
+    'failed_queries', default=None)
+
+
+@contextmanager
+def failed_queries() -> Iterator[List[Tuple[str, str]]]:
+    """Collect the queries that fail inside the block, even when the storage method swallows the error.
+
+    Storage getters answer a failed read with an empty fallback; callers that
+    keep what they are handed (the response cache) check this list first.
+    """
+    failures: List[Tuple[str, str]] = []
+    token = _failed_queries.set(failures)
+    try:
+        yield failures
+    finally:
+        _failed_queries.reset(token)
+
+
+def note_failed_query(error: BaseException, method: Optional[str] = None):
+    """Record a failed read in the active failed_queries() list, e.g. one a coalesced load raised elsewhere"""
+    failures = _failed_queries.get()
+    if failures is not None:
+        failures.append((method or _current_method.get(), str(error)))
+
+
+@contextmanager
+def timed_query(method: Optional[str] = None):
+    """Time one query for the current storage method; the caller reports rows via the yielded list"""
+    rows: List[int] = []
+    method = method or _current_method.get()
+    started = time.perf_counter()
+    try:
+        yield rows
+    except Exception as e:
+        DB_QUERY_ERRORS.inc(method=method)
+        note_failed_query(e, method)
+        raise
+    finally:
+        DB_QUERY_DURATION.observe(time.perf_counter() - started, method=method)
+        if rows:
+            DB_ROWS.observe(rows[0], method=method)
+
+
+# --- Flask instrumentation -----------------------------------------------
+
+def instrument_app(app, registry: Registry = REGISTRY, path: str = '/metrics'):
+    """Time every request by route template and serve ``registry`` at ``path``"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    def _record(status: int):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        HTTP_IN_FLIGHT.dec()
+        # Route templates, not raw paths, keep label cardinality bounded
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - started,
+                                      route=route, method=request.method, status=str(status))
+
+    @app.after_request
+    def _stop_timer(response):
+        _record(response.status_code)
+        return response
+
+    @app.teardown_request
+    def _record_failure(error):
+        # Only reached without a response when the view raised
+        if error is not None:
+            _record(500)
+
+    def metrics_view():
+        return Response(registry.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+    app.add_url_rule(path, 'metrics', metrics_view)
+
+
+class ASGIMetrics:
+    """ASGI middleware timing HTTP requests like ``instrument_app`` does for Flask.
+
+    Streamed responses are timed to their first body chunk, matching the
+    Flask hook, which fires once the headers are ready.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        recorded = False
+        HTTP_IN_FLIGHT.inc()
+
+        def record(status: int):
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            HTTP_IN_FLIGHT.dec()
+            # Starlette's router leaves the matched route in the scope
+            matched = scope.get('route')
+            if matched is not None and hasattr(matched, 'routes'):
+                # A mounted app (Flask under the ASGI server) times its own requests
+                return
+            route = 'unmatched' if matched is None else matched.path
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started,
+                                          route=route, method=scope['method'], status=str(status))
+
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                record(status)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            record(status)
+
+
+def stats_collector(prefix: str, source: Callable[[], Dict[str, Any]],
+                    counters: Iterable[str] = (), labels: Optional[Dict[str, str]] = None
+                    ) -> Callable[[], List[Family]]:
+    """Expose the numeric fields of a ``stats()`` dict as ``<prefix>_<field>`` gauges.
+
+    Fields listed in ``counters`` are exported as ``<prefix>_<field>_total``
+    counters. Nested dicts and non-numeric fields are skipped.
+    """
+    counters = set(counters)
+    labels = labels or {}
+
+    def collect() -> List[Family]:
+        families = []
+        for field, value in source().items():
+            if isinstance(value, bool):
+                value = int(value)
+            if not isinstance(value, (int, float)):
+                continue
+            if field in counters:
+                families.append((f"{prefix}_{field}_total", 'counter', f"{prefix} {field}", [(labels, value)]))
+            else:
+                families.append((f"{prefix}_{field}", 'gauge', f"{prefix} {field}", [(labels, value)]))
+        return families
+    return collect
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the football database
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from bulk_writer import NATURAL_KEY_DDL
+from change_feed import CHANGE_FEED_DDL, CHANGE_ORIGIN_DDL, notify_triggers
+from seasons import SEASON_DDL
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers migrate one at a time
+MIGRATION_LOCK_KEY = 7243001
+
+# (version, name, statements). Applied versions are recorded in
+# schema_migrations; never edit a released migration, add a new one.
+MIGRATIONS: List[Tuple[int, str, Sequence[str]]] = [
+    (1, 'initial_tables', [
+        """
+        CREATE TABLE IF NOT EXISTS teams (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            nickname TEXT NOT NULL,
+            slug TEXT NOT NULL UNIQUE,
+            primary_color TEXT NOT NULL,
+            secondary_color TEXT NOT NULL,
+            logo TEXT,
+            stadium TEXT,
+            city TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS matches (
+            id SERIAL PRIMARY KEY,
+            home_team_id INTEGER NOT NULL,
+            away_team_id INTEGER NOT NULL,
+            home_score INTEGER,
+            away_score INTEGER,
+            status TEXT NOT NULL,
+            match_date TIMESTAMP NOT NULL,
+            venue TEXT,
+            minute INTEGER,
+            competition TEXT DEFAULT 'Liga MX'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS standings (
+            id SERIAL PRIMARY KEY,
+            team_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            matches_played INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            draws INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            goals_for INTEGER NOT NULL DEFAULT 0,
+            goals_against INTEGER NOT NULL DEFAULT 0,
+            goal_difference INTEGER NOT NULL DEFAULT 0,
+            points INTEGER NOT NULL DEFAULT 0,
+            season TEXT NOT NULL DEFAULT '2024-25'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS players (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            team_id INTEGER NOT NULL,
+            position TEXT,
+            goals INTEGER NOT NULL DEFAULT 0,
+            assists INTEGER NOT NULL DEFAULT 0,
+            appearances INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    (2, 'natural_keys', NATURAL_KEY_DDL),
+    (3, 'change_feed', CHANGE_FEED_DDL),
+    (4, 'foreign_keys', [
+        # Rows pointing at teams that no longer exist would block the constraints
+        "DELETE FROM matches m WHERE NOT EXISTS (SELECT 1 FROM teams t WHERE t.id = m.home_team_id) "
+        "OR NOT EXISTS (SELECT 1 FROM teams t WHERE t.id = m.away_team_id)",
+        "DELETE FROM standings s WHERE NOT EXISTS (SELECT 1 FROM teams t WHERE t.id = s.team_id)",
+        "DELETE FROM players p WHERE NOT EXISTS (SELECT 1 FROM teams t WHERE t.id = p.team_id)",
+    ] + [
+        statement
+        for table, column in (('matches', 'home_team_id'), ('matches', 'away_team_id'),
+                              ('standings', 'team_id'), ('players', 'team_id'))
+        for statement in (
+            f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_{column}_fkey",
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES teams (id) ON DELETE CASCADE",
+        )
+    ]),
+    (5, 'hot_query_indexes', [
+        # get_live_matches / get_upcoming_matches: small partial indexes that
+        # also hand back rows already in the requested order
+        "CREATE INDEX IF NOT EXISTS matches_live_idx ON matches (match_date DESC) WHERE status = 'live'",
+        "CREATE INDEX IF NOT EXISTS matches_upcoming_idx ON matches (match_date) WHERE status = 'upcoming'",
+        # get_matches ordering, and any date-bounded scan
+        "CREATE INDEX IF NOT EXISTS matches_match_date_idx ON matches (match_date DESC)",
+        # Per-team fixtures; the natural key already leads with home_team_id
+        "CREATE INDEX IF NOT EXISTS matches_home_team_idx ON matches (home_team_id, match_date DESC)",
+        "CREATE INDEX IF NOT EXISTS matches_away_team_idx ON matches (away_team_id, match_date DESC)",
+        "CREATE INDEX IF NOT EXISTS standings_season_position_idx ON standings (season, position)",
+        # Top-N scorers reads the first rows of this index and stops
+        "CREATE INDEX IF NOT EXISTS players_goals_idx ON players (goals DESC, id)",
+        "ANALYZE teams",
+        "ANALYZE matches",
+        "ANALYZE standings",
+        "ANALYZE players",
+    ]),
+    (6, 'keyset_indexes', [
+        # /api/matches pages on (match_date, id); id breaks ties between kick-offs
+        "CREATE INDEX IF NOT EXISTS matches_date_id_idx ON matches (match_date DESC, id DESC)",
+        "DROP INDEX IF EXISTS matches_match_date_idx",
+        "CREATE INDEX IF NOT EXISTS matches_home_team_date_id_idx ON matches (home_team_id, match_date DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS matches_away_team_date_id_idx ON matches (away_team_id, match_date DESC, id DESC)",
+        "DROP INDEX IF EXISTS matches_home_team_idx",
+        "DROP INDEX IF EXISTS matches_away_team_idx",
+    ]),
+    (7, 'scrape_jobs', [
+        # Last run of every scrape job, whichever worker ran it (scheduler.py)
+        """
+        CREATE TABLE IF NOT EXISTS scrape_jobs (
+            source TEXT PRIMARY KEY,
+            last_started_at TIMESTAMP,
+            last_finished_at TIMESTAMP,
+            last_duration DOUBLE PRECISION,
+            last_error TEXT,
+            last_rows INTEGER NOT NULL DEFAULT 0,
+            runs INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            worker TEXT
+        )
+        """,
+    ]),
+    (8, 'scrape_pages', [
+        # Validators and body hash of the last stored version of every scraped URL
+        """
+        CREATE TABLE IF NOT EXISTS scrape_pages (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            digest TEXT,
+            stored_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+    ]),
+    (9, 'team_aliases', [
+        # Curated spellings of team names for the scrape resolver (team_resolver.py)
+        """
+        CREATE TABLE IF NOT EXISTS team_aliases (
+            id SERIAL PRIMARY KEY,
+            alias TEXT NOT NULL,
+            team_id INTEGER NOT NULL REFERENCES teams (id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS team_aliases_natural_key ON team_aliases (alias)",
+        # Workers rebuild their resolver when an alias is added
+        *notify_triggers('team_aliases'),
+    ]),
+    (10, 'season_partitions', SEASON_DDL + [
+        # matches becomes a table partitioned by season (seasons.py): the
+        # rows move to a partition per season, the id sequence carries over
+        "ALTER TABLE matches RENAME TO matches_unpartitioned",
+        "ALTER SEQUENCE matches_id_seq OWNED BY NONE",
+        """
+        CREATE TABLE matches (
+            id INTEGER NOT NULL DEFAULT nextval('matches_id_seq'),
+            home_team_id INTEGER NOT NULL,
+            away_team_id INTEGER NOT NULL,
+            home_score INTEGER,
+            away_score INTEGER,
+            status TEXT NOT NULL,
+            match_date TIMESTAMP NOT NULL,
+            venue TEXT,
+            minute INTEGER,
+            competition TEXT DEFAULT 'Liga MX'
+        ) PARTITION BY RANGE (match_date)
+        """,
+        """
+        SELECT football_ensure_season(season) FROM (
+            SELECT football_season_of(match_date) AS season FROM matches_unpartitioned
+            UNION SELECT football_season_of(LOCALTIMESTAMP)
+        ) s
+        """,
+        """
+        INSERT INTO matches (id, home_team_id, away_team_id, home_score, away_score, status, match_date, venue,
+                             minute, competition)
+        SELECT id, home_team_id, away_team_id, home_score, away_score, status, match_date, venue,
+               minute, competition
+        FROM matches_unpartitioned
+        """,
+        "DROP TABLE matches_unpartitioned",
+        "ALTER SEQUENCE matches_id_seq OWNED BY matches.id",
+        # Unique indexes on a partitioned table must include the partition key
+        "ALTER TABLE matches ADD PRIMARY KEY (id, match_date)",
+        "CREATE UNIQUE INDEX matches_natural_key ON matches (home_team_id, away_team_id, match_date)",
+        *[
+            f"ALTER TABLE matches ADD CONSTRAINT matches_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES teams (id) ON DELETE CASCADE"
+            for column in ('home_team_id', 'away_team_id')
+        ],
+        "CREATE INDEX matches_live_idx ON matches (match_date DESC) WHERE status = 'live'",
+        "CREATE INDEX matches_upcoming_idx ON matches (match_date) WHERE status = 'upcoming'",
+        "CREATE INDEX matches_date_id_idx ON matches (match_date DESC, id DESC)",
+        "CREATE INDEX matches_home_team_date_id_idx ON matches (home_team_id, match_date DESC, id DESC)",
+        "CREATE INDEX matches_away_team_date_id_idx ON matches (away_team_id, match_date DESC, id DESC)",
+        *notify_triggers('matches'),
+        # Players get a season like standings; both default to the one being played
+        "ALTER TABLE players ADD COLUMN IF NOT EXISTS season TEXT NOT NULL "
+        "DEFAULT football_season_of(LOCALTIMESTAMP)",
+        "ALTER TABLE standings ALTER COLUMN season SET DEFAULT football_season_of(LOCALTIMESTAMP)",
+        "DROP INDEX IF EXISTS players_natural_key",
+        "CREATE UNIQUE INDEX players_natural_key ON players (team_id, name, season)",
+        "CREATE INDEX IF NOT EXISTS players_season_goals_idx ON players (season, goals DESC, id)",
+        "ANALYZE matches",
+        "ANALYZE players",
+    ]),
+    (11, 'change_origin', CHANGE_ORIGIN_DDL),
+]
+
+
+def _ensure_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+
+
+def applied_versions(conn) -> List[int]:
+    """Versions already recorded in schema_migrations"""
+    with conn.cursor() as cur:
+        _ensure_table(cur)
+        cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+        rows = cur.fetchall()
+    conn.commit()
+    return [row['version'] if isinstance(row, dict) else row[0] for row in rows]
+
+
+def migrate(conn, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: all); returns the versions applied.
+
+    Each migration runs in its own transaction together with its
+    schema_migrations row, under an advisory lock so that several workers
+    starting at once apply it exactly once. Statements are idempotent, so a
+    database created by the old inline ``CREATE TABLE IF NOT EXISTS`` calls
+    is adopted as-is.
+    """
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+            _ensure_table(cur)
+            cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+            if cur.fetchone():
+                conn.commit()
+                continue
+            try:
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        applied.append(version)
+        print(f"✅ Applied migration {version:03d}_{name}")
+    return applied
+
+
+def main():
+    """Apply pending schema migrations"""
+    import argparse
+    from populate_db import get_db_connection
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--status', action='store_true', help='list migrations and whether they are applied')
+    parser.add_argument('--target', type=int, help='stop after this version')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        if args.status:
+            done = set(applied_versions(conn))
+            for version, name, _ in MIGRATIONS:
+                print(f"  {'✅' if version in done else '⏳'} {version:03d}_{name}")
+            return
+        applied = migrate(conn, args.target)
+        if not applied:
+            print("✅ Schema is up to date")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
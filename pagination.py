@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Keyset pagination helpers: opaque cursors and query-string filter parsing
+"""
+
+import json
+import base64
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from seasons import season_bounds
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+MATCH_STATUSES = ('live', 'upcoming', 'finished')
+
+
+class InvalidParameter(ValueError):
+    """A pagination or filter argument could not be parsed; maps to a 400"""
+
+
+def encode_cursor(match_date: datetime, row_id: int) -> str:
+    """Opaque token for the position just after (match_date, id)"""
+    raw = json.dumps([match_date.isoformat(), row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        match_date, row_id = json.loads(raw)
+        return datetime.fromisoformat(match_date), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidParameter(f"invalid cursor: {token!r}") from e
+
+
+def encode_rank_cursor(score: float, row_id: int) -> str:
+    """Opaque token for the position just after (score, id) on a leaderboard"""
+    raw = json.dumps([score, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_rank_cursor(token: str) -> Tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        score, row_id = json.loads(raw)
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            raise TypeError(f"score {score!r}")
+        return score, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidParameter(f"invalid cursor: {token!r}") from e
+
+
+def page_of(rows: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """Response body for a page fetched with ``limit + 1`` rows; the extra row only signals a next page"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['match_date'], rows[-1]['id'])
+    return {"data": rows, "next_cursor": next_cursor}
+
+
+def _parse_date(value: str, name: str, end_of_day: bool = False) -> datetime:
+    try:
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            # A bare end date includes the whole day
+            return datetime.combine(day, datetime.min.time()) + (timedelta(days=1) if end_of_day else timedelta())
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise InvalidParameter(f"invalid {name} date: {value!r}") from e
+
+
+def season_filter(args: Mapping[str, str]) -> Optional[str]:
+    """The ?season= argument, checked; None when absent"""
+    season = args.get('season') or None
+    if season is not None:
+        try:
+            season_bounds(season)
+        except ValueError as e:
+            raise InvalidParameter(str(e)) from e
+    return season
+
+
+def limit_filter(args: Mapping[str, str], default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT,
+                 name: str = 'limit') -> int:
+    """A positive ?limit= (or ``name``) argument, capped at ``maximum``"""
+    try:
+        limit = int(args.get(name, default))
+    except ValueError as e:
+        raise InvalidParameter(f"invalid {name}: {args.get(name)!r}") from e
+    if limit < 1:
+        raise InvalidParameter(f"{name} must be positive")
+    return min(limit, maximum)
+
+
+def order_filter(args: Mapping[str, str]) -> str:
+    order = args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise InvalidParameter("order must be 'asc' or 'desc'")
+    return order
+
+
+def status_filter(args: Mapping[str, str]) -> Optional[Tuple[str, ...]]:
+    """The ?status= argument as a sorted tuple of known statuses; None when absent"""
+    if not args.get('status'):
+        return None
+    statuses = tuple(sorted({s.strip() for s in args['status'].split(',') if s.strip()}))
+    unknown = [s for s in statuses if s not in MATCH_STATUSES]
+    if unknown:
+        raise InvalidParameter(f"unknown status {', '.join(unknown)}; expected {', '.join(MATCH_STATUSES)}")
+    return statuses
+
+
+def match_filters(args: Mapping[str, str]) -> Dict[str, Any]:
+    """Parse /api/matches query arguments into keyword arguments for get_matches_page"""
+    limit = limit_filter(args)
+    order = order_filter(args)
+    statuses = status_filter(args)
+
+    date_from = _parse_date(args['from'], 'from') if args.get('from') else None
+    date_to = _parse_date(args['to'], 'to', end_of_day=True) if args.get('to') else None
+    season = season_filter(args)
+    if season:
+        # A season is a date range, which is what the partitions are pruned on
+        starts, ends = season_bounds(season)
+        date_from = max(date_from, starts) if date_from else starts
+        date_to = min(date_to, ends) if date_to else ends
+
+    return {
+        'team': args.get('team') or None,
+        'statuses': statuses,
+        'competition': args.get('competition') or None,
+        'date_from': date_from,
+        'date_to': date_to,
+        'cursor': decode_cursor(args['cursor']) if args.get('cursor') else None,
+        'limit': limit,
+        'order': order,
+    }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+HTML extraction for scraper sources: an lxml fast path over just the part
+of a page that holds the data, with BeautifulSoup as the fallback
+"""
+
+import re
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from lxml import etree
+except ImportError:  # every source still parses through BeautifulSoup
+    etree = None
+
+# Whether the lxml fast path can run at all
+available = etree is not None
+
+
+class ExtractionFailed(Exception):
+    """The fast path found nothing to extract; the caller falls back"""
+
+
+def has_class(name: str) -> str:
+    """XPath predicate: the element's class attribute contains ``name`` as a word"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def xpath(expression: str) -> Optional[Callable]:
+    """Compile an XPath once, at import; None without lxml"""
+    return etree.XPath(expression) if available else None
+
+
+def text(element) -> str:
+    """Text of an element like BeautifulSoup's get_text(strip=True); '' for None"""
+    if element is None:
+        return ''
+    return ''.join(part.strip() for part in element.itertext())
+
+
+def classes(element) -> list:
+    return (element.get('class') or '').split()
+
+
+def by_class(element, tag: Optional[str] = None) -> Dict[str, Any]:
+    """First descendant (of ``tag``, if given) carrying each class, in document order.
+
+    One pass over a row answers every ``row.select_one('.cls')`` the
+    BeautifulSoup parsers ask for.
+    """
+    found: Dict[str, Any] = {}
+    for child in element.iterdescendants(tag) if tag else element.iterdescendants():
+        for name in classes(child):
+            found.setdefault(name, child)
+    return found
+
+
+def first_link(element) -> Optional[Any]:
+    if element is None:
+        return None
+    return next(element.iterdescendants('a'), None)
+
+
+class Subtree:
+    """Finds one element by tag and class in raw HTML and parses only that element.
+
+    A regex finds its start tag, so the markup before it (on these sites
+    mostly inline scripts) is never tokenized; an incremental parser reads
+    from there in ``chunk_size`` pieces and stops at the element's end tag.
+    """
+
+    def __init__(self, tag: str, cls: str, chunk_size: int = 8192):
+        self.tag = tag
+        self.cls = cls
+        self.chunk_size = chunk_size
+        self._start = re.compile(
+            rf'<{tag}\b[^>]*\bclass\s*=\s*["\'][^"\']*(?<![\w-]){re.escape(cls)}(?![\w-])', re.IGNORECASE)
+
+    def find(self, body: str):
+        match = self._start.search(body)
+        if match is None:
+            raise ExtractionFailed(f"no <{self.tag} class=\"{self.cls}\">")
+
+        parser = etree.HTMLPullParser(events=('start', 'end'), tag=self.tag)
+        root = None
+        for offset in range(match.start(), len(body), self.chunk_size):
+            parser.feed(body[offset:offset + self.chunk_size])
+            for event, element in parser.read_events():
+                if root is None:
+                    root = element
+                elif event == 'end' and element is root:
+                    return root
+        # Unclosed at the end of the page: take what the parser recovered
+        parser.close()
+        if root is None:
+            raise ExtractionFailed(f"<{self.tag} class=\"{self.cls}\"> did not parse")
+        return root
+
+
+class Extractor:
+    """The fast path for one page kind: which subtree to parse, and the method that reads it"""
+
+    def __init__(self, kind: str, subtree: Subtree, method: Callable):
+        self.kind = kind
+        self.subtree = subtree
+        self.method = method
+
+    def run(self, source, body: str):
+        return self.method(source, self.subtree.find(body))
+
+
+def extractor(kind: str, tag: str, cls: str) -> Callable[[Callable], Callable]:
+    """Register a Source method as the lxml extractor for ``kind`` pages.
+
+    The method receives the parsed ``<tag class="cls">`` element and returns
+    the same ScrapedData as the source's BeautifulSoup parser.
+    """
+    def register(method: Callable) -> Callable:
+        method.extractor = Extractor(kind, Subtree(tag, cls), method)
+        return method
+    return register
+
+
+def extractors_of(cls: type) -> Dict[str, Extractor]:
+    """kind -> Extractor for the @extractor methods of a class and its bases"""
+    found: Dict[str, Extractor] = {}
+    for klass in reversed(cls.__mro__):
+        for value in vars(klass).values():
+            registered = getattr(value, 'extractor', None)
+            if isinstance(registered, Extractor):
+                found[registered.kind] = registered
+    return found
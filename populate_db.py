@@ -7,6 +7,9 @@ import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
+from bulk_writer import bulk_upsert, summarize, team_ids
+from seasons import current_season
+from standings_engine import load_engine
 
 load_dotenv()
 
@@ -202,57 +205,32 @@ def populate_teams(conn):
         }
     ]
 
-    with conn.cursor() as cur:
-        # Clear existing teams
-        cur.execute("DELETE FROM teams")
-        
-        # Insert teams
-        for team in teams_data:
-            cur.execute("""
-                INSERT INTO teams (name, nickname, slug, primary_color, secondary_color, logo, stadium, city)
-                VALUES (%(name)s, %(nickname)s, %(slug)s, %(primary_color)s, %(secondary_color)s, %(logo)s, %(stadium)s, %(city)s)
-            """, team)
-        
-        conn.commit()
-        print(f"✅ Inserted {len(teams_data)} teams")
+    # Upsert by slug so team ids stay stable across runs
+    counts = bulk_upsert(conn, 'teams', teams_data, prune=True)
+    print(f"✅ Upserted {len(teams_data)} teams ({summarize(counts)})")
+
+# Spellings the sources use: resolved exactly instead of by a fuzzy search,
+# or (UNAM) not resolved at all without an alias
+TEAM_ALIASES = {
+    "UNAM": "pumas",
+    "Pumas UNAM": "pumas",
+    "Atl. San Luis": "atletico-san-luis",
+    "Guadalajara Chivas": "chivas",
+}
+
+def populate_team_aliases(conn):
+    """Add the curated team aliases; aliases added by hand are kept"""
+    ids = team_ids(conn)
+    aliases = [{"alias": alias, "team_id": ids[slug]} for alias, slug in TEAM_ALIASES.items() if slug in ids]
+    counts = bulk_upsert(conn, 'team_aliases', aliases)
+    print(f"✅ Upserted {len(aliases)} team aliases ({summarize(counts)})")
 
 def populate_standings(conn):
-    """Populate standings with sample data"""
-    with conn.cursor() as cur:
-        # Get team IDs
-        cur.execute("SELECT id, name FROM teams ORDER BY name")
-        teams = cur.fetchall()
-        
-        # Clear existing standings
-        cur.execute("DELETE FROM standings")
-        
-        # Create sample standings
-        for i, team in enumerate(teams):
-            standing_data = {
-                "team_id": team['id'],
-                "position": i + 1,
-                "matches_played": 17,
-                "wins": max(17 - i - 3, 2),
-                "draws": min(i + 2, 8),
-                "losses": max(i - 2, 0),
-                "goals_for": max(30 - i, 10),
-                "goals_against": min(15 + i, 40),
-                "points": max(51 - (i * 3), 15),
-                "season": "2024-25"
-            }
-            
-            # Calculate goal difference
-            standing_data["goal_difference"] = standing_data["goals_for"] - standing_data["goals_against"]
-            
-            cur.execute("""
-                INSERT INTO standings (team_id, position, matches_played, wins, draws, losses, 
-                                     goals_for, goals_against, goal_difference, points, season)
-                VALUES (%(team_id)s, %(position)s, %(matches_played)s, %(wins)s, %(draws)s, %(losses)s,
-                        %(goals_for)s, %(goals_against)s, %(goal_difference)s, %(points)s, %(season)s)
-            """, standing_data)
-        
-        conn.commit()
-        print(f"✅ Inserted {len(teams)} standings")
+    """Derive the current season's standings from its finished matches"""
+    standings = load_engine(conn).table()
+    
+    counts = bulk_upsert(conn, 'standings', standings, prune=True)
+    print(f"✅ Upserted {len(standings)} standings ({summarize(counts)})")
 
 def populate_players(conn):
     """Populate players with sample data"""
@@ -260,51 +238,45 @@ def populate_players(conn):
         # Get team IDs
         cur.execute("SELECT id, name FROM teams")
         teams = cur.fetchall()
+    
+    # Sample player names and positions
+    player_names = [
+        "Roberto Alvarado", "Henry Martín", "Diego Valdés", "Jonathan Rodríguez",
+        "Alexis Vega", "Alan Pulido", "Fernando Gorriarán", "Sebastián Córdova",
+        "André-Pierre Gignac", "Florian Thauvin", "Jesús Angulo", "Maximiliano Meza",
+        "Diego Lainez", "Julián Quiñones", "Luis Quiñones", "Nicolás López",
+        "Germán Berterame", "Rogelio Funes Mori", "Santiago Giménez", "Carlos Vela",
+        "Raúl Jiménez", "Diego Reyes", "Héctor Moreno", "César Montes",
+        "Igor Lichnovsky", "Johan Vásquez", "Luis Romo", "Edson Álvarez"
+    ]
+    
+    positions = ["Delantero", "Mediocampista", "Defensa", "Portero"]
+    season = current_season()
+    
+    players = []
+    for team in teams:
+        # Add 12-15 players per team
+        num_players = min(15, len(player_names) - len(players))
+        for i in range(num_players):
+            if len(players) >= len(player_names):
+                break
+            
+            player_count = len(players)
+            players.append({
+                "name": player_names[player_count],
+                "team_id": team['id'],
+                "position": positions[player_count % len(positions)],
+                "goals": max(0, 20 - (player_count % 25)),
+                "assists": max(0, 15 - (player_count % 20)),
+                "appearances": min(17, 15 + (player_count % 3)),
+                "season": season
+            })
         
-        # Clear existing players
-        cur.execute("DELETE FROM players")
-        
-        # Sample player names and positions
-        player_names = [
-            "Roberto Alvarado", "Henry Martín", "Diego Valdés", "Jonathan Rodríguez",
-            "Alexis Vega", "Alan Pulido", "Fernando Gorriarán", "Sebastián Córdova",
-            "André-Pierre Gignac", "Florian Thauvin", "Jesús Angulo", "Maximiliano Meza",
-            "Diego Lainez", "Julián Quiñones", "Luis Quiñones", "Nicolás López",
-            "Germán Berterame", "Rogelio Funes Mori", "Santiago Giménez", "Carlos Vela",
-            "Raúl Jiménez", "Diego Reyes", "Héctor Moreno", "César Montes",
-            "Igor Lichnovsky", "Johan Vásquez", "Luis Romo", "Edson Álvarez"
-        ]
-        
-        positions = ["Delantero", "Mediocampista", "Defensa", "Portero"]
-        
-        player_count = 0
-        for team in teams:
-            # Add 12-15 players per team
-            num_players = min(15, len(player_names) - player_count)
-            for i in range(num_players):
-                if player_count >= len(player_names):
-                    break
-                    
-                player_data = {
-                    "name": player_names[player_count],
-                    "team_id": team['id'],
-                    "position": positions[player_count % len(positions)],
-                    "goals": max(0, 20 - (player_count % 25)),
-                    "assists": max(0, 15 - (player_count % 20)),
-                    "appearances": min(17, 15 + (player_count % 3))
-                }
-                
-                cur.execute("""
-                    INSERT INTO players (name, team_id, position, goals, assists, appearances)
-                    VALUES (%(name)s, %(team_id)s, %(position)s, %(goals)s, %(assists)s, %(appearances)s)
-                """, player_data)
-                
-                player_count += 1
-                if player_count >= len(player_names):
-                    break
-        
-        conn.commit()
-        print(f"✅ Inserted {player_count} players")
+        if len(players) >= len(player_names):
+            break
+    
+    counts = bulk_upsert(conn, 'players', players, prune=True)
+    print(f"✅ Upserted {len(players)} players ({summarize(counts)})")
 
 def populate_matches(conn):
     """Populate matches with sample data"""
@@ -315,61 +287,49 @@ def populate_matches(conn):
         # Get team IDs
         cur.execute("SELECT id FROM teams")
         team_ids = [row['id'] for row in cur.fetchall()]
+    
+    # Create sample matches
+    base_date = datetime.now() - timedelta(days=30)
+    
+    matches = []
+    for i in range(50):  # Create 50 sample matches
+        home_team = random.choice(team_ids)
+        away_team = random.choice([t for t in team_ids if t != home_team])
         
-        # Clear existing matches
-        cur.execute("DELETE FROM matches")
-        
-        # Create sample matches
-        base_date = datetime.now() - timedelta(days=30)
+        # Random match date within last 30 days or next 30 days
+        match_date = base_date + timedelta(days=random.randint(-30, 30))
         
-        matches_created = 0
-        for i in range(50):  # Create 50 sample matches
-            home_team = random.choice(team_ids)
-            away_team = random.choice([t for t in team_ids if t != home_team])
-            
-            # Random match date within last 30 days or next 30 days
-            match_date = base_date + timedelta(days=random.randint(-30, 30))
-            
-            # Determine status based on date
-            if match_date < datetime.now() - timedelta(days=1):
-                status = "finished"
-                home_score = random.randint(0, 4)
-                away_score = random.randint(0, 4)
-                minute = None
-            elif match_date < datetime.now() + timedelta(hours=2):
-                status = "live" if random.random() < 0.1 else "finished"  # 10% chance of live
-                home_score = random.randint(0, 3) if status == "live" else random.randint(0, 4)
-                away_score = random.randint(0, 3) if status == "live" else random.randint(0, 4)
-                minute = random.randint(1, 90) if status == "live" else None
-            else:
-                status = "upcoming"
-                home_score = None
-                away_score = None
-                minute = None
-            
-            match_data = {
-                "home_team_id": home_team,
-                "away_team_id": away_team,
-                "home_score": home_score,
-                "away_score": away_score,
-                "status": status,
-                "match_date": match_date,
-                "venue": "Estadio",
-                "minute": minute,
-                "competition": "Liga MX"
-            }
-            
-            cur.execute("""
-                INSERT INTO matches (home_team_id, away_team_id, home_score, away_score, 
-                                   status, match_date, venue, minute, competition)
-                VALUES (%(home_team_id)s, %(away_team_id)s, %(home_score)s, %(away_score)s,
-                        %(status)s, %(match_date)s, %(venue)s, %(minute)s, %(competition)s)
-            """, match_data)
-            
-            matches_created += 1
+        # Determine status based on date
+        if match_date < datetime.now() - timedelta(days=1):
+            status = "finished"
+            home_score = random.randint(0, 4)
+            away_score = random.randint(0, 4)
+            minute = None
+        elif match_date < datetime.now() + timedelta(hours=2):
+            status = "live" if random.random() < 0.1 else "finished"  # 10% chance of live
+            home_score = random.randint(0, 3) if status == "live" else random.randint(0, 4)
+            away_score = random.randint(0, 3) if status == "live" else random.randint(0, 4)
+            minute = random.randint(1, 90) if status == "live" else None
+        else:
+            status = "upcoming"
+            home_score = None
+            away_score = None
+            minute = None
         
-        conn.commit()
-        print(f"✅ Inserted {matches_created} matches")
+        matches.append({
+            "home_team_id": home_team,
+            "away_team_id": away_team,
+            "home_score": home_score,
+            "away_score": away_score,
+            "status": status,
+            "match_date": match_date,
+            "venue": "Estadio",
+            "minute": minute,
+            "competition": "Liga MX"
+        })
+    
+    counts = bulk_upsert(conn, 'matches', matches, prune=True)
+    print(f"✅ Upserted {len(matches)} matches ({summarize(counts)})")
 
 def main():
     """Main function to populate database"""
@@ -379,12 +339,20 @@ def main():
         
         print("📊 Populating Liga MX data...")
         
-        populate_teams(conn)
-        populate_standings(conn)
-        populate_players(conn)
-        populate_matches(conn)
+        # One transaction: readers keep seeing the previous data until commit
+        try:
+            populate_teams(conn)
+            populate_team_aliases(conn)
+            populate_players(conn)
+            populate_matches(conn)
+            populate_standings(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        conn.close()
         print("✅ Database populated successfully!")
         
     except Exception as e:
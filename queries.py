@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+SQL behind the read API, shared by the psycopg2 and asyncpg storage backends
+"""
+
+import re
+import json
+import itertools
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+# No query here joins teams: rows carry team ids only and the storage
+# attaches names and colours from its in-memory TeamMap (team_map.py)
+
+TEAMS = "SELECT * FROM teams ORDER BY name"
+
+TEAM_ALIASES = "SELECT alias, team_id FROM team_aliases ORDER BY alias"
+
+# Live and upcoming matches are bounded below by the start of the current
+# season (seasons.py), so earlier seasons' partitions are never read
+LIVE_MATCHES = """
+    SELECT m.* FROM matches m
+    WHERE m.status = 'live' AND m.match_date >= %s
+    ORDER BY m.match_date DESC
+    """
+
+UPCOMING_MATCHES = """
+    SELECT m.* FROM matches m
+    WHERE m.status = 'upcoming' AND m.match_date >= %s
+    ORDER BY m.match_date ASC
+    """
+
+STANDINGS = """
+    SELECT s.* FROM standings s
+    WHERE s.season = %s
+    ORDER BY s.position ASC
+    """
+
+# What the in-memory leaderboards are loaded from, in leaderboards.PLAYER_COLUMNS order
+LEADERBOARD_ROWS = """
+    SELECT id, name, team_id, position, goals, assists, appearances, season
+    FROM players
+    """
+
+PLAYERS_BY_ID = "SELECT p.* FROM players p WHERE p.id = ANY(%s)"
+
+PLAYERS_EXPORT = """
+    SELECT p.* FROM players p
+    ORDER BY p.goals DESC, p.id
+    """
+
+# Both legs of a pairing, each an index range scan on matches_natural_key
+HEAD_TO_HEAD = """
+    SELECT m.* FROM (
+        (SELECT m.* FROM matches m WHERE m.home_team_id = %s AND m.away_team_id = %s)
+        UNION ALL
+        (SELECT m.* FROM matches m WHERE m.home_team_id = %s AND m.away_team_id = %s)
+    ) m
+    ORDER BY m.match_date DESC, m.id DESC
+    """
+
+# What the in-memory match store is loaded from, in match_store.STORE_COLUMNS order
+MATCH_STORE_ROWS = """
+    SELECT id, home_team_id, away_team_id, home_score, away_score, status, match_date, venue, minute, competition
+    FROM matches
+    """
+
+MATCHES_BY_ID = "SELECT m.* FROM matches m WHERE m.id = ANY(%s)"
+
+SCRAPE_JOBS = "SELECT * FROM scrape_jobs ORDER BY source"
+
+SEASONS = "SELECT season, starts_at, ends_at, archived_at FROM seasons ORDER BY season DESC"
+
+
+def matches_query(team_id, statuses, competition, date_from, date_to, cursor, order,
+                  limit: Optional[int]) -> Tuple[str, tuple]:
+    """SQL for matches (of team ``team_id``, if given) in (match_date, id) order, optionally capped"""
+    direction = 'DESC' if order == 'desc' else 'ASC'
+    order_by = f"m.match_date {direction}, m.id {direction}"
+    limit_clause = "LIMIT %s" if limit is not None else ""
+    limit_params = [limit] if limit is not None else []
+
+    conditions, params = [], []
+    if statuses:
+        conditions.append("m.status = ANY(%s)")
+        params.append(list(statuses))
+    if competition:
+        conditions.append("m.competition = %s")
+        params.append(competition)
+    if date_from:
+        conditions.append("m.match_date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("m.match_date < %s")
+        params.append(date_to)
+    if cursor:
+        conditions.append(f"(m.match_date, m.id) {'<' if order == 'desc' else '>'} (%s, %s)")
+        params.extend(cursor)
+
+    if team_id is None:
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return f"""
+    SELECT m.* FROM matches m {where}
+    ORDER BY {order_by}
+    {limit_clause}
+    """, tuple(params + limit_params)
+
+    # Two index range scans (home, away) merged, rather than an OR the
+    # planner can only answer by scanning every fixture of the team
+    branches, query_params = [], []
+    for column in ('home_team_id', 'away_team_id'):
+        where = ' AND '.join([f"m.{column} = %s"] + conditions)
+        branches.append(f"(SELECT m.* FROM matches m WHERE {where} ORDER BY {order_by} {limit_clause})")
+        query_params += [team_id, *params, *limit_params]
+    return f"""
+    SELECT m.* FROM ({' UNION ALL '.join(branches)}) m
+    ORDER BY {order_by}
+    {limit_clause}
+    """, tuple(query_params + limit_params)
+
+
+def team_overview_query(team_id: int, season: str, results: int, fixtures: int,
+                        scorers: int) -> Tuple[str, tuple]:
+    """Everything a team page shows, in one statement: see overview_sections().
+
+    One row per match (the latest ``results`` finished, then the next
+    ``fixtures`` upcoming) tagged with its section. The team's standing and
+    its top ``scorers`` ride along on every row as JSON, and the outer join
+    keeps a single all-NULL match row when the team has no matches at all.
+    """
+    results_sql, results_params = matches_query(team_id, ('finished',), None, None, None, None, 'desc', results)
+    fixtures_sql, fixtures_params = matches_query(team_id, ('upcoming',), None, None, None, None, 'asc', fixtures)
+    return f"""
+    SELECT t.standing, t.scorers, m.*
+    FROM (
+        SELECT
+            (SELECT row_to_json(s) FROM standings s WHERE s.team_id = %s AND s.season = %s) AS standing,
+            (SELECT coalesce(json_agg(p ORDER BY p.goals DESC, p.id), '[]')
+             FROM (SELECT p.* FROM players p WHERE p.team_id = %s AND p.season = %s
+                   ORDER BY p.goals DESC, p.id LIMIT %s) p) AS scorers
+    ) t
+    LEFT JOIN (
+        (SELECT 'results' AS section, r.* FROM ({results_sql}) r)
+        UNION ALL
+        (SELECT 'fixtures' AS section, f.* FROM ({fixtures_sql}) f)
+    ) m ON true
+    """, (team_id, season, team_id, season, scorers, *results_params, *fixtures_params)
+
+
+def _json(value):
+    # psycopg2 decodes json columns; asyncpg hands them over as text
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def overview_sections(rows: List[Dict]) -> Tuple[Optional[Dict], List[Dict], List[Dict], List[Dict]]:
+    """(standing, top scorers, results newest first, fixtures soonest first) from team_overview_query rows"""
+    if not rows:
+        return None, [], [], []
+    standing, scorers = _json(rows[0]['standing']), _json(rows[0]['scorers'])
+    sections: Dict[str, List[Dict]] = {'results': [], 'fixtures': []}
+    for row in rows:
+        section = row.pop('section')
+        del row['standing'], row['scorers']
+        if section is not None:
+            sections[section].append(row)
+    # UNION ALL promises no order of its own
+    sections['results'].sort(key=itemgetter('match_date', 'id'), reverse=True)
+    sections['fixtures'].sort(key=itemgetter('match_date', 'id'))
+    return standing, scorers, sections['results'], sections['fixtures']
+
+
+_PYFORMAT = re.compile(r'%s')
+
+
+def numbered(query: str) -> str:
+    """Rewrite psycopg2 ``%s`` placeholders as the ``$1, $2, ...`` asyncpg expects"""
+    counter = itertools.count(1)
+    return _PYFORMAT.sub(lambda _: f"${next(counter)}", query)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Versioned in-process read cache for FootballDataStorage queries
+"""
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from metrics import note_failed_query
+
+
+# namespace -> (ttl seconds, tables the cached query reads from)
+DEFAULT_NAMESPACES: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "teams": (300.0, ("teams",)),
+    "team_by_slug": (300.0, ("teams",)),
+    "matches": (30.0, ("matches", "teams")),
+    "live_matches": (5.0, ("matches", "teams")),
+    "upcoming_matches": (30.0, ("matches", "teams")),
+    "standings": (30.0, ("standings", "teams")),
+    # Only the /api/players/top-scorers response bodies; the rows come from the leaderboards
+    "top_scorers": (60.0, ("players", "teams")),
+    "leaderboards": (60.0, ("players", "teams")),
+    # Only cached here when the match store is off
+    "team_fixtures": (30.0, ("matches", "teams")),
+    "team_form": (30.0, ("matches", "teams")),
+    "head_to_head": (30.0, ("matches", "teams")),
+    "team_overview": (30.0, ("matches", "standings", "players", "teams")),
+    # New seasons appear with the first matches written into them
+    "seasons": (300.0, ("seasons", "matches")),
+    # Rebuilt when either table changes; the TTLs are only a safety net
+    "team_map": (3600.0, ("teams",)),
+    "team_resolver": (3600.0, ("teams", "team_aliases")),
+    # The asyncio storage's leaderboards; the synchronous storage updates its own in place
+    "player_boards": (3600.0, ("players",)),
+}
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "versions")
+
+    def __init__(self, value: Any, expires_at: float, versions: Tuple[int, ...]):
+        self.value = value
+        self.expires_at = expires_at
+        self.versions = versions
+
+
+class _Flight:
+    """A load in progress that concurrent callers for the same key wait on"""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class QueryCache:
+    """TTL + LRU cache keyed by (namespace, args) with per-table data versions.
+
+    Every table has a monotonically increasing version. ``invalidate(table)``
+    bumps it and drops every namespace that reads from that table, so writers
+    never have to know which cached queries exist. Concurrent misses on the
+    same key share a single load. Cached values are shared between callers
+    and must be treated as read-only.
+    """
+
+    def __init__(self, namespaces: Optional[Dict[str, Tuple[float, Tuple[str, ...]]]] = None,
+                 max_entries: int = 128):
+        self.namespaces = dict(namespaces or DEFAULT_NAMESPACES)
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, "OrderedDict[Hashable, _Entry]"] = {
+            name: OrderedDict() for name in self.namespaces
+        }
+        self._inflight: Dict[Tuple[str, Hashable], _Flight] = {}
+        # Loads by coroutines wait on futures of their own event loop
+        self._async_inflight: Dict[Tuple[str, Hashable], "asyncio.Future[Any]"] = {}
+        self._versions: Dict[str, int] = {}
+
+        self._hits = {name: 0 for name in self.namespaces}
+        self._misses = {name: 0 for name in self.namespaces}
+        self._coalesced = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get_or_load(self, namespace: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key`` or call ``loader`` and cache its result.
+
+        Exceptions raised by ``loader`` propagate and are never cached.
+        """
+        tables = self.tables_for(namespace)
+        flight_key = (namespace, key)
+
+        with self._lock:
+            versions = self._versions_locked(tables)
+            found, value = self._cached_locked(namespace, key, versions)
+            if found:
+                return value
+
+            flight = self._inflight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[flight_key] = _Flight()
+                self._misses[namespace] += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                # The leader's timed_query saw the failure in its own context, not this caller's
+                note_failed_query(flight.error)
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+            self._store(namespace, key, value, versions)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(flight_key, None)
+            flight.done.set()
+
+    async def get_or_load_async(self, namespace: str, key: Hashable,
+                                loader: Callable[[], Awaitable[Any]]) -> Any:
+        """``get_or_load`` for coroutines: concurrent misses await one ``loader()``.
+
+        Shares entries, versions and counters with the synchronous path; only
+        the in-flight bookkeeping is separate, so waiting never blocks the
+        event loop.
+        """
+        tables = self.tables_for(namespace)
+        flight_key = (namespace, key)
+
+        with self._lock:
+            versions = self._versions_locked(tables)
+            found, value = self._cached_locked(namespace, key, versions)
+            if found:
+                return value
+
+            flight = self._async_inflight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._async_inflight[flight_key] = asyncio.get_running_loop().create_future()
+                self._misses[namespace] += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            try:
+                # shield: a cancelled waiter must not cancel the shared load
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+            except Exception as e:
+                note_failed_query(e)
+                raise
+            # The leader itself was cancelled; load again
+            return await self.get_or_load_async(namespace, key, loader)
+
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Waiters re-raise it; don't warn when there were none
+            flight.exception()
+            raise
+        else:
+            flight.set_result(value)
+            self._store(namespace, key, value, versions)
+            return value
+        finally:
+            with self._lock:
+                self._async_inflight.pop(flight_key, None)
+
+    def _cached_locked(self, namespace: str, key: Hashable, versions: Tuple[int, ...]) -> Tuple[bool, Any]:
+        entries = self._entries[namespace]
+        entry = entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic() and entry.versions == versions:
+                entries.move_to_end(key)
+                self._hits[namespace] += 1
+                return True, entry.value
+            del entries[key]
+        return False, None
+
+    def _store(self, namespace: str, key: Hashable, value: Any, versions: Tuple[int, ...]):
+        ttl, tables = self.namespaces[namespace]
+        entries = self._entries[namespace]
+        with self._lock:
+            # Drop the result if a writer invalidated these tables mid-load
+            if self._versions_locked(tables) == versions:
+                entries[key] = _Entry(value, time.monotonic() + ttl, versions)
+                entries.move_to_end(key)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+                    self._evictions += 1
+
+    def invalidate(self, *tables: str):
+        """Bump the version of ``tables`` and drop every cached query reading them.
+
+        With no arguments the whole cache is cleared.
+        """
+        with self._lock:
+            self._invalidations += 1
+            targets = tables or tuple({t for _, deps in self.namespaces.values() for t in deps})
+            for table in targets:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            for name, (_, deps) in self.namespaces.items():
+                if not tables or any(t in deps for t in tables):
+                    self._entries[name].clear()
+
+    def version(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Current data version of ``tables``; changes whenever one is invalidated"""
+        with self._lock:
+            return self._versions_locked(tuple(tables))
+
+    def tables_for(self, namespace: str) -> Tuple[str, ...]:
+        return self.namespaces[namespace][1]
+
+    def ttl_for(self, namespace: str) -> float:
+        return self.namespaces[namespace][0]
+
+    def _versions_locked(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(t, 0) for t in tables)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per namespace plus overall hit ratio"""
+        with self._lock:
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "entries": {name: len(e) for name, e in self._entries.items()},
+                "namespaces": {
+                    name: {"hits": self._hits[name], "misses": self._misses[name]}
+                    for name in self.namespaces
+                },
+            }
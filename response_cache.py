@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Pre-serialized JSON response cache with ETag / Last-Modified validators
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from flask import Response, current_app, jsonify, request
+from werkzeug.http import http_date, parse_date
+
+from metrics import SERIALIZE_DURATION, failed_queries
+from query_cache import QueryCache
+
+
+class CachedResponse:
+    """Encoded JSON body plus the validators handed out with it"""
+    __slots__ = ("body", "etag", "last_modified", "expires_at", "versions")
+
+    def __init__(self, body: bytes, etag: str, last_modified: float, expires_at: float,
+                 versions: Tuple[int, ...]):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.versions = versions
+
+
+class ResponseCache:
+    """Keeps the encoded bytes of each /api resource between data changes.
+
+    Entries are tied to the data versions and TTL of a QueryCache namespace,
+    so a conditional request whose ETag is still current is answered with a
+    304 straight from memory: no database round-trip and no JSON encoding.
+    The ETag is a digest of the body, which keeps it stable when a TTL expiry
+    reloads identical data.
+    """
+
+    def __init__(self, query_cache: QueryCache, max_entries: int = 512):
+        self.query_cache = query_cache
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # Stale entries stay until evicted so a rebuild with an identical body
+        # keeps its original Last-Modified
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+
+        self._not_modified = 0
+        self._hits = 0
+        self._rebuilds = 0
+
+    def cached(self, namespace: str, vary: Sequence[str] = ()):
+        """Decorate a view that returns JSON-serializable data.
+
+        ``namespace`` names the QueryCache namespace the view reads from and
+        ``vary`` lists query-string arguments that select different payloads.
+        Views returning a Response or a ``(body, status)`` tuple bypass the cache.
+        If a query failed while the view ran, whatever it returned is a storage
+        fallback: the client gets a 500 and nothing is kept.
+        """
+        def decorator(view: Callable[..., Any]):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (
+                    namespace,
+                    tuple(sorted(kwargs.items())),
+                    tuple((name, request.args.get(name)) for name in vary),
+                )
+                tables = self.query_cache.tables_for(namespace)
+                versions = self.query_cache.version(tables)
+
+                entry = self.lookup(key, versions)
+                if entry is None:
+                    with failed_queries() as failures:
+                        result = view(*args, **kwargs)
+                    if failures:
+                        return jsonify({"message": "Failed to fetch data", "error": failures[0][1]}), 500
+                    if isinstance(result, (Response, tuple)):
+                        return result
+                    with SERIALIZE_DURATION.time(namespace=namespace):
+                        body = current_app.json.response(result).get_data()
+                    entry = self.store(key, namespace, body, versions)
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    def lookup(self, key: Hashable, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        """The entry for ``key`` if it is still current for ``versions``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != versions or entry.expires_at <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def store(self, key: Hashable, namespace: str, body: bytes,
+              versions: Tuple[int, ...]) -> CachedResponse:
+        """Keep an encoded body read at ``versions`` and hand out its validators"""
+        etag = hashlib.sha1(body).hexdigest()[:20]
+
+        with self._lock:
+            self._rebuilds += 1
+            previous = self._entries.get(key)
+            last_modified = previous.last_modified if previous and previous.etag == etag else time.time()
+            entry = CachedResponse(body, etag, last_modified,
+                                   time.monotonic() + self.query_cache.ttl_for(namespace), versions)
+            # Only keep the entry if no write landed while the view was running
+            if self.query_cache.version(self.query_cache.tables_for(namespace)) == versions:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def _respond(self, entry: CachedResponse) -> Response:
+        not_modified, headers = self.validate(
+            entry, request.headers.get("If-None-Match"), request.headers.get("If-Modified-Since"))
+        if not_modified:
+            return Response(status=304, headers=headers)
+        return Response(entry.body, status=200, mimetype="application/json", headers=headers)
+
+    def validate(self, entry: CachedResponse, if_none_match: Optional[str],
+                 if_modified_since: Optional[str]) -> Tuple[bool, Dict[str, str]]:
+        """Response headers for ``entry`` and whether the request's validators make it a 304"""
+        max_age = max(0, int(entry.expires_at - time.monotonic()))
+        headers = {
+            "ETag": f'"{entry.etag}"',
+            "Last-Modified": http_date(int(entry.last_modified)),
+            "Cache-Control": f"public, max-age={max_age}",
+        }
+        not_modified = self._is_not_modified(entry, if_none_match, if_modified_since)
+        if not_modified:
+            with self._lock:
+                self._not_modified += 1
+        return not_modified, headers
+
+    @staticmethod
+    def _is_not_modified(entry: CachedResponse, if_none_match: Optional[str],
+                         if_modified_since: Optional[str]) -> bool:
+        if if_none_match is not None:
+            # If-None-Match takes precedence and uses weak comparison (RFC 9110 13.1.2)
+            for tag in if_none_match.split(","):
+                tag = tag.strip()
+                if tag == "*" or tag.removeprefix("W/").strip('"') == entry.etag:
+                    return True
+            return False
+
+        since = parse_date(if_modified_since)
+        return since is not None and int(entry.last_modified) <= since.timestamp()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for conditional hits, cached bodies served and rebuilds"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "not_modified": self._not_modified,
+                "hits": self._hits,
+                "rebuilds": self._rebuilds,
+            }
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Background scrape scheduler: one ingestion job per source, run on a worker
+pool at a cadence that follows the live matches
+"""
+
+import os
+import time
+import random
+import socket
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+
+from browser_pool import BrowserPool
+from scraper import DEFAULT_SOURCES, IngestionEngine, PageCache, PageState, ScrapedData, Source
+from team_resolver import TeamResolver
+
+# First key of the two-key pg_try_advisory_lock(class, hashtext(source)) held
+# while a source is scraped, so one worker at a time scrapes it
+SCRAPE_LOCK_CLASS = 7243002
+
+# Page kinds that carry match scores; sources serving one follow the live cadence
+MATCH_KINDS = ('scoreboard', 'matches')
+
+# Matches still marked live or upcoming after this long are stale rows, not games in play
+LIVE_WINDOW = '6 hours'
+
+LIVE_STATE_QUERY = f"""
+    SELECT count(*) FILTER (WHERE status = 'live') AS live,
+           count(*) FILTER (WHERE status = 'upcoming' AND match_date <= NOW()) AS kicked_off,
+           EXTRACT(EPOCH FROM min(match_date) FILTER (WHERE status = 'upcoming' AND match_date > NOW())
+                   - NOW()) AS next_kickoff_in
+    FROM matches
+    WHERE status IN ('live', 'upcoming') AND match_date > NOW() - INTERVAL '{LIVE_WINDOW}'
+    """
+
+# Shared across workers: whoever ran a source last, everyone sees it
+JOB_ROW_QUERY = """
+    SELECT EXTRACT(EPOCH FROM NOW() - last_finished_at) AS age, last_duration, last_error
+    FROM scrape_jobs WHERE source = %s
+    """
+
+JOB_STARTED = """
+    INSERT INTO scrape_jobs (source, last_started_at, worker) VALUES (%s, NOW(), %s)
+    ON CONFLICT (source) DO UPDATE SET last_started_at = NOW(), worker = EXCLUDED.worker
+    """
+
+JOB_FINISHED = """
+    UPDATE scrape_jobs
+    SET last_finished_at = NOW(), last_duration = %s, last_error = %s, last_rows = %s,
+        runs = runs + 1, failures = failures + %s
+    WHERE source = %s
+    """
+
+PAGE_QUERY = """
+    SELECT etag, last_modified, digest, EXTRACT(EPOCH FROM NOW() - stored_at) AS age
+    FROM scrape_pages WHERE url = %s
+    """
+
+PAGE_STORED = """
+    INSERT INTO scrape_pages (url, etag, last_modified, digest, stored_at) VALUES (%s, %s, %s, %s, NOW())
+    ON CONFLICT (url) DO UPDATE SET etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+                                    digest = EXCLUDED.digest, stored_at = EXCLUDED.stored_at
+    """
+
+def scraped_batches(data: ScrapedData, resolver: TeamResolver) -> Tuple[Dict[str, List[Dict]], Set[str]]:
+    """Rows for upsert_batches from scraped data, plus the team names that matched no team.
+
+    Scraped standings are left out: the table is derived from the stored
+    matches (standings_engine), and a scraped copy would only fight it.
+    """
+    unresolved: Set[str] = set()
+
+    def team_id(name: str) -> Optional[int]:
+        found = resolver.resolve(name)
+        if found is None:
+            unresolved.add(name)
+        return found
+
+    matches = []
+    for m in data.matches:
+        home, away = team_id(m.home_team_name), team_id(m.away_team_name)
+        if home is None or away is None or m.match_date is None:
+            continue
+        matches.append({
+            'home_team_id': home, 'away_team_id': away, 'home_score': m.home_score, 'away_score': m.away_score,
+            'status': m.status, 'match_date': m.match_date, 'venue': m.venue, 'minute': m.minute,
+            'competition': m.competition,
+        })
+
+    players = []
+    for p in data.players:
+        found = team_id(p.team_name)
+        if found is None:
+            continue
+        players.append({
+            'name': p.name, 'team_id': found, 'position': p.position, 'goals': p.goals,
+            'assists': p.assists, 'appearances': p.appearances, 'season': p.season,
+        })
+
+    batches = {table: rows for table, rows in
+               (('matches', matches), ('players', players)) if rows}
+    return batches, unresolved
+
+
+class StoredPageCache(PageCache):
+    """PageCache in the scrape_pages table, so whichever worker runs a job next sends the same validators"""
+
+    def __init__(self, query: Callable[..., List[Any]]):
+        super().__init__()
+        self.query = query
+
+    def get(self, url: str) -> Optional[PageState]:
+        rows = self.query(PAGE_QUERY, (url,))
+        if not rows:
+            return None
+        row = rows[0]
+        return PageState(_field(row, 'etag', 0), _field(row, 'last_modified', 1), _field(row, 'digest', 2),
+                         stored_at=time.time() - float(_field(row, 'age', 3)))
+
+    def put(self, url: str, state: PageState):
+        self.query(PAGE_STORED, (url, state.etag, state.last_modified, state.digest), fetch=False)
+
+
+@dataclass
+class ScrapeJob:
+    """Schedule and last outcome of one source in this process"""
+    source: Source
+    covers_matches: bool
+    next_run: float = 0.0
+    running: bool = False
+    last_started_at: Optional[float] = None
+    last_finished_at: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    last_rows: int = 0
+    # When any worker last scraped this source, as far as this process knows;
+    # the next run is due an interval after it
+    ran_at: Optional[float] = None
+    runs: int = 0
+    # Runs where every page was as stored, so nothing was parsed or written
+    unchanged_runs: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    # Runs left to another worker: it held the lock or had just finished
+    skipped: int = 0
+    # Due for the pass after the last live match ended
+    catch_up: bool = False
+    unresolved: Set[str] = field(default_factory=set)
+
+    @property
+    def name(self) -> str:
+        return self.source.name
+
+
+class ScrapeScheduler:
+    """Runs an IngestionEngine source by source, as often as the matches call for.
+
+    Sources that serve match pages are scraped every ``live_interval``
+    seconds while a match is live (or has kicked off without being marked
+    live yet), the next kickoff pulls them forward, and otherwise every
+    source runs every ``idle_interval`` seconds. When the last live match
+    ends every source runs once more to pick up final scores and standings.
+    Failing jobs back off exponentially, up to the idle interval. Pages
+    that have not changed since the last stored run cost a conditional
+    request at most and are neither parsed nor written.
+
+    Jobs run on a pool of ``workers`` threads. Across processes a job only
+    runs under its source's advisory lock, held on a connection of the job's
+    own so no other job's reconnect can drop it, and the ``scrape_jobs`` row
+    tells every worker when any of them last finished it, so N workers
+    scrape a source no more often than one would.
+    """
+
+    def __init__(self, engine: IngestionEngine, write: Callable[[ScrapedData], Tuple[Dict, Set[str]]],
+                 connect: Callable[[], Any], live_interval: float = 20.0, idle_interval: float = 3600.0,
+                 workers: int = 3, check_interval: float = 60.0):
+        self.engine = engine
+        self.write = write
+        self.connect = connect
+        self.live_interval = live_interval
+        self.idle_interval = idle_interval
+        self.check_interval = check_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.jobs: Dict[str, ScrapeJob] = {
+            source.name: ScrapeJob(source, covers_matches=any(kind in source.endpoints for kind in MATCH_KINDS))
+            for source in engine.sources
+        }
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scrape-job')
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # One autocommit session for scrape_jobs and the page cache; locks each have their own
+        self._conn = None
+        self._conn_lock = threading.Lock()
+
+        self._live = False
+        self._kickoff_at: Optional[float] = None
+        self._checked_at = 0.0
+        self._errors = 0
+
+    @classmethod
+    def from_env(cls, write: Callable[[ScrapedData], Tuple[Dict, Set[str]]],
+                 connect: Callable[[], Any]) -> "ScrapeScheduler":
+        """Scheduler over the default sources, tuned by SCRAPE_LIVE_INTERVAL / SCRAPE_IDLE_INTERVAL / SCRAPE_WORKERS"""
+        sources = [source_cls() for source_cls in DEFAULT_SOURCES]
+        browser_pool = BrowserPool.from_env() if any(s.requires_browser for s in sources) else None
+        scheduler = cls(
+            IngestionEngine(sources, browser_pool=browser_pool), write, connect,
+            live_interval=float(os.getenv('SCRAPE_LIVE_INTERVAL', 20)),
+            idle_interval=float(os.getenv('SCRAPE_IDLE_INTERVAL', 3600)),
+            workers=int(os.getenv('SCRAPE_WORKERS', len(sources))),
+        )
+        scheduler.engine.page_cache = StoredPageCache(scheduler._query)
+        return scheduler
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='scrape-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop scheduling, wait for running jobs and release every lock"""
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        self._thread = None
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.engine.close()
+        if self.engine.browser_pool is not None:
+            self.engine.browser_pool.close()
+        with self._conn_lock:
+            self._close()
+
+    def notify(self):
+        """Matches changed (e.g. another worker wrote a live score): recheck the cadence now"""
+        self._checked_at = 0.0
+        self._wake.set()
+
+    def run_all(self):
+        """Run every job once on the pool and wait for them, whatever the schedule says"""
+        self._refresh()
+        with self._lock:
+            jobs = [job for job in self.jobs.values() if not job.running]
+            for job in jobs:
+                job.running = True
+        for future in [self._executor.submit(self._run_job, job, True) for job in jobs]:
+            future.result()
+
+    def interval_for(self, job: ScrapeJob) -> float:
+        """Seconds between runs of ``job`` given the current match state"""
+        interval = self.live_interval if self._live and job.covers_matches else self.idle_interval
+        if job.consecutive_failures:
+            interval = min(interval * 2 ** job.consecutive_failures, max(interval, self.idle_interval))
+        return interval
+
+    def _check_every(self) -> float:
+        return min(self.check_interval, self.live_interval) if self._live else self.check_interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - self._checked_at >= self._check_every():
+                    self._refresh()
+                self._dispatch(time.monotonic())
+            except Exception as e:
+                self._errors += 1
+                print(f"❌ Scrape scheduler error: {e}")
+            self._wake.wait(self._sleep_for(time.monotonic()))
+            self._wake.clear()
+
+    def _refresh(self):
+        """Re-read the live match state and move every waiting job to its new due time"""
+        was_live = self._live
+        try:
+            row = self._query(LIVE_STATE_QUERY)[0]
+        except Exception as e:
+            self._errors += 1
+            print(f"❌ Scrape scheduler could not read live matches: {e}")
+            return
+        now = time.monotonic()
+        self._checked_at = now
+        self._live = bool(_field(row, 'live', 0) or _field(row, 'kicked_off', 1))
+        next_kickoff_in = _field(row, 'next_kickoff_in', 2)
+        self._kickoff_at = now + float(next_kickoff_in) if next_kickoff_in is not None else None
+
+        with self._lock:
+            for job in self.jobs.values():
+                if job.running or job.ran_at is None:
+                    continue
+                if was_live and not self._live:
+                    # Final whistle: one more pass for final scores and the table
+                    job.next_run = now
+                    job.catch_up = True
+                else:
+                    job.next_run = self._due(job)
+
+        if self._live != was_live:
+            print(f"⏱️ Scrape cadence: {'live' if self._live else 'idle'}")
+
+    def _due(self, job: ScrapeJob) -> float:
+        due = job.ran_at + self.interval_for(job)
+        if job.covers_matches and self._kickoff_at is not None and self._kickoff_at > job.ran_at:
+            due = min(due, self._kickoff_at)
+        return due
+
+    def _dispatch(self, now: float):
+        with self._lock:
+            due = [job for job in self.jobs.values() if not job.running and job.next_run <= now]
+            for job in due:
+                job.running = True
+        for job in due:
+            self._executor.submit(self._run_job, job)
+
+    def _sleep_for(self, now: float) -> float:
+        with self._lock:
+            waiting = [job.next_run for job in self.jobs.values() if not job.running]
+        until_check = self._checked_at + self._check_every()
+        return max(0.05, min(waiting + [until_check]) - now)
+
+    def _run_job(self, job: ScrapeJob, force: bool = False):
+        try:
+            self._run_locked(job, force)
+        except Exception as e:
+            self._errors += 1
+            print(f"❌ Scrape job {job.name} error: {e}")
+        finally:
+            with self._lock:
+                job.running = False
+                job.catch_up = False
+                if job.ran_at is None:
+                    job.ran_at = time.monotonic()
+                # A little jitter keeps the workers of a fleet from queueing on the same lock
+                interval = self.interval_for(job)
+                job.next_run = self._due(job) + random.uniform(0, min(5.0, interval * 0.1))
+            self._wake.set()
+
+    def _run_locked(self, job: ScrapeJob, force: bool = False):
+        lock = self._try_lock(job.name)
+        if lock is None:
+            # Another worker is scraping it right now
+            job.skipped += 1
+            job.ran_at = time.monotonic()
+            return
+        try:
+            row = self._query(JOB_ROW_QUERY, (job.name,))
+            age = _field(row[0], 'age', 0) if row else None
+            fresh_for = self.live_interval if job.catch_up else self.interval_for(job)
+            if not force and age is not None and float(age) < fresh_for * 0.9:
+                # Another worker finished it moments ago; this run would fetch the same pages
+                job.skipped += 1
+                job.ran_at = time.monotonic() - float(age)
+                return
+            self._query(JOB_STARTED, (job.name, self.worker_id), fetch=False)
+            self._scrape(job, lock)
+            self._query(JOB_FINISHED, (job.last_duration, job.last_error, job.last_rows,
+                                       1 if job.last_error else 0, job.name), fetch=False)
+        finally:
+            self._unlock(lock, job.name)
+
+    def _scrape(self, job: ScrapeJob, lock):
+        job.last_started_at = time.monotonic()
+        job.last_error = None
+        try:
+            result = asyncio.run(self.engine.run([job.source]))[job.name]
+            if not result.ok:
+                raise RuntimeError(result.error)
+            if result.changed:
+                if not self._holds(lock):
+                    # Its connection dropped mid-run, so another worker may be scraping it too
+                    raise RuntimeError("lost the scrape lock")
+                counts, job.unresolved = self.write(result.data)
+                job.last_rows = sum(c.get('inserted', 0) + c.get('updated', 0) for c in counts.values())
+            else:
+                job.last_rows = 0
+                job.unchanged_runs += 1
+            # Only now that the rows are stored may the next run skip these pages
+            self.engine.commit(result)
+            job.consecutive_failures = 0
+        except Exception as e:
+            job.last_error = str(e) or e.__class__.__name__
+            job.failures += 1
+            job.consecutive_failures += 1
+        finally:
+            job.runs += 1
+            job.last_finished_at = job.ran_at = time.monotonic()
+            job.last_duration = job.last_finished_at - job.last_started_at
+        if job.unresolved:
+            print(f"⚠️ Scrape job {job.name}: no team for {', '.join(sorted(job.unresolved))}")
+
+    # Session-level advisory locks outlive transactions and die with the
+    # connection, so a crashed worker never leaves a source locked. Each job
+    # takes its lock on a connection of its own and closes it when done: a
+    # shared session would lose every running job's lock when it reconnects.
+    def _try_lock(self, name: str) -> Optional[Any]:
+        """A connection holding ``name``'s lock, or None when another worker has it"""
+        conn = self.connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s)) AS locked", (SCRAPE_LOCK_CLASS, name))
+                locked = bool(_field(cur.fetchone(), 'locked', 0))
+        except Exception:
+            conn.close()
+            raise
+        if not locked:
+            conn.close()
+            return None
+        return conn
+
+    @staticmethod
+    def _holds(lock) -> bool:
+        """Whether the lock's connection, and so the lock, is still alive"""
+        try:
+            with lock.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _unlock(lock, name: str):
+        # Closing the session releases the lock; a connection already gone took it along
+        try:
+            lock.close()
+        except Exception as e:
+            print(f"⚠️ Could not release scrape lock for {name}: {e}")
+
+    def _query(self, query: str, params: tuple = (), fetch: bool = True) -> List[Any]:
+        with self._conn_lock:
+            try:
+                if self._conn is None or self._conn.closed:
+                    self._conn = self.connect()
+                    self._conn.autocommit = True
+                with self._conn.cursor() as cur:
+                    cur.execute(query, params)
+                    return cur.fetchall() if fetch else []
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                self._close()
+                raise
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Schedule and last outcome of every job in this process; times are seconds ago / from now"""
+        now = time.monotonic()
+
+        def ago(moment: Optional[float]) -> Optional[float]:
+            return round(now - moment, 3) if moment is not None else None
+
+        with self._lock:
+            return [{
+                "source": job.name,
+                "running": job.running,
+                "interval": self.interval_for(job),
+                "next_run_in": None if job.running else round(max(0.0, job.next_run - now), 3),
+                "last_run_ago": ago(job.last_started_at),
+                "last_duration": round(job.last_duration, 3) if job.last_duration is not None else None,
+                "last_error": job.last_error,
+                "last_rows": job.last_rows,
+                "runs": job.runs,
+                "unchanged_runs": job.unchanged_runs,
+                "failures": job.failures,
+                "skipped": job.skipped,
+                "unresolved_teams": sorted(job.unresolved),
+            } for job in self.jobs.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self.jobs.values())
+            return {
+                "jobs": len(jobs),
+                "running": sum(1 for job in jobs if job.running),
+                "live": self._live,
+                "runs": sum(job.runs for job in jobs),
+                "unchanged_runs": sum(job.unchanged_runs for job in jobs),
+                "failures": sum(job.failures for job in jobs),
+                "skipped": sum(job.skipped for job in jobs),
+                "errors": self._errors,
+            }
+
+
+def _field(row, name: str, index: int) -> Any:
+    return row[name] if isinstance(row, dict) else row[index]
+
+
+def main():
+    """Run the scrape scheduler in the foreground, or every job once with --once"""
+    import argparse
+    from fixture_server import FixtureServer
+    import app
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--fixtures', help='serve recorded pages from this directory instead of the live sites')
+    parser.add_argument('--once', action='store_true', help='run every job once, print their status and exit')
+    args = parser.parse_args()
+
+    scheduler = app.get_scheduler()
+    server = FixtureServer(args.fixtures) if args.fixtures else None
+    if server:
+        server.start()
+        for source in scheduler.engine.sources:
+            source.endpoints = {kind: server.url_for(source.name, kind) for kind in source.endpoints}
+    try:
+        if args.once:
+            scheduler.run_all()
+            for job in scheduler.status():
+                print(f"  {job['source']}: {job['last_rows']} rows written in {job['last_duration'] or 0:.2f}s"
+                      f"{' - ' + job['last_error'] if job['last_error'] else ''}"
+                      f"{' (skipped: run elsewhere)' if job['skipped'] else ''}")
+            return
+        scheduler.start()
+        print("⏱️ Scrape scheduler running; Ctrl-C to stop")
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.shutdown_services()
+        if server:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,907 @@
+#!/usr/bin/env python3
+"""
+Concurrent multi-source ingestion engine for Liga MX data
+Python port of server/services/multi-scraper.ts
+"""
+
+import json
+import time
+import hashlib
+import random
+import asyncio
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+import parsers
+from browser_pool import BrowserPool, BrowserUnavailable
+from metrics import PARSE_DURATION, SCRAPE_BYTES, SCRAPE_DURATION, SCRAPE_PAGES, SCRAPE_REQUESTS, SCRAPE_ROWS
+from parsers import (ExtractionFailed, Extractor, by_class, classes, extractor, extractors_of, first_link, has_class,
+                     text, xpath)
+from seasons import current_season
+from team_resolver import TeamResolver, team_key
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,application/json;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'es-MX,es;q=0.9,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+}
+
+# Status codes worth retrying; anything else non-2xx fails the fetch immediately
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class ScrapedMatch:
+    home_team_name: str
+    away_team_name: str
+    home_score: Optional[int] = None
+    away_score: Optional[int] = None
+    status: str = 'upcoming'
+    match_date: Optional[datetime] = None
+    venue: Optional[str] = None
+    minute: Optional[int] = None
+    competition: str = 'Liga MX'
+
+
+@dataclass
+class ScrapedStanding:
+    team_name: str
+    position: int
+    matches_played: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    goals_for: int = 0
+    goals_against: int = 0
+    goal_difference: int = 0
+    points: int = 0
+    season: str = field(default_factory=current_season)
+
+
+@dataclass
+class ScrapedPlayer:
+    name: str
+    team_name: str
+    position: Optional[str] = None
+    goals: int = 0
+    assists: int = 0
+    appearances: int = 0
+    season: str = field(default_factory=current_season)
+
+
+@dataclass
+class ScrapedData:
+    matches: List[ScrapedMatch] = field(default_factory=list)
+    standings: List[ScrapedStanding] = field(default_factory=list)
+    players: List[ScrapedPlayer] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.matches or self.standings or self.players)
+
+    def extend(self, other: "ScrapedData"):
+        self.matches.extend(other.matches)
+        self.standings.extend(other.standings)
+        self.players.extend(other.players)
+
+    def deduplicated(self, resolve: Optional[Callable[[str], Optional[int]]] = None) -> "ScrapedData":
+        """Drop repeats across sources, keeping the first source's row.
+
+        Rows are keyed on the team, not its spelling: ``resolve`` (e.g.
+        TeamResolver.resolve) names the team when it can, and otherwise
+        names are clustered by themselves, so "Club América" and "América"
+        or "Santos" and "Santos Laguna" are one team. Match dates are
+        compared in UTC; naive ones are taken to be UTC already, as they
+        are stored. A run scrapes one league table, so standings and
+        players are keyed without the season label each source reports.
+        """
+        team = _team_clusters([row.team_name for row in self.standings + self.players] +
+                              [name for m in self.matches for name in (m.home_team_name, m.away_team_name)],
+                              resolve)
+
+        def unique(rows, key):
+            seen = set()
+            result = []
+            for row in rows:
+                k = key(row)
+                if k not in seen:
+                    seen.add(k)
+                    result.append(row)
+            return result
+
+        return ScrapedData(
+            matches=unique(self.matches, lambda m: (team[m.home_team_name], team[m.away_team_name],
+                                                    _utc(m.match_date))),
+            standings=unique(self.standings, lambda s: team[s.team_name]),
+            players=unique(self.players, lambda p: (team_key(p.name), team[p.team_name])),
+        )
+
+
+def _utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is None:
+        return None
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _team_clusters(names: List[str], resolve: Optional[Callable[[str], Optional[int]]] = None) -> Dict[str, Any]:
+    """A team identity per scraped name: ``resolve``'s id, else the first spelling the name resolves to.
+
+    Spellings are taken in order and matched with a TeamResolver over the
+    spellings already kept, so the first source's names are the canonical ones.
+    """
+    identity: Dict[str, Any] = {}
+    canonical: List[Dict[str, Any]] = []
+    resolver = TeamResolver(canonical)
+    for name in names:
+        if name in identity:
+            continue
+        found = resolve(name) if resolve is not None else None
+        if found is not None:
+            identity[name] = ('team', found)
+            continue
+        found = resolver.resolve(name)
+        if found is None:
+            found = len(canonical)
+            canonical.append({'id': found, 'name': name, 'nickname': None, 'slug': ''})
+            resolver = TeamResolver(canonical)
+        identity[name] = ('name', found)
+    return identity
+
+
+@dataclass
+class SourceResult:
+    """Outcome of one source in a run"""
+    source: str
+    data: ScrapedData = field(default_factory=ScrapedData)
+    error: Optional[str] = None
+    duration: float = 0.0
+    requests: int = 0
+    # Pages with new content, and pages skipped as a 304 or a body hashing as before
+    changed: int = 0
+    unchanged: int = 0
+    bytes: int = 0
+    # State of every page that changed, kept until IngestionEngine.commit
+    pages: Dict[str, "PageState"] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class PageState:
+    """Validators and body hash of the last stored version of a page"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    digest: Optional[str] = None
+    stored_at: float = field(default_factory=time.time)
+
+
+class PageCache:
+    """PageState per URL, in memory.
+
+    The engine only reads it while fetching. States are written by
+    IngestionEngine.commit once the caller has stored what a run parsed, so
+    a failed write never lets the next run skip data it did not keep.
+    """
+
+    def __init__(self):
+        self._pages: Dict[str, PageState] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[PageState]:
+        with self._lock:
+            return self._pages.get(url)
+
+    def put(self, url: str, state: PageState):
+        with self._lock:
+            self._pages[url] = state
+
+
+class FetchError(Exception):
+    """A URL could not be fetched after all retries"""
+
+
+class Source:
+    """A data source: the pages to fetch and how to turn them into ScrapedData.
+
+    ``endpoints`` maps a page kind (e.g. ``standings``) to its URL and can be
+    overridden, which is how a run is pointed at a local stand-in server.
+    Sources that only render their data client-side set ``requires_browser``
+    and are loaded through the BrowserPool, waiting for ``wait_for[kind]``.
+
+    HTML sources register an lxml ``@extractor`` per page kind and implement
+    ``parse_soup`` with BeautifulSoup; ``parse`` tries the extractor and
+    falls back to ``parse_soup`` when lxml is missing, the extractor raises
+    or it finds no rows.
+    """
+
+    name = 'source'
+    endpoints: Dict[str, str] = {}
+    timeout = 20.0
+    requires_browser = False
+    wait_for: Dict[str, str] = {}
+    # kind -> lxml fast path, collected from the class's @extractor methods
+    extractors: Dict[str, Extractor] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.extractors = extractors_of(cls)
+
+    def __init__(self, endpoints: Optional[Dict[str, str]] = None, timeout: Optional[float] = None):
+        self.endpoints = dict(endpoints or self.endpoints)
+        if timeout is not None:
+            self.timeout = timeout
+
+    def parse(self, kind: str, body: str) -> ScrapedData:
+        extractor = self.extractors.get(kind) if parsers.available else None
+        if extractor is not None:
+            started = time.perf_counter()
+            try:
+                data = extractor.run(self, body)
+                if data.empty:
+                    raise ExtractionFailed("no rows")
+                PARSE_DURATION.observe(time.perf_counter() - started, source=self.name, kind=kind, parser='lxml')
+                return data
+            except Exception as e:
+                print(f"⚠️ {self.name} {kind}: fast parser failed ({e}); falling back to BeautifulSoup")
+
+        started = time.perf_counter()
+        data = self.parse_soup(kind, body)
+        PARSE_DURATION.observe(time.perf_counter() - started, source=self.name, kind=kind, parser='bs4')
+        return data
+
+    def parse_soup(self, kind: str, body: str) -> ScrapedData:
+        raise NotImplementedError
+
+
+def _int(value: Any, default: Optional[int] = 0) -> Optional[int]:
+    try:
+        return int(float(str(value).strip()))
+    except (TypeError, ValueError):
+        return default
+
+
+class EspnSource(Source):
+    """ESPN public site API (JSON scoreboard and standings for mex.1)"""
+
+    name = 'espn'
+    endpoints = {
+        'scoreboard': 'https://site.api.espn.com/apis/site/v2/sports/soccer/mex.1/scoreboard',
+        'standings': 'https://site.api.espn.com/apis/v2/sports/soccer/mex.1/standings',
+    }
+
+    STATUS_MAP = {'pre': 'upcoming', 'in': 'live', 'post': 'finished'}
+
+    def parse(self, kind: str, body: str) -> ScrapedData:
+        payload = json.loads(body)
+        if kind == 'scoreboard':
+            return ScrapedData(matches=self._parse_scoreboard(payload))
+        if kind == 'standings':
+            return ScrapedData(standings=self._parse_standings(payload))
+        return ScrapedData()
+
+    def _parse_scoreboard(self, payload: Dict) -> List[ScrapedMatch]:
+        matches = []
+        for event in payload.get('events', []):
+            for competition in event.get('competitions', []):
+                sides = {c.get('homeAway'): c for c in competition.get('competitors', [])}
+                if 'home' not in sides or 'away' not in sides:
+                    continue
+
+                status = competition.get('status') or event.get('status') or {}
+                state = self.STATUS_MAP.get(status.get('type', {}).get('state'), 'upcoming')
+                minute = None
+                if state == 'live':
+                    minute = _int(str(status.get('displayClock', '')).rstrip("'").split('+')[0], None)
+
+                matches.append(ScrapedMatch(
+                    home_team_name=sides['home']['team']['displayName'],
+                    away_team_name=sides['away']['team']['displayName'],
+                    home_score=_int(sides['home'].get('score'), None) if state != 'upcoming' else None,
+                    away_score=_int(sides['away'].get('score'), None) if state != 'upcoming' else None,
+                    status=state,
+                    match_date=_parse_iso(event.get('date')),
+                    venue=(competition.get('venue') or {}).get('fullName'),
+                    minute=minute,
+                ))
+        return matches
+
+    def _parse_standings(self, payload: Dict) -> List[ScrapedStanding]:
+        groups = payload.get('children') or [payload]
+        season = payload.get('seasons', [{}])[0].get('displayName') if payload.get('seasons') else None
+        standings = []
+        for group in groups:
+            for entry in group.get('standings', {}).get('entries', []):
+                stats = {s.get('name'): s.get('value') for s in entry.get('stats', [])}
+                standing = ScrapedStanding(
+                    team_name=entry['team']['displayName'],
+                    position=_int(stats.get('rank')),
+                    matches_played=_int(stats.get('gamesPlayed')),
+                    wins=_int(stats.get('wins')),
+                    draws=_int(stats.get('ties')),
+                    losses=_int(stats.get('losses')),
+                    goals_for=_int(stats.get('pointsFor')),
+                    goals_against=_int(stats.get('pointsAgainst')),
+                    goal_difference=_int(stats.get('pointDifferential')),
+                    points=_int(stats.get('points')),
+                )
+                if season:
+                    standing.season = season
+                standings.append(standing)
+        return standings
+
+
+class SoccerwaySource(Source):
+    """Soccerway HTML pages (league table, fixtures/results, top scorers)"""
+
+    name = 'soccerway'
+    endpoints = {
+        'standings': 'https://int.soccerway.com/national/mexico/primera-division/tables/',
+        'matches': 'https://int.soccerway.com/national/mexico/primera-division/matches/',
+        'players': 'https://int.soccerway.com/national/mexico/primera-division/players/',
+    }
+
+    _STANDING_ROWS = xpath(f".//tr[{has_class('team_rank')}]")
+    _MATCH_ROWS = xpath(f".//tr[{has_class('match')}]")
+    _PLAYER_ROWS = xpath(".//tbody//tr")
+
+    # Fast path: lxml over the one table each page is about
+
+    @extractor('standings', 'table', 'leaguetable')
+    def _extract_standings(self, table) -> ScrapedData:
+        standings = []
+        for row in self._STANDING_ROWS(table):
+            cells = by_class(row, 'td')
+            team = first_link(cells.get('team'))
+            if team is None:
+                continue
+            standings.append(self._standing(team.get('title') or text(team), lambda cls: text(cells.get(cls))))
+        return ScrapedData(standings=standings)
+
+    @extractor('matches', 'table', 'matches')
+    def _extract_matches(self, table) -> ScrapedData:
+        matches = []
+        for row in self._MATCH_ROWS(table):
+            cells = by_class(row, 'td')
+            home, away = first_link(cells.get('team-a')), first_link(cells.get('team-b'))
+            if home is None or away is None:
+                continue
+            matches.append(self._match(home.get('title') or text(home), away.get('title') or text(away),
+                                       row.get('data-timestamp'), classes(row), lambda cls: text(cells.get(cls))))
+        return ScrapedData(matches=matches)
+
+    @extractor('players', 'table', 'playerstats')
+    def _extract_players(self, table) -> ScrapedData:
+        players = []
+        for row in self._PLAYER_ROWS(table):
+            cells = by_class(row, 'td')
+            name, team = first_link(cells.get('player')), first_link(cells.get('team'))
+            if name is None or team is None:
+                continue
+            players.append(self._player(text(name), team.get('title') or text(team),
+                                        lambda cls: text(cells.get(cls))))
+        return ScrapedData(players=players)
+
+    # Fallback: BeautifulSoup over the whole page
+
+    def parse_soup(self, kind: str, body: str) -> ScrapedData:
+        soup = BeautifulSoup(body, 'html.parser')
+        if kind == 'standings':
+            return ScrapedData(standings=self._parse_standings(soup))
+        if kind == 'matches':
+            return ScrapedData(matches=self._parse_matches(soup))
+        if kind == 'players':
+            return ScrapedData(players=self._parse_players(soup))
+        return ScrapedData()
+
+    @staticmethod
+    def _cell(row, cls: str) -> str:
+        cell = row.find('td', class_=cls)
+        return cell.get_text(strip=True) if cell else ''
+
+    def _parse_standings(self, soup) -> List[ScrapedStanding]:
+        standings = []
+        for row in soup.select('table.leaguetable tr.team_rank'):
+            team = row.select_one('td.team a')
+            if not team:
+                continue
+            standings.append(self._standing(team.get('title') or team.get_text(strip=True),
+                                            lambda cls: self._cell(row, cls)))
+        return standings
+
+    def _parse_matches(self, soup) -> List[ScrapedMatch]:
+        matches = []
+        for row in soup.select('table.matches tr.match'):
+            home = row.select_one('td.team-a a')
+            away = row.select_one('td.team-b a')
+            if not home or not away:
+                continue
+            matches.append(self._match(home.get('title') or home.get_text(strip=True),
+                                       away.get('title') or away.get_text(strip=True),
+                                       row.get('data-timestamp'), row.get('class', []),
+                                       lambda cls: self._cell(row, cls)))
+        return matches
+
+    def _parse_players(self, soup) -> List[ScrapedPlayer]:
+        players = []
+        for row in soup.select('table.playerstats tbody tr'):
+            name = row.select_one('td.player a')
+            team = row.select_one('td.team a')
+            if not name or not team:
+                continue
+            players.append(self._player(name.get_text(strip=True), team.get('title') or team.get_text(strip=True),
+                                        lambda cls: self._cell(row, cls)))
+        return players
+
+    # Rows from cell text, shared by both parsers; ``cell(cls)`` is the text of the row's td.cls
+
+    @staticmethod
+    def _standing(team_name: str, cell: Callable[[str], str]) -> ScrapedStanding:
+        return ScrapedStanding(
+            team_name=team_name,
+            position=_int(cell('rank')),
+            matches_played=_int(cell('mp')),
+            wins=_int(cell('win')),
+            draws=_int(cell('draw')),
+            losses=_int(cell('loss')),
+            goals_for=_int(cell('gf')),
+            goals_against=_int(cell('ga')),
+            goal_difference=_int(cell('gd').lstrip('+')),
+            points=_int(cell('points')),
+        )
+
+    @staticmethod
+    def _match(home: str, away: str, data_timestamp: Optional[str], row_classes: List[str],
+               cell: Callable[[str], str]) -> ScrapedMatch:
+        timestamp = _int(data_timestamp, None)
+        score = cell('score-time')
+        home_score = away_score = minute = None
+        status = 'upcoming'
+        if ' - ' in score:
+            home_score, away_score = (_int(part, None) for part in score.split(' - ', 1))
+            status = 'live' if 'live' in row_classes else 'finished'
+        if status == 'live':
+            minute = _int(cell('minute').rstrip("'"), None)
+
+        return ScrapedMatch(
+            home_team_name=home,
+            away_team_name=away,
+            home_score=home_score,
+            away_score=away_score,
+            status=status,
+            match_date=datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp else None,
+            venue=cell('venue') or None,
+            minute=minute,
+        )
+
+    @staticmethod
+    def _player(name: str, team_name: str, cell: Callable[[str], str]) -> ScrapedPlayer:
+        return ScrapedPlayer(
+            name=name,
+            team_name=team_name,
+            position=cell('position') or None,
+            goals=_int(cell('goals')),
+            assists=_int(cell('assists')),
+            appearances=_int(cell('appearances')),
+        )
+
+
+class FlashscoreSource(Source):
+    """Flashscore Liga MX pages; the score DOM is built by JavaScript"""
+
+    name = 'flashscore'
+    endpoints = {
+        'matches': 'https://www.flashscore.com/football/mexico/liga-mx/',
+        'standings': 'https://www.flashscore.com/football/mexico/liga-mx/standings/',
+    }
+    timeout = 45.0
+    requires_browser = True
+    wait_for = {
+        'matches': '.event__match',
+        'standings': '.ui-table__row',
+    }
+
+    _MATCH_ROWS = xpath(f".//div[{has_class('event__match')}]")
+    _STANDING_ROWS = xpath(f".//div[{has_class('ui-table__row')}]")
+    _STANDING_VALUES = xpath(f".//*[{has_class('table__cell--value')}]")
+
+    # Fast path: lxml over the match list or the table
+
+    @extractor('matches', 'div', 'sportName')
+    def _extract_matches(self, container) -> ScrapedData:
+        matches = []
+        now = datetime.now()
+        for row in self._MATCH_ROWS(container):
+            found = by_class(row)
+            match = self._match(lambda cls: text(found.get(cls)), classes(row), now)
+            if match:
+                matches.append(match)
+        return ScrapedData(matches=matches)
+
+    @extractor('standings', 'div', 'ui-table')
+    def _extract_standings(self, table) -> ScrapedData:
+        standings = []
+        for row in self._STANDING_ROWS(table):
+            found = by_class(row)
+            standing = self._standing(text(found.get('tableCellParticipant__name')),
+                                      text(found.get('tableCellRank')),
+                                      [text(cell) for cell in self._STANDING_VALUES(row)])
+            if standing:
+                standings.append(standing)
+        return ScrapedData(standings=standings)
+
+    # Fallback: BeautifulSoup over the whole page
+
+    def parse_soup(self, kind: str, body: str) -> ScrapedData:
+        soup = BeautifulSoup(body, 'html.parser')
+        if kind == 'matches':
+            return ScrapedData(matches=self._parse_matches(soup))
+        if kind == 'standings':
+            return ScrapedData(standings=self._parse_standings(soup))
+        return ScrapedData()
+
+    @staticmethod
+    def _text(node, selector: str) -> str:
+        found = node.select_one(selector)
+        return found.get_text(strip=True) if found else ''
+
+    def _parse_matches(self, soup) -> List[ScrapedMatch]:
+        now = datetime.now()
+        matches = (self._match(lambda cls: self._text(row, f'.{cls}'), row.get('class', []), now)
+                   for row in soup.select('div.event__match'))
+        return [match for match in matches if match]
+
+    def _parse_standings(self, soup) -> List[ScrapedStanding]:
+        standings = (self._standing(self._text(row, '.tableCellParticipant__name'),
+                                    self._text(row, '.tableCellRank'),
+                                    [cell.get_text(strip=True) for cell in row.select('.table__cell--value')])
+                     for row in soup.select('div.ui-table__row'))
+        return [standing for standing in standings if standing]
+
+    # Rows shared by both parsers; ``text(cls)`` is the text of the row's first .cls descendant
+
+    def _match(self, text_of: Callable[[str], str], row_classes: List[str], now: datetime) -> Optional[ScrapedMatch]:
+        home = text_of('event__participant--home')
+        away = text_of('event__participant--away')
+        if not home or not away:
+            return None
+
+        if 'event__match--live' in row_classes:
+            status = 'live'
+        elif 'event__match--scheduled' in row_classes:
+            status = 'upcoming'
+        else:
+            status = 'finished'
+
+        minute = None
+        if status == 'live':
+            minute = _int(text_of('event__stage--block').rstrip("'").split('+')[0], None)
+
+        # Dates are shown as "dd.mm. HH:MM" without a year
+        match_date = None
+        shown = text_of('event__time')
+        try:
+            match_date = datetime.strptime(f"{now.year}.{shown}", '%Y.%d.%m. %H:%M')
+        except ValueError:
+            pass
+        if match_date and status == 'finished' and match_date > now:
+            match_date = match_date.replace(year=now.year - 1)
+
+        return ScrapedMatch(
+            home_team_name=home,
+            away_team_name=away,
+            home_score=_int(text_of('event__score--home'), None) if status != 'upcoming' else None,
+            away_score=_int(text_of('event__score--away'), None) if status != 'upcoming' else None,
+            status=status,
+            match_date=match_date,
+            minute=minute,
+        )
+
+    @staticmethod
+    def _standing(name: str, rank: str, values: List[str]) -> Optional[ScrapedStanding]:
+        if not name or len(values) < 7:
+            return None
+        goals_for, _, goals_against = values[4].partition(':')
+        return ScrapedStanding(
+            team_name=name,
+            position=_int(rank.rstrip('.')),
+            matches_played=_int(values[0]),
+            wins=_int(values[1]),
+            draws=_int(values[2]),
+            losses=_int(values[3]),
+            goals_for=_int(goals_for),
+            goals_against=_int(goals_against),
+            goal_difference=_int(values[5]),
+            points=_int(values[6]),
+        )
+
+
+def _parse_iso(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+DEFAULT_SOURCES = (EspnSource, SoccerwaySource, FlashscoreSource)
+
+
+class IngestionEngine:
+    """Fetches every source concurrently over one shared keep-alive session.
+
+    Requests to the same host are capped by a per-host semaphore, failed
+    fetches are retried with full-jitter exponential backoff, and each source
+    runs under its own timeout so a slow site only costs its own data.
+    Blocking HTTP and parsing run on a dedicated thread pool, which keeps the
+    event loop free to drive the other sources. Only sources that declare
+    ``requires_browser`` go through ``browser_pool``; without one they fail
+    as "browser unavailable" and the rest of the run is unaffected. Pages are
+    fetched conditionally against ``page_cache``, and pages that have not
+    changed are not parsed, so they add nothing to a source's data.
+    """
+
+    def __init__(self, sources: Optional[List[Source]] = None, per_host_limit: int = 2,
+                 retries: int = 3, backoff_base: float = 0.5, backoff_cap: float = 8.0,
+                 connect_timeout: float = 5.0, read_timeout: float = 15.0,
+                 browser_pool: Optional[BrowserPool] = None, page_cache: Optional[PageCache] = None,
+                 refresh_after: float = 86400.0):
+        self.sources = list(sources) if sources is not None else [cls() for cls in DEFAULT_SOURCES]
+        self.browser_pool = browser_pool
+        self.page_cache = page_cache or PageCache()
+        # Page states older than this are ignored, so every page is re-read in full now and then
+        self.refresh_after = refresh_after
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(per_host_limit, 4))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max(8, per_host_limit * 4),
+                                            thread_name_prefix='scraper')
+        # Semaphores belong to the loop that created them, so every loop (one
+        # per scrape() call, one per scheduler job) gets its own set
+        self._host_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+            weakref.WeakKeyDictionary()
+        self._host_limits_lock = threading.Lock()
+
+    def scrape(self) -> Dict[str, SourceResult]:
+        """Blocking entry point: run every source once and return per-source results"""
+        return asyncio.run(self.run())
+
+    async def run(self, sources: Optional[List[Source]] = None) -> Dict[str, SourceResult]:
+        sources = sources if sources is not None else self.sources
+        results = await asyncio.gather(*(self._run_source(source) for source in sources))
+        return {result.source: result for result in results}
+
+    @staticmethod
+    def merge(results: Dict[str, SourceResult], resolver: Optional[TeamResolver] = None) -> ScrapedData:
+        """Combine successful sources in run order and drop duplicates, naming teams with ``resolver`` if given"""
+        combined = ScrapedData()
+        for result in results.values():
+            if result.ok:
+                combined.extend(result.data)
+        return combined.deduplicated(resolver.resolve if resolver is not None else None)
+
+    async def _run_source(self, source: Source) -> SourceResult:
+        result = SourceResult(source=source.name)
+        started = time.monotonic()
+        outcome = 'ok'
+        try:
+            await asyncio.wait_for(self._collect(source, result), timeout=source.timeout)
+            if result.changed or not result.unchanged:
+                print(f"✅ Source {source.name} scraped successfully")
+            else:
+                print(f"✅ Source {source.name} unchanged")
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            result.error = f"timed out after {source.timeout:.1f}s"
+            print(f"❌ Source {source.name} failed: {result.error}")
+        except Exception as e:
+            outcome = 'error'
+            result.error = str(e) or e.__class__.__name__
+            print(f"❌ Source {source.name} failed: {result.error}")
+        finally:
+            result.duration = time.monotonic() - started
+            SCRAPE_DURATION.observe(result.duration, source=source.name, outcome=outcome)
+            SCRAPE_REQUESTS.inc(result.requests, source=source.name)
+            SCRAPE_BYTES.inc(result.bytes, source=source.name)
+            for kind in ('matches', 'standings', 'players'):
+                SCRAPE_ROWS.inc(len(getattr(result.data, kind)), source=source.name, kind=kind)
+        return result
+
+    async def _collect(self, source: Source, result: SourceResult):
+        async def page(kind: str, url: str):
+            if source.requires_browser:
+                body = await self.render(url, source.wait_for.get(kind), source.timeout, result)
+            else:
+                body = await self.fetch(url, result)
+            if body is None:
+                # Same as the stored page: nothing to parse or write
+                return ScrapedData()
+            return await self._in_thread(source.parse, kind, body)
+
+        pages = await asyncio.gather(*(page(kind, url) for kind, url in source.endpoints.items()))
+        for data in pages:
+            result.data.extend(data)
+
+    async def fetch(self, url: str, result: Optional[SourceResult] = None) -> Optional[str]:
+        """GET ``url`` under its host's concurrency limit, retrying transient failures.
+
+        As part of a run (``result`` given) the request carries the stored
+        page's ETag / Last-Modified, and None is returned when the page has
+        not changed since: a 304, or a body that hashes the same.
+        """
+        limit = self._host_limit(urlsplit(url).netloc)
+        state = await self._page_state(url) if result is not None else None
+        headers = {}
+        if state is not None and state.etag:
+            headers['If-None-Match'] = state.etag
+        if state is not None and state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt, last_error))
+            try:
+                async with limit:
+                    if result is not None:
+                        result.requests += 1
+                    response = await self._in_thread(
+                        self.session.get, url, headers=headers, timeout=(self.connect_timeout, self.read_timeout))
+                if response.status_code in RETRYABLE_STATUS:
+                    last_error = _RetryableStatus(response)
+                    continue
+                if response.status_code == 304 and headers:
+                    self._count_page(result, 'not_modified')
+                    return None
+                response.raise_for_status()
+                if result is None:
+                    return response.text
+                result.bytes += len(response.content)
+                page = PageState(response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                                 hashlib.sha256(response.content).hexdigest())
+                return response.text if self._record(url, state, page, result) else None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+            except requests.HTTPError as e:
+                raise FetchError(f"{url}: {e}") from e
+
+        raise FetchError(f"{url}: {last_error} (after {self.retries} attempts)")
+
+    async def render(self, url: str, wait_css: Optional[str], timeout: float,
+                     result: Optional[SourceResult] = None) -> Optional[str]:
+        """Load ``url`` through the browser pool (JavaScript-rendered pages only).
+
+        As part of a run, None is returned when the rendered page is unchanged.
+        """
+        if self.browser_pool is None or not self.browser_pool.available:
+            raise BrowserUnavailable("browser unavailable")
+        if result is None:
+            return await self._in_thread(self.browser_pool.render, url, wait_css, timeout)
+        result.requests += 1
+        state = await self._page_state(url)
+        body = await self._in_thread(self.browser_pool.render, url, wait_css, timeout)
+        page = PageState(digest=hashlib.sha256(body.encode()).hexdigest())
+        return body if self._record(url, state, page, result) else None
+
+    def commit(self, result: SourceResult):
+        """Remember the pages of a run once the caller has stored its data"""
+        for url, state in result.pages.items():
+            self.page_cache.put(url, state)
+        result.pages = {}
+
+    async def _page_state(self, url: str) -> Optional[PageState]:
+        state = await self._in_thread(self.page_cache.get, url)
+        if state is None or time.time() - state.stored_at > self.refresh_after:
+            return None
+        return state
+
+    def _record(self, url: str, stored: Optional[PageState], page: PageState, result: SourceResult) -> bool:
+        """Keep the new state of a downloaded page; False if its content is what was stored"""
+        if stored is not None and stored.digest == page.digest:
+            if (page.etag, page.last_modified) != (stored.etag, stored.last_modified):
+                # Same content under new validators: send those next time
+                result.pages[url] = page
+            self._count_page(result, 'unchanged')
+            return False
+        result.pages[url] = page
+        self._count_page(result, 'changed')
+        return True
+
+    @staticmethod
+    def _count_page(result: SourceResult, outcome: str):
+        if outcome == 'changed':
+            result.changed += 1
+        else:
+            result.unchanged += 1
+        SCRAPE_PAGES.inc(source=result.source, outcome=outcome)
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._host_limits_lock:
+            limits = self._host_limits.get(loop)
+            if limits is None:
+                limits = self._host_limits[loop] = {}
+            return limits.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+
+    def _backoff(self, attempt: int, error: Optional[Exception]) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After"""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        if isinstance(error, _RetryableStatus) and error.retry_after is not None:
+            delay = max(delay, min(error.retry_after, self.backoff_cap))
+        return delay
+
+    async def _in_thread(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    def close(self):
+        self.session.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: requests.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.retry_after = _int(response.headers.get('Retry-After'), None)
+
+
+def main():
+    """Run every source once, optionally against recorded fixtures, and print a summary"""
+    import argparse
+    from fixture_server import FixtureServer
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fixtures', help='serve recorded pages from this directory instead of the live sites')
+    args = parser.parse_args()
+
+    server = FixtureServer(args.fixtures) if args.fixtures else None
+    sources = [cls() for cls in DEFAULT_SOURCES]
+    if server:
+        server.start()
+        for source in sources:
+            source.endpoints = {kind: server.url_for(source.name, kind) for kind in source.endpoints}
+
+    browser_pool = BrowserPool.from_env() if any(s.requires_browser for s in sources) else None
+    engine = IngestionEngine(sources, browser_pool=browser_pool)
+    try:
+        results = engine.scrape()
+        for result in results.values():
+            print(f"  {result.source}: {len(result.data.matches)} matches, {len(result.data.standings)} standings, "
+                  f"{len(result.data.players)} players in {result.duration * 1000:.0f} ms "
+                  f"({result.requests} requests){' - ' + result.error if result.error else ''}")
+        merged = engine.merge(results)
+        print(f"📊 Merged: {len(merged.matches)} matches, {len(merged.standings)} standings, {len(merged.players)} players")
+    finally:
+        engine.close()
+        if browser_pool:
+            browser_pool.close()
+        if server:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Seasons: which season a match belongs to, the per-season partitions of
+matches, and archiving of closed seasons
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Liga MX seasons run from the Apertura in July to the end of the Clausura
+# in May; a season is named after its two years, e.g. '2024-25'
+SEASON_START_MONTH = 7
+
+# Closed seasons are moved here, out of every query on the live tables
+ARCHIVE_SCHEMA = 'archive'
+
+# Second key of the advisory lock taken while a season's partition is created
+SEASON_LOCK_CLASS = 7243003
+
+_SEASON = re.compile(r'^(\d{4})-(\d{2})$')
+
+# Matches are partitioned by match_date, one range partition per season, so
+# a query bounded by a season's dates only ever reads that season.
+# football_ensure_season() creates the seasons row and partition on first
+# use; nothing can be written to an archived season.
+SEASON_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS seasons (
+        season TEXT PRIMARY KEY,
+        starts_at TIMESTAMP NOT NULL,
+        ends_at TIMESTAMP NOT NULL,
+        archived_at TIMESTAMP
+    )
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION football_season_of(moment TIMESTAMP) RETURNS TEXT AS $$
+        SELECT to_char(start_year, 'FM0000') || '-' || to_char((start_year + 1) % 100, 'FM00')
+        FROM (SELECT extract(year FROM moment)::int
+                     - CASE WHEN extract(month FROM moment) < {SEASON_START_MONTH} THEN 1 ELSE 0 END
+              AS start_year) s
+    $$ LANGUAGE sql IMMUTABLE
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION football_ensure_season(name TEXT) RETURNS VOID AS $$
+    DECLARE
+        starts TIMESTAMP;
+        archived TIMESTAMP;
+        partition_table TEXT := 'matches_s' || replace(name, '-', '_');
+    BEGIN
+        IF name !~ '^\\d{{4}}-\\d{{2}}$' THEN
+            RAISE EXCEPTION 'invalid season name %', name;
+        END IF;
+        SELECT archived_at INTO archived FROM seasons WHERE season = name;
+        IF archived IS NOT NULL THEN
+            RAISE EXCEPTION 'season % is archived', name;
+        ELSIF FOUND AND to_regclass(partition_table) IS NOT NULL THEN
+            RETURN;
+        END IF;
+
+        -- Two writers may meet a new season at once; one creates it
+        PERFORM pg_advisory_xact_lock({SEASON_LOCK_CLASS}, hashtext(name));
+        starts := make_timestamp(left(name, 4)::int, {SEASON_START_MONTH}, 1, 0, 0, 0);
+        INSERT INTO seasons (season, starts_at, ends_at) VALUES (name, starts, starts + INTERVAL '1 year')
+        ON CONFLICT (season) DO NOTHING;
+        IF to_regclass(partition_table) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF matches FOR VALUES FROM (%L) TO (%L)',
+                           partition_table, starts, starts + INTERVAL '1 year');
+        END IF;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # For bulk loads in SQL: every season between two dates
+    """
+    CREATE OR REPLACE FUNCTION football_ensure_seasons(first TIMESTAMP, last TIMESTAMP) RETURNS VOID AS $$
+    DECLARE
+        name TEXT;
+    BEGIN
+        FOR name IN
+            SELECT football_season_of(moment)
+            FROM generate_series(first, GREATEST(first, last), INTERVAL '1 month') moment
+            UNION SELECT football_season_of(last)
+        LOOP
+            PERFORM football_ensure_season(name);
+        END LOOP;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+
+def season_of(moment: datetime) -> str:
+    """Name of the season ``moment`` falls in; mirrors football_season_of()"""
+    start_year = moment.year - (1 if moment.month < SEASON_START_MONTH else 0)
+    return f"{start_year:04d}-{(start_year + 1) % 100:02d}"
+
+
+def current_season() -> str:
+    """The season being played now, or CURRENT_SEASON if set"""
+    return os.getenv('CURRENT_SEASON') or season_of(datetime.now())
+
+
+def season_bounds(season: str) -> Tuple[datetime, datetime]:
+    """[start, end) of a season; ValueError for anything but a 'YYYY-YY' season name"""
+    match = _SEASON.match(season or '')
+    if not match or (int(match.group(1)) + 1) % 100 != int(match.group(2)):
+        raise ValueError(f"invalid season: {season!r}; expected e.g. '2024-25'")
+    starts = datetime(int(match.group(1)), SEASON_START_MONTH, 1)
+    return starts, starts.replace(year=starts.year + 1)
+
+
+def partition_name(season: str) -> str:
+    season_bounds(season)
+    return f"matches_s{season.replace('-', '_')}"
+
+
+def _moment(value: Any) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def ensure_partitions(conn, rows: Iterable[Dict[str, Any]]):
+    """Create the seasons and partitions the match rows fall in, inside the caller's transaction"""
+    dates = [_moment(row['match_date']) for row in rows if row.get('match_date') is not None]
+    if not dates:
+        return
+    names = sorted({season_of(moment) for moment in dates})
+    with conn.cursor() as cur:
+        cur.execute("SELECT football_ensure_season(name) FROM unnest(%s::text[]) AS name", (names,))
+
+
+def list_seasons(conn) -> List[Dict[str, Any]]:
+    """Every known season, newest first, with its match count and whether it is archived"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT s.season, s.starts_at, s.ends_at, s.archived_at,
+                   (SELECT count(*) FROM standings st WHERE st.season = s.season) AS standings,
+                   (SELECT count(*) FROM players p WHERE p.season = s.season) AS players
+            FROM seasons s ORDER BY s.season DESC
+        """)
+        rows = [dict(row) for row in cur.fetchall()]
+        for row in rows:
+            if row['archived_at'] is None:
+                cur.execute(f"SELECT count(*) AS n FROM {partition_name(row['season'])}")
+                row['matches'] = _first(cur.fetchone())
+            else:
+                row['matches'] = None
+    return rows
+
+
+def archive_season(conn, season: str) -> Dict[str, int]:
+    """Move a closed season out of the live tables, into the archive schema.
+
+    The season's partition is detached and moved as a whole; its standings
+    and player rows are moved into archive.standings and archive.players.
+    A season that has not ended, or still has matches to finish, is refused.
+    Commits on success.
+    """
+    from change_feed import announce
+
+    partition = partition_name(season)
+    if season == current_season() or season_bounds(season)[1] > datetime.now():
+        raise ValueError(f"{season} has not ended")
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT archived_at FROM seasons WHERE season = %s FOR UPDATE", (season,))
+            row = cur.fetchone()
+            if row is None:
+                raise ValueError(f"unknown season {season}")
+            if _first(row) is not None:
+                raise ValueError(f"{season} is already archived")
+            cur.execute(f"SELECT count(*) FROM {partition} WHERE status <> 'finished'")
+            if _first(cur.fetchone()):
+                raise ValueError(f"{season} still has matches that are not finished")
+
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+            counts = {}
+            for table in ('standings', 'players'):
+                cur.execute(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{table} (LIKE {table})")
+                cur.execute(f"""
+                    WITH moved AS (DELETE FROM {table} WHERE season = %s RETURNING *)
+                    INSERT INTO {ARCHIVE_SCHEMA}.{table} SELECT * FROM moved
+                """, (season,))
+                counts[table] = cur.rowcount
+            cur.execute(f"SELECT count(*) FROM {partition}")
+            counts['matches'] = _first(cur.fetchone())
+            cur.execute(f"ALTER TABLE matches DETACH PARTITION {partition}")
+            cur.execute(f"ALTER TABLE {partition} SET SCHEMA {ARCHIVE_SCHEMA}")
+            cur.execute("UPDATE seasons SET archived_at = NOW() WHERE season = %s", (season,))
+            # Detaching fires no trigger; tell the other workers their matches changed
+            announce(cur, 'matches', 'DETACH')
+            announce(cur, 'seasons', 'UPDATE')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return counts
+
+
+def restore_season(conn, season: str) -> Dict[str, int]:
+    """Bring an archived season back into the live tables; commits on success"""
+    from change_feed import announce
+
+    partition = partition_name(season)
+    starts, ends = season_bounds(season)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT archived_at FROM seasons WHERE season = %s FOR UPDATE", (season,))
+            row = cur.fetchone()
+            if row is None or _first(row) is None:
+                raise ValueError(f"{season} is not archived")
+
+            cur.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{partition} SET SCHEMA public")
+            cur.execute(f"ALTER TABLE matches ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)",
+                        (starts, ends))
+            counts = {}
+            for table in ('standings', 'players'):
+                cur.execute(f"""
+                    WITH moved AS (DELETE FROM {ARCHIVE_SCHEMA}.{table} WHERE season = %s RETURNING *)
+                    INSERT INTO {table} SELECT * FROM moved
+                """, (season,))
+                counts[table] = cur.rowcount
+            cur.execute(f"SELECT count(*) FROM {partition}")
+            counts['matches'] = _first(cur.fetchone())
+            cur.execute("UPDATE seasons SET archived_at = NULL WHERE season = %s", (season,))
+            announce(cur, 'matches', 'ATTACH')
+            announce(cur, 'seasons', 'UPDATE')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return counts
+
+
+def _first(row) -> Any:
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+
+def main():
+    """List seasons, or archive / restore one"""
+    import argparse
+    import sys
+    from populate_db import get_db_connection
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--archive', metavar='SEASON', help='move a closed season into the archive schema')
+    group.add_argument('--restore', metavar='SEASON', help='bring an archived season back')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        if args.archive or args.restore:
+            season = args.archive or args.restore
+            try:
+                counts = archive_season(conn, season) if args.archive else restore_season(conn, season)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            moved = ', '.join(f"{count} {table}" for table, count in counts.items())
+            print(f"✅ {'Archived' if args.archive else 'Restored'} {season}: {moved}")
+            return
+
+        current = current_season()
+        for row in list_seasons(conn):
+            state = f"archived {row['archived_at']:%Y-%m-%d}" if row['archived_at'] else \
+                f"{row['matches']} matches"
+            marker = ' (current)' if row['season'] == current else ''
+            print(f"  {row['season']}{marker}: {state}, {row['standings']} standings, {row['players']} players")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
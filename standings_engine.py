@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Incremental standings engine: derives the league table from finished matches
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Any
+
+from bulk_writer import bulk_upsert
+from seasons import current_season, season_bounds, season_of
+
+
+class TeamRecord:
+    """Running aggregates for one team"""
+    __slots__ = ('team_id', 'played', 'wins', 'draws', 'losses',
+                 'goals_for', 'goals_against', 'away_goals', 'points')
+
+    def __init__(self, team_id: int):
+        self.team_id = team_id
+        self.played = 0
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.goals_for = 0
+        self.goals_against = 0
+        self.away_goals = 0
+        self.points = 0
+
+    @property
+    def goal_difference(self) -> int:
+        return self.goals_for - self.goals_against
+
+    def add(self, scored: int, conceded: int, away: bool, sign: int = 1):
+        """Apply (sign=1) or reverse (sign=-1) one result"""
+        self.played += sign
+        self.goals_for += sign * scored
+        self.goals_against += sign * conceded
+        if away:
+            self.away_goals += sign * scored
+        if scored > conceded:
+            self.wins += sign
+            self.points += sign * 3
+        elif scored == conceded:
+            self.draws += sign
+            self.points += sign
+        else:
+            self.losses += sign
+
+
+# A recorded result: (home_id, away_id, home_score, away_score)
+Result = Tuple[int, int, int, int]
+
+# Match columns the engine needs, e.g. as RETURNING columns of a matches upsert
+MATCH_COLUMNS = ('id', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'status', 'match_date')
+
+COLUMNS = ('team_id', 'position', 'matches_played', 'wins', 'draws', 'losses',
+           'goals_for', 'goals_against', 'goal_difference', 'points', 'season')
+
+
+def _row_key(row: Mapping[str, Any]) -> Tuple:
+    return tuple(row.get(column) for column in COLUMNS)
+
+
+class StandingsEngine:
+    """League table maintained from match results as O(1) deltas.
+
+    Every applied result is remembered by match id, so a score correction
+    reverses the old delta before applying the new one, and re-applying an
+    unchanged result is a no-op. Ranking is lazy and follows the Liga MX
+    tie-break order: points, goal difference, goals scored, head-to-head
+    points among the tied clubs, away goals, then team id as a stable stand-in
+    for fair play and the draw. ``changed_rows`` only returns teams whose
+    stored row differs from what was last flushed. The table is for one
+    season (the current one by default); matches of other seasons are
+    ignored.
+    """
+
+    def __init__(self, team_ids: Iterable[int], season: Optional[str] = None):
+        self.season = season or current_season()
+        self.records: Dict[int, TeamRecord] = {team_id: TeamRecord(team_id) for team_id in team_ids}
+        self._results: Dict[int, Result] = {}
+        # Points the first team took off the second in their meetings
+        self._h2h: Dict[Tuple[int, int], int] = {}
+        self._order: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._dirty = True
+        self._flushed: Dict[int, Tuple] = {}
+
+    @classmethod
+    def from_matches(cls, team_ids: Iterable[int], matches: Iterable[Mapping[str, Any]],
+                     season: Optional[str] = None) -> "StandingsEngine":
+        """Full rebuild from match rows; only finished matches count"""
+        engine = cls(team_ids, season)
+        for match in matches:
+            engine.apply_match(match)
+        return engine
+
+    def apply_match(self, match: Mapping[str, Any]):
+        """Apply a match row: finished matches of the season count, anything else is withdrawn"""
+        if match.get('match_date') is not None and season_of(match['match_date']) != self.season:
+            self.remove(match['id'])
+        elif match.get('status') == 'finished' and match.get('home_score') is not None \
+                and match.get('away_score') is not None:
+            self.apply(match['id'], match['home_team_id'], match['away_team_id'],
+                       match['home_score'], match['away_score'])
+        else:
+            self.remove(match['id'])
+
+    def apply(self, match_id: int, home_id: int, away_id: int, home_score: int, away_score: int):
+        """Record a final score; replaces any earlier score for the same match"""
+        result = (home_id, away_id, home_score, away_score)
+        previous = self._results.get(match_id)
+        if previous == result:
+            return
+        if previous is not None:
+            self._apply(previous, -1)
+        self._results[match_id] = result
+        self._apply(result, 1)
+
+    def remove(self, match_id: int):
+        """Withdraw a match (deleted, or no longer finished)"""
+        previous = self._results.pop(match_id, None)
+        if previous is not None:
+            self._apply(previous, -1)
+
+    def _apply(self, result: Result, sign: int):
+        home_id, away_id, home_score, away_score = result
+        for team_id in (home_id, away_id):
+            if team_id not in self.records:
+                self.records[team_id] = TeamRecord(team_id)
+        self.records[home_id].add(home_score, away_score, away=False, sign=sign)
+        self.records[away_id].add(away_score, home_score, away=True, sign=sign)
+
+        home_points = 3 if home_score > away_score else 1 if home_score == away_score else 0
+        away_points = 3 if away_score > home_score else 1 if home_score == away_score else 0
+        self._h2h[(home_id, away_id)] = self._h2h.get((home_id, away_id), 0) + sign * home_points
+        self._h2h[(away_id, home_id)] = self._h2h.get((away_id, home_id), 0) + sign * away_points
+        self._dirty = True
+
+    def ranking(self) -> List[int]:
+        """Team ids in table order"""
+        if self._dirty:
+            self._rank()
+        return list(self._order)
+
+    def _rank(self):
+        def primary(team_id):
+            r = self.records[team_id]
+            return (-r.points, -r.goal_difference, -r.goals_for)
+
+        order = sorted(self.records, key=primary)
+        ranked: List[int] = []
+        i = 0
+        while i < len(order):
+            j = i + 1
+            while j < len(order) and primary(order[j]) == primary(order[i]):
+                j += 1
+            group = order[i:j]
+            if len(group) > 1:
+                members = set(group)
+                group.sort(key=lambda t: (
+                    -sum(self._h2h.get((t, o), 0) for o in members if o != t),
+                    -self.records[t].away_goals,
+                    t,
+                ))
+            ranked.extend(group)
+            i = j
+
+        self._order = ranked
+        self._positions = {team_id: index + 1 for index, team_id in enumerate(ranked)}
+        self._dirty = False
+
+    def row(self, team_id: int) -> Dict[str, Any]:
+        if self._dirty:
+            self._rank()
+        r = self.records[team_id]
+        return {
+            'team_id': team_id,
+            'position': self._positions[team_id],
+            'matches_played': r.played,
+            'wins': r.wins,
+            'draws': r.draws,
+            'losses': r.losses,
+            'goals_for': r.goals_for,
+            'goals_against': r.goals_against,
+            'goal_difference': r.goal_difference,
+            'points': r.points,
+            'season': self.season,
+        }
+
+    def table(self) -> List[Dict[str, Any]]:
+        return [self.row(team_id) for team_id in self.ranking()]
+
+    def changed_rows(self) -> List[Dict[str, Any]]:
+        """Rows that differ from the last flush (or mark_flushed)"""
+        changed = []
+        for row in self.table():
+            if self._flushed.get(row['team_id']) != _row_key(row):
+                changed.append(row)
+        return changed
+
+    def mark_flushed(self, rows: Optional[Iterable[Mapping[str, Any]]] = None):
+        """Record ``rows`` (default: the whole table) as what storage now holds"""
+        for row in rows if rows is not None else self.table():
+            if row.get('season', self.season) == self.season:
+                self._flushed[row['team_id']] = _row_key(row)
+
+    def flush(self, conn) -> int:
+        """Write changed rows with the bulk upsert path, inside the caller's transaction"""
+        rows = self.changed_rows()
+        if rows:
+            bulk_upsert(conn, 'standings', rows)
+            self.mark_flushed(rows)
+        return len(rows)
+
+    def diff(self, stored: Iterable[Mapping[str, Any]]) -> List[Tuple[int, str, Any, Any]]:
+        """Compare stored standings rows against this table: (team_id, column, stored, derived)"""
+        derived = {row['team_id']: row for row in self.table()}
+        problems = []
+        seen = set()
+        for row in stored:
+            if row.get('season', self.season) != self.season:
+                continue
+            team_id = row['team_id']
+            seen.add(team_id)
+            expected = derived.get(team_id)
+            if expected is None:
+                problems.append((team_id, 'row', 'present', None))
+                continue
+            for column, value in expected.items():
+                if row.get(column) != value:
+                    problems.append((team_id, column, row.get(column), value))
+        for team_id in derived.keys() - seen:
+            problems.append((team_id, 'row', None, 'present'))
+        return problems
+
+
+def load_engine(conn, season: Optional[str] = None) -> StandingsEngine:
+    """Build an engine from the teams and the season's finished matches currently stored.
+
+    Stored standings rows are marked as flushed, so the first flush only
+    rewrites rows that disagree with the matches.
+    """
+    season = season or current_season()
+    starts, ends = season_bounds(season)
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM teams")
+        team_ids = [row['id'] for row in cur.fetchall()]
+        # Bounded by the season's dates, so only its partition is read
+        cur.execute(f"""
+            SELECT {', '.join(MATCH_COLUMNS)}
+            FROM matches WHERE status = 'finished' AND match_date >= %s AND match_date < %s
+        """, (starts, ends))
+        engine = StandingsEngine.from_matches(team_ids, cur.fetchall(), season)
+        cur.execute("SELECT * FROM standings WHERE season = %s", (season,))
+        engine.mark_flushed(cur.fetchall())
+    return engine
+
+
+def main():
+    """Offline check: rebuild the table from matches and compare with storage"""
+    import argparse
+    import sys
+    from populate_db import get_db_connection
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--season', default=current_season())
+    parser.add_argument('--write', action='store_true', help='overwrite stored standings with the rebuilt table')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        engine = load_engine(conn, args.season)
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM standings WHERE season = %s", (args.season,))
+            problems = engine.diff(cur.fetchall())
+
+        for team_id, column, stored, derived in problems:
+            print(f"  team {team_id}: {column} stored={stored} derived={derived}")
+
+        if args.write:
+            written = engine.flush(conn)
+            conn.commit()
+            print(f"✅ Wrote {written} standings rows")
+        elif problems:
+            print(f"❌ {len(problems)} standings differences")
+            sys.exit(1)
+        else:
+            print("✅ Standings match finished matches")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
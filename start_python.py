@@ -1,27 +1,133 @@
 #!/usr/bin/env python3
 """
 Start script for Python Flask application
+
+By default the app is served by gunicorn: migrations run once in the master,
+then the preloaded app is forked into WEB_CONCURRENCY workers with
+WEB_THREADS threads each. Live SSE streams each hold a thread there, so
+a worker accepts at most LIVE_STREAM_LIMIT of them (default WEB_THREADS / 2)
+and answers 503 past that. ``--asgi`` serves asgi_app under uvicorn instead
+(event-loop workers on asyncpg, no stream cap), and ``--dev`` runs the Flask
+development server. With SCRAPE_SCHEDULER=1 every worker also runs the scrape scheduler.
 """
 
 import os
 import subprocess
 import sys
 
+
+def default_workers() -> int:
+    # Every worker holds its own pool (DB_POOL_MAX) plus a change feed connection
+    return min(2 * (os.cpu_count() or 1) + 1, 8)
+
+
+def _start_scheduler(worker):
+    # Threads don't survive fork, so every worker starts its own scheduler;
+    # the per-source advisory locks keep them from scraping twice
+    from app import start_scheduler
+    start_scheduler()
+
+
+def serve(bind: str, workers: int, threads: int, timeout: int, preload: bool = True,
+          max_requests: int = 0):
+    """Run app:app under gunicorn with the gthread worker"""
+    from gunicorn.app.base import BaseApplication
+
+    class FootballApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': bind,
+                'workers': workers,
+                'threads': threads,
+                # An SSE stream still holds one thread for as long as it is open, so
+                # each worker serves at most LIVE_STREAM_LIMIT streams (503 beyond);
+                # --asgi serves them without a thread each
+                'worker_class': 'gthread',
+                'timeout': timeout,
+                'graceful_timeout': timeout,
+                'keepalive': 5,
+                # Import app.py once in the master so workers share its pages copy-on-write
+                'preload_app': preload,
+                'max_requests': max_requests,
+                'max_requests_jitter': max_requests // 10,
+                'accesslog': os.getenv('GUNICORN_ACCESS_LOG'),
+                'post_worker_init': _start_scheduler,
+            }
+            for key, value in options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+    FootballApplication().run()
+
+
+def serve_asgi(host: str, port: int, workers: int, timeout: int):
+    """Run asgi_app:app under uvicorn; one event loop per worker process"""
+    import resource
+    import uvicorn
+
+    # Every open stream is a socket; allow as many as the hard limit does
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    uvicorn.run('asgi_app:app', host=host, port=port, workers=workers,
+                timeout_keep_alive=5, timeout_graceful_shutdown=timeout,
+                access_log=bool(os.getenv('GUNICORN_ACCESS_LOG')), backlog=2048)
+
+
 def main():
     """Start the Python Flask application"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--dev', action='store_true', help='run the Flask development server instead')
+    parser.add_argument('--asgi', action='store_true', help='serve the async API under uvicorn instead')
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', default_workers())))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', 4)))
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('WEB_TIMEOUT', 30)))
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('WEB_MAX_REQUESTS', 0)),
+                        help='recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--no-preload', action='store_true', help='import the app in every worker')
+    parser.add_argument('--skip-migrate', action='store_true', help="don't apply pending migrations first")
+    args = parser.parse_args()
+
     print("🚀 Starting Football App (Python Version)...")
-    
-    # Set environment variables
-    os.environ['FLASK_APP'] = 'app.py'
-    os.environ['FLASK_ENV'] = 'development'
-    
-    # Start the Flask application
-    try:
-        subprocess.run([sys.executable, 'app.py'], check=True)
-    except KeyboardInterrupt:
-        print("\n👋 Server stopped")
-    except Exception as e:
-        print(f"❌ Error starting server: {e}")
+
+    if args.dev:
+        # Set environment variables
+        os.environ['FLASK_APP'] = 'app.py'
+        os.environ['FLASK_ENV'] = 'development'
+        os.environ['PORT'] = str(args.port)
+        try:
+            subprocess.run([sys.executable, 'app.py'], check=True)
+        except KeyboardInterrupt:
+            print("\n👋 Server stopped")
+        except Exception as e:
+            print(f"❌ Error starting server: {e}")
+        return
+
+    if not args.skip_migrate:
+        from app import migrate_database
+        try:
+            migrate_database()
+        except Exception as e:
+            print(f"❌ Error applying migrations: {e}")
+            sys.exit(1)
+
+    if args.asgi:
+        print(f"⚡ uvicorn on 0.0.0.0:{args.port}: {args.workers} workers")
+        serve_asgi('0.0.0.0', args.port, args.workers, args.timeout)
+        return
+
+    print(f"🧵 gunicorn on 0.0.0.0:{args.port}: {args.workers} workers x {args.threads} threads")
+    serve(f"0.0.0.0:{args.port}", args.workers, args.threads, args.timeout,
+          preload=not args.no_preload, max_requests=args.max_requests)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
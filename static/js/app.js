@@ -9,6 +9,9 @@ class FootballApp {
     this.apiCache = new Map();
     this.autoRefresh = true;
     this.refreshIntervals = [];
+    this.liveStream = null;
+    this.liveStreamFailed = false;
+    this.liveRenderTimer = null;
     
     this.init();
   }
@@ -234,6 +237,9 @@ class FootballApp {
     console.log('📍 Navigating to:', page);
     
     this.currentPage = page;
+    if (!['dashboard', 'live'].includes(page)) {
+      this.stopAutoRefresh();
+    }
     
     // Update active nav link
     document.querySelectorAll('.nav-link').forEach(link => {
@@ -457,9 +463,15 @@ class FootballApp {
   }
 
   startAutoRefresh() {
-    this.stopAutoRefresh();
-    
-    if (this.autoRefresh && ['dashboard', 'live'].includes(this.currentPage)) {
+    if (!this.autoRefresh || !['dashboard', 'live'].includes(this.currentPage)) {
+      this.stopAutoRefresh();
+      return;
+    }
+
+    // Live scores are pushed by the server; polling is only the fallback
+    if (window.EventSource && !this.liveStreamFailed) {
+      this.openLiveStream();
+    } else if (this.refreshIntervals.length === 0) {
       const interval = setInterval(() => {
         this.refreshData();
       }, 30000); // Refresh every 30 seconds
@@ -471,6 +483,52 @@ class FootballApp {
   stopAutoRefresh() {
     this.refreshIntervals.forEach(interval => clearInterval(interval));
     this.refreshIntervals = [];
+    clearTimeout(this.liveRenderTimer);
+    if (this.liveStream) {
+      this.liveStream.close();
+      this.liveStream = null;
+    }
+  }
+
+  openLiveStream() {
+    if (this.liveStream) return;
+
+    const stream = new EventSource('/api/matches/live/stream');
+    ['snapshot', 'added', 'update', 'removed'].forEach(type => {
+      stream.addEventListener(type, event => this.applyLiveEvent(type, JSON.parse(event.data)));
+    });
+    stream.onerror = () => {
+      // EventSource reconnects (with Last-Event-ID) on its own; give up only once closed
+      if (stream.readyState === EventSource.CLOSED) {
+        console.warn('Live stream closed, falling back to polling');
+        this.liveStream = null;
+        this.liveStreamFailed = true;
+        this.startAutoRefresh();
+      }
+    };
+    this.liveStream = stream;
+  }
+
+  applyLiveEvent(type, data) {
+    const cacheKey = '/api/matches/live' + JSON.stringify({});
+    const cached = this.apiCache.get(cacheKey);
+    let matches = cached ? cached.data : [];
+
+    if (type === 'snapshot') {
+      matches = data;
+    } else if (type === 'added') {
+      matches = matches.filter(match => match.id !== data.id).concat([data]);
+    } else if (type === 'removed') {
+      matches = matches.filter(match => match.id !== data.id);
+    } else {
+      matches = matches.map(match => match.id === data.id ? { ...match, ...data } : match);
+    }
+
+    this.apiCache.set(cacheKey, { data: matches, timestamp: Date.now() });
+
+    // Coalesce bursts (e.g. several goals in one poll) into one re-render
+    clearTimeout(this.liveRenderTimer);
+    this.liveRenderTimer = setTimeout(() => this.loadPageContent(this.currentPage), 250);
   }
 
   toggleAutoRefresh() {
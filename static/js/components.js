@@ -184,7 +184,7 @@ Object.assign(FootballApp.prototype, {
               <div class="card p-6">
                 <div class="flex items-center justify-between mb-4">
                   <div class="w-12 h-12 rounded-full bg-primary text-primary-foreground flex items-center justify-center text-xl font-bold">
-                    ${index + 1}
+                    ${player.rank || index + 1}
                   </div>
                   <div class="text-right">
                     <div class="text-3xl font-bold">${player.goals}</div>
@@ -223,6 +223,16 @@ Object.assign(FootballApp.prototype, {
 
   async renderTeamProfile() {
     const team = this.selectedTeam;
+
+    // Standing, results, fixtures, form and scorers of this team in one small response
+    let overview = null;
+    try {
+      overview = await this.fetchAPI(`/api/teams/${team.slug}/overview`);
+    } catch (error) {
+      console.error('Error loading team overview:', error);
+    }
+    const standing = overview && overview.standing;
+    const form = overview ? overview.form : null;
     
     return `
       <div class="p-8">
@@ -268,6 +278,26 @@ Object.assign(FootballApp.prototype, {
               </div>
             </div>
 
+            ${overview ? `
+              <!-- Recent Results -->
+              <div class="card p-6 mb-6">
+                <h2 class="text-2xl font-bold mb-4">Últimos Resultados</h2>
+                ${overview.results.length > 0 ?
+                  overview.results.map(match => this.renderMatchCard(match)).join('') :
+                  '<p class="text-center text-gray-400 py-4">Sin resultados</p>'
+                }
+              </div>
+
+              <!-- Next Fixtures -->
+              <div class="card p-6 mb-6">
+                <h2 class="text-2xl font-bold mb-4">Próximos Partidos</h2>
+                ${overview.fixtures.length > 0 ?
+                  overview.fixtures.map(match => this.renderMatchCard(match)).join('') :
+                  '<p class="text-center text-gray-400 py-4">Sin partidos programados</p>'
+                }
+              </div>
+            ` : ''}
+
             <!-- Team Facts -->
             <div class="card p-6">
               <h2 class="text-2xl font-bold mb-4">Datos Curiosos</h2>
@@ -297,6 +327,56 @@ Object.assign(FootballApp.prototype, {
               </button>
             </div>
 
+            ${standing ? `
+              <!-- Standing -->
+              <div class="card p-6">
+                <h3 class="font-bold text-lg mb-4">Posición ${overview.season}</h3>
+                <div class="text-4xl font-bold mb-2">#${standing.position}</div>
+                <p class="text-sm text-gray-400 mb-4">${standing.points} pts · ${standing.matches_played} PJ</p>
+                <div class="grid grid-cols-3 gap-2 text-center text-sm">
+                  <div><p class="font-bold">${standing.wins}</p><p class="text-gray-400">G</p></div>
+                  <div><p class="font-bold">${standing.draws}</p><p class="text-gray-400">E</p></div>
+                  <div><p class="font-bold">${standing.losses}</p><p class="text-gray-400">P</p></div>
+                </div>
+              </div>
+            ` : ''}
+
+            ${form && form.played > 0 ? `
+              <!-- Form -->
+              <div class="card p-6">
+                <h3 class="font-bold text-lg mb-4">Racha</h3>
+                <div class="flex space-x-2 mb-2">
+                  ${form.form.split('').map(result => `
+                    <span class="w-8 h-8 rounded-full flex items-center justify-center text-sm font-bold ${
+                      result === 'W' ? 'bg-green-600' : result === 'L' ? 'bg-red-600' : 'bg-gray-600'
+                    }">${{ W: 'G', D: 'E', L: 'P' }[result]}</span>
+                  `).join('')}
+                </div>
+                <p class="text-sm text-gray-400">${form.goals_for} GF · ${form.goals_against} GC</p>
+              </div>
+            ` : ''}
+
+            ${overview && overview.top_scorers.length > 0 ? `
+              <!-- Top Scorers -->
+              <div class="card p-6">
+                <h3 class="font-bold text-lg mb-4">Goleadores</h3>
+                <div class="space-y-3">
+                  ${overview.top_scorers.map((player, index) => `
+                    <div class="flex items-center space-x-3">
+                      <div class="w-8 h-8 rounded-full bg-primary text-primary-foreground flex items-center justify-center text-sm font-bold">
+                        ${index + 1}
+                      </div>
+                      <div class="flex-1">
+                        <p class="font-medium">${player.name}</p>
+                        <p class="text-sm text-gray-400">${player.position || ''}</p>
+                      </div>
+                      <div class="text-xl font-bold">${player.goals}</div>
+                    </div>
+                  `).join('')}
+                </div>
+              </div>
+            ` : ''}
+
             <!-- Quick Actions -->
             <div class="card p-6">
               <h3 class="font-bold text-lg mb-4">Acciones Rápidas</h3>
@@ -323,10 +403,15 @@ Object.assign(FootballApp.prototype, {
 
   async renderMatches() {
     try {
-      const matches = await this.fetchAPI('/api/matches');
-      const liveMatches = matches.filter(m => m.status === 'live');
-      const upcomingMatches = matches.filter(m => m.status === 'upcoming');
-      const finishedMatches = matches.filter(m => m.status === 'finished');
+      // /api/matches is paginated; the tabs count from the dedicated endpoints
+      const [page, liveMatches, upcomingMatches, finishedPage] = await Promise.all([
+        this.fetchAPI('/api/matches', { limit: 10 }),
+        this.fetchAPI('/api/matches/live'),
+        this.fetchAPI('/api/matches/upcoming'),
+        this.fetchAPI('/api/matches', { status: 'finished', limit: 50 })
+      ]);
+      const matches = page.data;
+      const finishedCount = finishedPage.data.length + (finishedPage.next_cursor ? '+' : '');
 
       return `
         <div class="p-8">
@@ -347,7 +432,7 @@ Object.assign(FootballApp.prototype, {
             </button>
             <button onclick="this.classList.add('bg-primary', 'text-primary-foreground'); this.parentNode.querySelectorAll('button').forEach(b => b !== this && b.classList.remove('bg-primary', 'text-primary-foreground'))" 
                     class="flex-1 py-2 px-4 rounded-md transition-colors">
-              Resultados (${finishedMatches.length})
+              Resultados (${finishedCount})
             </button>
           </div>
 
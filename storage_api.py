@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+The read interface shared by the synchronous and asyncio storage backends
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Protocol, Tuple
+
+
+class FootballReader(Protocol):
+    """What the /api views read; implemented by FootballDataStorage (psycopg2)"""
+
+    def get_teams(self) -> List[Dict]: ...
+
+    def get_team_by_slug(self, slug: str) -> Optional[Dict]: ...
+
+    def get_matches_page(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                         competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                         date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                         limit: int = 50, order: str = 'desc') -> Dict[str, Any]: ...
+
+    def stream_matches(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                       competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                       order: str = 'desc') -> Iterator[Dict]: ...
+
+    def load_live_matches(self) -> List[Dict]: ...
+
+    def get_live_matches(self) -> List[Dict]: ...
+
+    def get_upcoming_matches(self) -> List[Dict]: ...
+
+    def get_standings(self) -> List[Dict]: ...
+
+    def get_top_scorers(self, limit: int = 10) -> List[Dict]: ...
+
+    def get_leaderboard(self, metric: str, season: Optional[str] = None, team_id: Optional[int] = None,
+                        limit: int = 10, cursor: Optional[Tuple[float, int]] = None) -> Dict[str, Any]: ...
+
+    def get_player_rank(self, player_id: int, metric: str = 'goals', team: bool = False,
+                        around: int = 2) -> Optional[Dict[str, Any]]: ...
+
+    def stream_players(self) -> Iterator[Dict]: ...
+
+
+class AsyncFootballReader(Protocol):
+    """The same reads as coroutines; implemented by AsyncFootballDataStorage (asyncpg)"""
+
+    async def get_teams(self) -> List[Dict]: ...
+
+    async def get_team_by_slug(self, slug: str) -> Optional[Dict]: ...
+
+    async def get_matches_page(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                               competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                               date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                               limit: int = 50, order: str = 'desc') -> Dict[str, Any]: ...
+
+    def stream_matches(self, team: Optional[str] = None, statuses: Optional[tuple] = None,
+                       competition: Optional[str] = None, date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None, cursor: Optional[tuple] = None,
+                       order: str = 'desc') -> AsyncIterator[Dict]: ...
+
+    async def load_live_matches(self) -> List[Dict]: ...
+
+    async def get_live_matches(self) -> List[Dict]: ...
+
+    async def get_upcoming_matches(self) -> List[Dict]: ...
+
+    async def get_standings(self) -> List[Dict]: ...
+
+    async def get_top_scorers(self, limit: int = 10) -> List[Dict]: ...
+
+    async def get_leaderboard(self, metric: str, season: Optional[str] = None, team_id: Optional[int] = None,
+                              limit: int = 10, cursor: Optional[Tuple[float, int]] = None) -> Dict[str, Any]: ...
+
+    async def get_player_rank(self, player_id: int, metric: str = 'goals', team: bool = False,
+                              around: int = 2) -> Optional[Dict[str, Any]]: ...
+
+    def stream_players(self) -> AsyncIterator[Dict]: ...
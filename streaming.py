@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Chunked JSON array / NDJSON responses for large result sets
+"""
+
+import functools
+import itertools
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, Mapping
+
+from flask import Response, current_app, stream_with_context
+
+# Rows per round-trip of a server-side cursor
+STREAM_FETCH_SIZE = 500
+
+# Encoded rows are buffered up to about this many bytes per write
+CHUNK_BYTES = 64 * 1024
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def export_format(args: Mapping[str, str], headers: Mapping[str, str]) -> str:
+    """'ndjson' or 'json', from ?format= or else the Accept header"""
+    requested = args.get('format')
+    if requested in ('ndjson', 'json'):
+        return requested
+    return 'ndjson' if NDJSON_MIMETYPE in headers.get('Accept', '') else 'json'
+
+
+def _chunks(rows: Iterable[Dict], dumps: Callable[[Any], str], opening: str, separator: str,
+            closing: str) -> Iterator[str]:
+    buffer, size = [opening], len(opening)
+    first = True
+    for row in rows:
+        encoded = dumps(row) if first else separator + dumps(row)
+        first = False
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    buffer.append(closing)
+    yield ''.join(buffer)
+
+
+async def _chunks_async(rows: AsyncIterable[Dict], dumps: Callable[[Any], str], opening: str,
+                        separator: str, closing: str) -> AsyncIterator[str]:
+    buffer, size = [opening], len(opening)
+    first = True
+    async for row in rows:
+        encoded = dumps(row) if first else separator + dumps(row)
+        first = False
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    buffer.append(closing)
+    yield ''.join(buffer)
+
+
+def json_array_chunks(rows: Iterable[Dict], dumps: Callable[[Any], str]) -> Iterator[str]:
+    return _chunks(rows, dumps, '[', ',', ']')
+
+
+def ndjson_chunks(rows: Iterable[Dict], dumps: Callable[[Any], str]) -> Iterator[str]:
+    return _chunks(rows, lambda row: dumps(row) + '\n', '', '', '')
+
+
+def json_array_chunks_async(rows: AsyncIterable[Dict], dumps: Callable[[Any], str]) -> AsyncIterator[str]:
+    return _chunks_async(rows, dumps, '[', ',', ']')
+
+
+def ndjson_chunks_async(rows: AsyncIterable[Dict], dumps: Callable[[Any], str]) -> AsyncIterator[str]:
+    return _chunks_async(rows, lambda row: dumps(row) + '\n', '', '', '')
+
+
+def stream_rows(rows: Iterator[Dict], fmt: str = 'json') -> Response:
+    """Response that encodes ``rows`` as they are read instead of building the whole body.
+
+    Once the first chunk is out the status can no longer change: a failure
+    mid-stream ends NDJSON with an ``{"error": ...}`` line and leaves a JSON
+    array unterminated, so clients never mistake a partial export for a
+    complete one.
+    """
+    source = rows
+    dumps = functools.partial(current_app.json.dumps, separators=(',', ':'))
+    encode = ndjson_chunks if fmt == 'ndjson' else json_array_chunks
+
+    # Run the query before committing to a 200, so a failing one still gets a 500
+    try:
+        head = list(itertools.islice(rows, 1))
+    except Exception as e:
+        print(f"Error starting export: {e}")
+        response = current_app.json.response({"message": "Failed to export", "error": str(e)})
+        response.status_code = 500
+        return response
+    rows = itertools.chain(head, rows)
+
+    def generate():
+        try:
+            yield from encode(rows, dumps)
+        except Exception as e:
+            print(f"Error streaming export: {e}")
+            if fmt == 'ndjson':
+                yield dumps({"error": str(e)}) + '\n'
+
+    mimetype = NDJSON_MIMETYPE if fmt == 'ndjson' else 'application/json'
+    response = Response(stream_with_context(generate()), mimetype=mimetype,
+                        headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-store'})
+    # Hands the pooled connection back even if the body is never fully sent
+    if hasattr(source, 'close'):
+        response.call_on_close(source.close)
+    return response
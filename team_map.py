@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+The teams table held in memory, for attaching team details to match,
+standing and player rows instead of joining teams in SQL
+"""
+
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+# Team columns copied onto rows, as (team column, row field)
+MATCH_SIDE_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('name', 'team_name'), ('nickname', 'team_nickname'),
+    ('primary_color', 'team_primary_color'), ('secondary_color', 'team_secondary_color'),
+)
+STANDING_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('name', 'team_name'), ('nickname', 'team_nickname'),
+    ('primary_color', 'primary_color'), ('secondary_color', 'secondary_color'), ('logo', 'logo'),
+)
+PLAYER_FIELDS = STANDING_FIELDS[:4]
+
+# Team ids are SERIAL and start at 1: a slug no team has filters every row out
+NO_TEAM = 0
+
+
+class TeamMap:
+    """Every team by id and by slug, frozen at the moment it was loaded.
+
+    Built once per version of the teams table (``get_team_map`` on either
+    storage) and shared between threads, so nothing here changes after
+    ``__init__``; the team dicts are shared too and must not be modified.
+    """
+
+    def __init__(self, teams: Iterable[Dict[str, Any]]):
+        self.teams: Tuple[Dict[str, Any], ...] = tuple(teams)
+        self.by_id: Mapping[int, Dict[str, Any]] = MappingProxyType({team['id']: team for team in self.teams})
+        self.by_slug: Mapping[str, Dict[str, Any]] = MappingProxyType({team['slug']: team for team in self.teams})
+        # Precomputed per team, so hydrating a row is a dict lookup and an update
+        self._home = self._fields(MATCH_SIDE_FIELDS, 'home_')
+        self._away = self._fields(MATCH_SIDE_FIELDS, 'away_')
+        self._standing = self._fields(STANDING_FIELDS)
+        self._player = self._fields(PLAYER_FIELDS)
+
+    def _fields(self, fields, prefix: str = '') -> Mapping[int, Dict[str, Any]]:
+        return MappingProxyType({
+            team['id']: {prefix + field: team.get(column) for column, field in fields}
+            for team in self.teams
+        })
+
+    def __len__(self) -> int:
+        return len(self.teams)
+
+    def id_of(self, slug: str) -> int:
+        """Id of the team with ``slug``, or NO_TEAM"""
+        team = self.by_slug.get(slug)
+        return team['id'] if team is not None else NO_TEAM
+
+    @staticmethod
+    def _blank(fields, prefix: str = '') -> Dict[str, Any]:
+        # Only for a team written after this map was loaded; its invalidation is on the way
+        return {prefix + field: None for _, field in fields}
+
+    def match(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the name, nickname and colours of both teams to a match row, in place"""
+        row.update(self._home.get(row['home_team_id']) or self._blank(MATCH_SIDE_FIELDS, 'home_'))
+        row.update(self._away.get(row['away_team_id']) or self._blank(MATCH_SIDE_FIELDS, 'away_'))
+        return row
+
+    def standing(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the team's name, nickname, colours and logo to a standings row, in place"""
+        row.update(self._standing.get(row['team_id']) or self._blank(STANDING_FIELDS))
+        return row
+
+    def player(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the team's name, nickname and colours to a player row, in place"""
+        row.update(self._player.get(row['team_id']) or self._blank(PLAYER_FIELDS))
+        return row
+
+    def matches(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.match(row) for row in rows]
+
+    def standings(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.standing(row) for row in rows]
+
+    def players(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.player(row) for row in rows]
+
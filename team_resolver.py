@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Scraped team names -> team ids, from an index built once over the teams and
+team_aliases tables
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Filler in club names: "Club de Fútbol Monterrey" is "Monterrey", "Los Tigres" is "Tigres"
+_GENERIC_WORDS = {'club', 'de', 'del', 'futbol', 'fc', 'cf', 'deportivo', 'el', 'la', 'las', 'los'}
+
+# A fuzzy match needs at least this trigram similarity...
+MIN_SIMILARITY = 0.5
+# ...or this edit-distance similarity, which is generous with short names...
+MIN_EDIT_SIMILARITY = 0.8
+# ...and must beat the best key of any other team by this much, or it is ambiguous
+MIN_MARGIN = 0.1
+# Score of a key whose words all appear in the name, or the other way round
+# ("Pumas UNAM" and "Pumas")
+WORD_MATCH = 0.8
+
+
+def team_key(name: str) -> str:
+    """Accent-, case- and filler-insensitive form of a team name"""
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    return ' '.join(word for word in re.split(r'[^a-z0-9]+', text) if word and word not in _GENERIC_WORDS)
+
+
+def trigrams(key: str) -> Set[str]:
+    """Trigrams of every word padded like pg_trgm does: "leon" -> "  l", " le", "leo", "eon", "on " """
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_similarity(a: str, b: str) -> float:
+    """1 - Levenshtein distance / length of the longer string"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return 1 - previous[-1] / max(len(a), 1)
+
+
+class TeamResolver:
+    """Resolves scraped team names without touching the database.
+
+    Every curated alias, name, nickname and slug is indexed by ``team_key``,
+    so the usual spellings resolve with one dict lookup; a city is indexed
+    too when only one team plays there. Other names are scored against
+    the keys they share a trigram with (trigram similarity, edit distance
+    or word containment, whichever is highest) and the outcome, a team or
+    none, is cached per key. Names nothing matched are counted for
+    ``report()``, which is where new aliases come from.
+
+    Build one per version of the two tables (FootballDataStorage.get_team_resolver).
+    """
+
+    def __init__(self, teams: List[Dict], aliases: Iterable[Dict] = ()):
+        self.index: Dict[str, int] = {}
+        # Aliases first: they exist to override what the names would say
+        for alias in aliases:
+            self._add(alias['alias'], alias['team_id'])
+        for team in teams:
+            for name in (team['name'], team['nickname'], team['slug'].replace('-', ' ')):
+                self._add(name, team['id'])
+        cities = defaultdict(set)
+        for team in teams:
+            if team.get('city'):
+                cities[team_key(team['city'])].add(team['id'])
+        for key, ids in cities.items():
+            if len(ids) == 1:
+                self._add(key, next(iter(ids)))
+
+        self._keys = list(self.index)
+        self._words = [set(key.split()) for key in self._keys]
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._sizes = []
+        for position, key in enumerate(self._keys):
+            grams = trigrams(key)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(position)
+
+        self._lock = threading.Lock()
+        # team_key -> (team id, score, matched key), or None when nothing was close enough
+        self._fuzzy: Dict[str, Optional[Tuple[int, float, str]]] = {}
+        self._matched: Dict[str, Tuple[int, float, str]] = {}
+        self._unresolved: Counter = Counter()
+        self._exact = 0
+        self._fuzzy_hits = 0
+        self._misses = 0
+
+    def _add(self, name: Optional[str], team_id: int):
+        key = team_key(name) if name else ''
+        if key:
+            self.index.setdefault(key, team_id)
+
+    def resolve(self, name: str) -> Optional[int]:
+        """Team id for a scraped name, or None (counted as unresolved)"""
+        key = team_key(name)
+        found = self.index.get(key)
+        if found is not None:
+            with self._lock:
+                self._exact += 1
+            return found
+
+        try:
+            match = self._fuzzy[key]
+        except KeyError:
+            match = self._fuzzy[key] = self._closest(key)
+        with self._lock:
+            if match is None:
+                self._misses += 1
+                self._unresolved[name] += 1
+                return None
+            self._fuzzy_hits += 1
+            self._matched[name] = match
+        return match[0]
+
+    def _closest(self, key: str) -> Optional[Tuple[int, float, str]]:
+        """Best key among those sharing a trigram with ``key``, if it is unambiguous"""
+        if not key:
+            return None
+        grams = trigrams(key)
+        words = set(key.split())
+        shared: Counter = Counter()
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] += 1
+
+        best: Dict[int, Tuple[float, str]] = {}
+        for position, common in shared.items():
+            candidate = self._keys[position]
+            score = common / (len(grams) + self._sizes[position] - common)
+            edited = edit_similarity(key, candidate)
+            if edited >= MIN_EDIT_SIMILARITY:
+                score = max(score, edited)
+            if words <= self._words[position] or self._words[position] <= words:
+                score = max(score, WORD_MATCH)
+            team_id = self.index[candidate]
+            if score > best.get(team_id, (0.0, ''))[0]:
+                best[team_id] = (score, candidate)
+
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)
+        if not ranked or ranked[0][1][0] < MIN_SIMILARITY:
+            return None
+        if len(ranked) > 1 and ranked[0][1][0] - ranked[1][1][0] < MIN_MARGIN:
+            return None
+        team_id, (score, candidate) = ranked[0]
+        return team_id, round(score, 3), candidate
+
+    def report(self) -> Dict[str, Any]:
+        """Names nothing matched (most seen first) and the names matched fuzzily, for curating aliases"""
+        with self._lock:
+            return {
+                "keys": len(self.index),
+                "exact": self._exact,
+                "fuzzy": self._fuzzy_hits,
+                "misses": self._misses,
+                "unresolved": [{"name": name, "seen": seen} for name, seen in self._unresolved.most_common()],
+                "fuzzy_matches": [
+                    {"name": name, "team_id": team_id, "score": score, "matched": candidate}
+                    for name, (team_id, score, candidate) in sorted(self._matched.items())
+                ],
+            }
@@ -0,0 +1,103 @@
+"""
+ChangeFeed catch-up after a reconnect: out-of-order commits and trimmed logs
+"""
+
+from change_feed import ChangeEvent, ChangeFeed
+
+
+class FakeCursor:
+    def __init__(self, log, next_seq=None):
+        self.log = log
+        # What change_log_id_seq would hand out next
+        self.next_seq = next_seq or max(log) + 1
+        self.rows = []
+
+    def execute(self, query, params=()):
+        if 'MIN(id)' in query:
+            self.rows = [{'seq': min(self.log) if self.log else self.next_seq}]
+            return
+        last, gaps = params
+        self.rows = [
+            {'id': seq, 'table_name': 'players', 'op': 'UPDATE', 'row_ids': [seq], 'backend_pid': 1, 'origin': None}
+            for seq in sorted(self.log) if seq > last or seq in gaps
+        ]
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_catch_up_replays_seqs_that_committed_out_of_order():
+    feed = ChangeFeed(lambda: None)
+    delivered = []
+    feed.subscribe(lambda event: delivered.append(event.seq))
+    feed._last_seq = 10
+
+    # 11 and 12 are still uncommitted when 13 is delivered
+    feed._deliver(ChangeEvent(13, 'players', 'UPDATE', (13,)))
+    assert feed.stats()['gaps'] == 2
+
+    # 12 commits while the listener is away, 11 rolled back; 14 is new
+    feed._catch_up(FakeCursor({10, 12, 13, 14}))
+    assert delivered == [13, 12, 14]
+    assert feed._gaps.keys() == {11}
+
+
+def resyncs(feed):
+    events = []
+    feed.subscribe(events.append)
+    return events
+
+
+def test_trimmed_log_resyncs():
+    feed = ChangeFeed(lambda: None)
+    events = resyncs(feed)
+    feed._last_seq = 10
+    feed._catch_up(FakeCursor({20, 21}))
+    assert {event.op for event in events[:-2]} == {'RESYNC'}
+    assert [event.seq for event in events[-2:]] == [20, 21]
+
+
+def test_empty_log_resyncs_when_seqs_were_missed():
+    feed = ChangeFeed(lambda: None)
+    events = resyncs(feed)
+    feed._last_seq = 10
+    # Everything up to 30 was written and trimmed while the listener was away
+    feed._catch_up(FakeCursor(set(), next_seq=31))
+    assert events and all(event.op == 'RESYNC' and event.seq == 30 for event in events)
+    assert feed._last_seq == 30
+
+    # Reconnecting again with nothing new resyncs nothing
+    events.clear()
+    feed._catch_up(FakeCursor(set(), next_seq=31))
+    assert events == []
+
+
+def test_empty_log_is_quiet_when_nothing_was_missed():
+    feed = ChangeFeed(lambda: None)
+    events = resyncs(feed)
+    feed._last_seq = 10
+    feed._catch_up(FakeCursor(set(), next_seq=11))
+    assert events == []
+
+
+def test_gaps_expire():
+    feed = ChangeFeed(lambda: None, gap_timeout=0)
+    feed._last_seq = 1
+    feed._deliver(ChangeEvent(3, 'players', 'UPDATE', (3,)))
+    feed._conn = type('Conn', (), {'cursor': lambda self: _NullCursor()})()
+    feed._maybe_trim()
+    assert feed.stats()['gaps'] == 0
+
+
+class _NullCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=()):
+        pass
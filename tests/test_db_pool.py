@@ -0,0 +1,73 @@
+"""
+ConnectionPool hands out dead connections unchecked when they were used recently; run() retries those once
+"""
+
+import psycopg2
+import pytest
+
+from db_pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, fail: bool = False, close_on_fail: bool = True):
+        self.fail = fail
+        self.close_on_fail = close_on_fail
+        self.closed = 0
+        self.queries = 0
+
+    def query(self):
+        self.queries += 1
+        if self.fail:
+            if self.close_on_fail:
+                # What psycopg2 does when the server went away
+                self.closed = 2
+                raise psycopg2.OperationalError('server closed the connection unexpectedly')
+            raise psycopg2.extensions.QueryCanceledError('canceling statement due to statement timeout')
+        return 'rows'
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def pool_of(*connections):
+    made = iter(connections)
+    return ConnectionPool(lambda: next(made), min_size=1, max_size=2)
+
+
+def test_run_retries_a_dead_connection_once():
+    dead, fresh = FakeConnection(fail=True), FakeConnection()
+    pool = pool_of(dead, fresh)
+    assert pool.run(lambda conn: conn.query()) == 'rows'
+    assert (dead.queries, fresh.queries) == (1, 1)
+    stats = pool.stats()
+    assert (stats['discarded'], stats['size'], stats['in_use']) == (1, 1, 0)
+
+
+def test_run_gives_up_after_the_retry():
+    pool = pool_of(FakeConnection(fail=True), FakeConnection(fail=True))
+    with pytest.raises(psycopg2.OperationalError):
+        pool.run(lambda conn: conn.query())
+    assert pool.stats()['in_use'] == 0
+
+
+def test_run_does_not_repeat_errors_of_a_live_connection():
+    slow, spare = FakeConnection(fail=True, close_on_fail=False), FakeConnection()
+    pool = pool_of(slow, spare)
+    with pytest.raises(psycopg2.extensions.QueryCanceledError):
+        pool.run(lambda conn: conn.query())
+    assert spare.queries == 0
+
+
+def test_connection_failure_revalidates_idle_connections():
+    pool = ConnectionPool(lambda: FakeConnection(), min_size=0, max_size=2, validate_after=30)
+    first, second = pool.getconn(), pool.getconn()
+    pool.putconn(second)
+    pool.putconn(first, broken=True)
+    # The idle one is now old enough to be validated on its next checkout
+    assert pool._idle[0][1] == float('-inf')
@@ -0,0 +1,83 @@
+"""
+Leaderboards: competition ranks, rank cursors across ties, rank_of and limits
+"""
+
+import pytest
+
+from leaderboards import MAX_LIMIT, Leaderboards, metric_filter
+from pagination import InvalidParameter, decode_rank_cursor
+
+SEASON = '2024-25'
+
+
+def player(player_id, goals, team_id=1, assists=0, appearances=10, season=SEASON):
+    return {'id': player_id, 'name': f'Player {player_id}', 'team_id': team_id, 'position': 'Forward',
+            'goals': goals, 'assists': assists, 'appearances': appearances, 'season': season}
+
+
+def ranks(page):
+    return [(row['id'], row['rank']) for row in page['data']]
+
+
+def test_ties_share_a_competition_rank():
+    boards = Leaderboards([player(1, 10), player(2, 8), player(3, 8), player(4, 5), player(5, 8, season='2023-24')])
+    page = boards.page('goals', SEASON)
+    # Level players share a rank and are ordered by id; the next rank skips
+    assert ranks(page) == [(1, 1), (2, 2), (3, 2), (4, 4)]
+    assert page['total'] == 4 and page['next_cursor'] is None
+
+
+def test_cursor_pages_through_ties_without_repeats():
+    boards = Leaderboards([player(player_id, 7 if player_id < 6 else 3) for player_id in range(1, 10)])
+    seen, cursor = [], None
+    while True:
+        page = boards.page('goals', SEASON, limit=2, after=decode_rank_cursor(cursor) if cursor else None)
+        seen.extend(ranks(page))
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert [player_id for player_id, _ in seen] == list(range(1, 10))
+    # A page that starts mid-tie still reports the shared rank
+    assert seen == [(player_id, 1) for player_id in range(1, 6)] + [(player_id, 6) for player_id in range(6, 10)]
+
+
+def test_apply_moves_players_between_positions():
+    boards = Leaderboards([player(1, 10), player(2, 8), player(3, 5)])
+    boards.apply([player(3, 12)], deleted_ids=[1])
+    assert ranks(boards.page('goals', SEASON)) == [(3, 1), (2, 2)]
+    assert boards.stats()['players'] == 2
+
+
+def test_rank_of_returns_the_neighbourhood():
+    boards = Leaderboards([player(player_id, 20 - player_id, team_id=player_id % 2) for player_id in range(1, 11)])
+    found = boards.rank_of(5, 'goals', around=1)
+    assert found['rank'] == 5 and found['total'] == 10
+    assert [row['id'] for row in found['data']] == [4, 5, 6]
+
+    # On the team board only teammates count
+    found = boards.rank_of(5, 'goals', team=True, around=1)
+    assert found['rank'] == 3
+    assert [row['id'] for row in found['data']] == [3, 5, 7]
+
+    assert boards.rank_of(99, 'goals') is None
+
+
+def test_rank_of_a_player_the_metric_does_not_rank_yet():
+    boards = Leaderboards([player(1, 0, appearances=0), player(2, 3)])
+    found = boards.rank_of(1, 'goals_per_appearance')
+    assert found['rank'] is None and found['total'] == 1
+
+
+def test_limits_are_clamped():
+    boards = Leaderboards([player(player_id, player_id) for player_id in range(1, 2 * MAX_LIMIT + 50)])
+    page = boards.page('goals', SEASON, limit=MAX_LIMIT * 10)
+    assert len(page['data']) == MAX_LIMIT
+    assert page['next_cursor'] is not None
+    found = boards.rank_of(MAX_LIMIT, 'goals', around=MAX_LIMIT)
+    assert len(found['data']) == 2 * (MAX_LIMIT // 2) + 1
+
+
+def test_unknown_metric_is_rejected():
+    assert metric_filter('assists') == 'assists'
+    with pytest.raises(InvalidParameter):
+        metric_filter('saves')
@@ -0,0 +1,30 @@
+"""
+LiveFeed.open_stream caps the streams a threaded worker holds open
+"""
+
+from live_feed import LiveFeed
+
+
+def test_open_stream_refuses_past_the_cap():
+    feed = LiveFeed(lambda: [], max_streams=2, idle_timeout=0)
+    first, second = feed.open_stream(), feed.open_stream()
+    assert first is not None and second is not None
+    assert feed.open_stream() is None
+    assert feed.stats()['rejected'] == 1
+
+    # Closing a stream frees its slot, whether or not it was ever read
+    assert next(first).startswith('retry:')
+    first.close()
+    third = feed.open_stream()
+    assert third is not None
+    second.close()
+    third.close()
+    assert feed.open_stream() is not None
+
+
+def test_no_cap_by_default():
+    feed = LiveFeed(lambda: [])
+    streams = [feed.open_stream() for _ in range(20)]
+    assert all(stream is not None for stream in streams)
+    for stream in streams:
+        stream.close()
@@ -0,0 +1,103 @@
+"""
+MatchStore: incremental writes keep every index in step with the columns
+"""
+
+from datetime import datetime, timedelta
+
+from match_store import STORE_COLUMNS, MatchStore, team_form
+
+KICKOFF = datetime(2024, 10, 5, 2, 0)
+
+
+def match(match_id, home, away, days=0, status='finished', home_score=1, away_score=0):
+    scored = status != 'upcoming'
+    return {'id': match_id, 'home_team_id': home, 'away_team_id': away,
+            'home_score': home_score if scored else None, 'away_score': away_score if scored else None,
+            'status': status, 'match_date': KICKOFF + timedelta(days=days), 'venue': 'Estadio',
+            'minute': None, 'competition': 'Liga MX'}
+
+
+def build(rows):
+    return MatchStore([tuple(row[column] for column in STORE_COLUMNS) for row in rows])
+
+
+def indexes(store):
+    """Every index as plain lists of (date, id) entries, empty ones left out"""
+    def entries(index):
+        return list(index.entries(False))
+    names = store._status_names
+    return {
+        'date': entries(store._by_date),
+        'status': {names[code]: entries(index) for code, index in store._by_status.items() if len(index)},
+        'team': {(team, names[code]): entries(index) for (team, code), index in store._by_team.items() if len(index)},
+        'pair': {pair: entries(index) for pair, index in store._by_pair.items() if len(index)},
+    }
+
+
+def assert_consistent(store, rows):
+    """``store`` holds exactly ``rows``, indexed as a store loaded from them would be"""
+    assert len(store) == len(rows)
+    assert sorted(store.by_status('finished', 'asc') + store.by_status('upcoming', 'asc') +
+                  store.by_status('live', 'asc'), key=lambda row: row['id']) == sorted(rows, key=lambda row: row['id'])
+    assert indexes(store) == indexes(build(rows))
+
+
+ROWS = [
+    match(1, 1, 2, days=0),
+    match(2, 3, 1, days=7, home_score=2, away_score=2),
+    match(3, 2, 3, days=7),
+    match(4, 1, 3, days=14, status='upcoming'),
+    match(5, 2, 1, days=21, status='upcoming'),
+]
+
+
+def test_update_reuses_the_slot_and_moves_the_index_entries():
+    store = build(ROWS)
+    slot = store._slots[4]
+    live = {**ROWS[3], 'status': 'live', 'home_score': 0, 'away_score': 0, 'minute': 12,
+            'match_date': ROWS[3]['match_date'] + timedelta(hours=1)}
+    store.apply([live])
+
+    assert store._slots[4] == slot and store.stats()['free_slots'] == 0
+    rows = ROWS[:3] + [live] + ROWS[4:]
+    assert_consistent(store, rows)
+    assert [row['id'] for row in store.fixtures(1, ('upcoming',))] == [5]
+    assert store.by_status('live') == [live]
+
+
+def test_delete_frees_the_slot_for_the_next_insert():
+    store = build(ROWS)
+    slot = store._slots[2]
+    store.apply(deleted=[2])
+    assert_consistent(store, [row for row in ROWS if row['id'] != 2])
+    assert store.head_to_head(1, 3) == [ROWS[3]]
+
+    new = match(6, 3, 2, days=28, status='upcoming')
+    store.apply([new])
+    assert store._slots[6] == slot
+    assert_consistent(store, [row for row in ROWS if row['id'] != 2] + [new])
+
+
+def test_fixtures_merge_statuses_in_date_order():
+    # Same-day kickoffs: ties fall back to id, as ORDER BY match_date, id does
+    rows = [
+        match(10, 1, 2, days=3, status='upcoming'),
+        match(11, 3, 1, days=1),
+        match(12, 1, 4, days=3),
+        match(13, 4, 1, days=2, status='live'),
+        match(14, 2, 3, days=0),
+    ]
+    store = build(rows)
+    mine = sorted((row for row in rows if 1 in (row['home_team_id'], row['away_team_id'])),
+                  key=lambda row: (row['match_date'], row['id']))
+    assert store.fixtures(1, order='asc') == mine
+    assert store.fixtures(1) == mine[::-1]
+    assert [row['id'] for row in store.fixtures(1, ('finished', 'upcoming'), limit=2)] == [12, 10]
+    assert store.fixtures(99) == []
+
+
+def test_head_to_head_record_matches_team_form():
+    store = build(ROWS)
+    meetings = store.head_to_head(1, 3)
+    assert store.head_to_head_record(1, 3) == team_form(1, [row for row in meetings if row['status'] == 'finished'])
+    assert store.head_to_head_record(1, 3)['form'] == 'D'
@@ -0,0 +1,87 @@
+"""
+Keyset cursors and query-string filters
+"""
+
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from pagination import (InvalidParameter, decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor,
+                        limit_filter, match_filters, page_of)
+
+
+def token(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip():
+    moment = datetime(2024, 11, 2, 2, 0, 30)
+    assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+    assert decode_rank_cursor(encode_rank_cursor(0.667, 7)) == (0.667, 7)
+    assert decode_rank_cursor(encode_rank_cursor(15, 7)) == (15, 7)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor!',
+    token('2024-11-02T02:00:00'),
+    token(['2024-11-02T02:00:00']),
+    token(['2024-11-02T02:00:00', 1, 2]),
+    token(['yesterday', 1]),
+    token([20241102, 1]),
+    token(['2024-11-02T02:00:00', 'one']),
+    token(['2024-11-02T02:00:00', None]),
+    encode_cursor(datetime(2024, 11, 2), 1)[:-3],
+])
+def test_malformed_match_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidParameter):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('cursor', [
+    '%%%',
+    token(['15', 7]),
+    token([True, 7]),
+    token([None, 7]),
+    token([15]),
+    token({'score': 15, 'id': 7}),
+])
+def test_malformed_rank_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidParameter):
+        decode_rank_cursor(cursor)
+
+
+def test_match_filters_reject_a_bad_cursor():
+    with pytest.raises(InvalidParameter):
+        match_filters({'cursor': 'garbage'})
+
+
+def test_limit_is_clamped_and_checked():
+    assert limit_filter({}) == 50
+    assert limit_filter({'limit': '10000'}) == 200
+    for bad in ('0', '-1', 'ten'):
+        with pytest.raises(InvalidParameter):
+            limit_filter({'limit': bad})
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+def test_keyset_pages_cover_ties_exactly_once(order):
+    # Many matches share a kickoff; ids keep their order total
+    kickoffs = [datetime(2024, 11, 2, 2, 0), datetime(2024, 11, 2, 4, 0), datetime(2024, 11, 3, 2, 0)]
+    rows = [{'id': row_id, 'match_date': kickoffs[row_id % 3]} for row_id in range(1, 23)]
+    descending = order == 'desc'
+    ordered = sorted(rows, key=lambda row: (row['match_date'], row['id']), reverse=descending)
+
+    seen, cursor = [], None
+    while True:
+        # What matches_query selects: the rows strictly past the cursor's (match_date, id)
+        after = [row for row in ordered if cursor is None or (
+            (row['match_date'], row['id']) < cursor if descending else (row['match_date'], row['id']) > cursor)]
+        page = page_of(after[:5], 4)
+        seen.extend(row['id'] for row in page['data'])
+        if page['next_cursor'] is None:
+            break
+        cursor = decode_cursor(page['next_cursor'])
+
+    assert seen == [row['id'] for row in ordered]
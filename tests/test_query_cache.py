@@ -0,0 +1,170 @@
+"""
+QueryCache: TTL, LRU eviction, per-table versions and single-flight loads
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from metrics import failed_queries
+from query_cache import QueryCache
+
+NAMESPACES = {
+    'teams': (300.0, ('teams',)),
+    'matches': (300.0, ('matches', 'teams')),
+    'live': (0.05, ('matches',)),
+}
+
+
+@pytest.fixture
+def cache():
+    return QueryCache(NAMESPACES, max_entries=2)
+
+
+def loader(value, calls):
+    def load():
+        calls.append(value)
+        return value
+    return load
+
+
+def test_hits_until_the_ttl_runs_out(cache):
+    calls = []
+    assert cache.get_or_load('live', (), loader(1, calls)) == 1
+    assert cache.get_or_load('live', (), loader(2, calls)) == 1
+    time.sleep(0.06)
+    assert cache.get_or_load('live', (), loader(3, calls)) == 3
+    assert calls == [1, 3]
+
+
+def test_least_recently_used_is_evicted(cache):
+    calls = []
+    cache.get_or_load('teams', 'a', loader('a', calls))
+    cache.get_or_load('teams', 'b', loader('b', calls))
+    cache.get_or_load('teams', 'a', loader('a', calls))
+    cache.get_or_load('teams', 'c', loader('c', calls))
+    # "b" was the least recently used of the two kept
+    cache.get_or_load('teams', 'a', loader('a', calls))
+    cache.get_or_load('teams', 'b', loader('b', calls))
+    assert calls == ['a', 'b', 'c', 'b']
+    assert cache.stats()['evictions'] == 2
+
+
+def test_invalidating_a_table_drops_only_namespaces_reading_it(cache):
+    calls = []
+    cache.get_or_load('teams', (), loader('teams', calls))
+    cache.get_or_load('matches', (), loader('matches', calls))
+    before = cache.version(('matches',))
+    cache.invalidate('matches')
+    assert cache.version(('matches',)) != before
+    cache.get_or_load('teams', (), loader('teams', calls))
+    cache.get_or_load('matches', (), loader('matches', calls))
+    assert calls == ['teams', 'matches', 'matches']
+
+    # Teams feed both namespaces
+    cache.invalidate('teams')
+    assert cache.stats()['entries'] == {'teams': 0, 'matches': 0, 'live': 0}
+
+
+def test_a_load_invalidated_midway_is_not_kept(cache):
+    calls = []
+
+    def load():
+        calls.append(1)
+        cache.invalidate('teams')
+        return 'stale'
+
+    assert cache.get_or_load('teams', (), load) == 'stale'
+    assert cache.get_or_load('teams', (), loader('fresh', calls)) == 'fresh'
+
+
+def test_errors_are_not_cached(cache):
+    def fail():
+        raise ConnectionError('database unavailable')
+
+    with pytest.raises(ConnectionError):
+        cache.get_or_load('teams', (), fail)
+    assert cache.get_or_load('teams', (), lambda: 'ok') == 'ok'
+
+
+def run_concurrently(cache, load, callers=4):
+    """``callers`` threads asking for one key while the first load is held open"""
+    release = threading.Event()
+    results = []
+
+    def held():
+        release.wait(5)
+        return load()
+
+    def call():
+        with failed_queries() as failures:
+            try:
+                results.append(('value', cache.get_or_load('teams', (), held)))
+            except Exception as e:
+                results.append(('error', str(e)))
+        results.append(('noted', len(failures)))
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()['coalesced'] < callers - 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_misses_share_one_load(cache):
+    calls = []
+    results = run_concurrently(cache, loader('teams', calls))
+    assert calls == ['teams']
+    assert results.count(('value', 'teams')) == 4
+    assert cache.stats()['misses'] == 1 and cache.stats()['coalesced'] == 3
+
+
+def test_every_waiter_of_a_failed_load_sees_the_failure(cache):
+    def fail():
+        raise ConnectionError('database unavailable')
+
+    results = run_concurrently(cache, fail)
+    assert results.count(('error', 'database unavailable')) == 4
+    # Followers record the leader's failure for the response cache; the
+    # leader's own query would have been noted by timed_query
+    assert results.count(('noted', 1)) == 3
+
+
+def test_async_misses_share_one_load(cache):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'teams'
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load_async('teams', (), load) for _ in range(5)))
+
+    assert asyncio.run(main()) == ['teams'] * 5
+    assert calls == [1]
+
+
+def test_async_waiters_of_a_failed_load_record_it(cache):
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError('database unavailable')
+
+    async def call():
+        with failed_queries() as failures:
+            try:
+                await cache.get_or_load_async('teams', (), fail)
+            except ConnectionError:
+                pass
+        return len(failures)
+
+    async def main():
+        return await asyncio.gather(*(call() for _ in range(3)))
+
+    assert sorted(asyncio.run(main())) == [0, 1, 1]
@@ -0,0 +1,102 @@
+"""
+ResponseCache must not keep the fallbacks storage hands back when a query fails
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from metrics import timed_query
+from query_cache import QueryCache
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def served():
+    app = Flask(__name__)
+    responses = ResponseCache(QueryCache({'teams': (300.0, ('teams',))}))
+    state = {'calls': 0, 'fail': True}
+
+    @app.route('/teams')
+    @responses.cached('teams')
+    def teams():
+        state['calls'] += 1
+        try:
+            with timed_query('get_teams'):
+                if state['fail']:
+                    raise ConnectionError('database unavailable')
+            return [{'id': 1}]
+        except Exception:
+            # What the storage getters do
+            return []
+
+    with app.test_client() as client:
+        yield client, state
+
+
+def test_failed_read_is_a_500_and_not_cached(served):
+    client, state = served
+    response = client.get('/teams')
+    assert response.status_code == 500
+    assert response.get_json()['error'] == 'database unavailable'
+
+    state['fail'] = False
+    response = client.get('/teams')
+    assert response.status_code == 200
+    assert response.get_json() == [{'id': 1}]
+
+    # Only now is there a body to serve from memory
+    assert client.get('/teams').status_code == 200
+    assert state['calls'] == 2
+
+
+def test_coalesced_failed_read_is_not_cached():
+    app = Flask(__name__)
+    query_cache = QueryCache({'teams': (300.0, ('teams',))})
+    responses = ResponseCache(query_cache)
+    joined = threading.Event()
+    state = {'fail': True}
+
+    def load():
+        with timed_query('get_teams'):
+            # Hold the load until the second request is waiting on it
+            joined.wait(5)
+            if state['fail']:
+                raise ConnectionError('database unavailable')
+            return [{'id': 1}]
+
+    @app.route('/teams')
+    @responses.cached('teams')
+    def teams():
+        try:
+            return query_cache.get_or_load('teams', (), load)
+        except Exception:
+            return []
+
+    results = []
+
+    def get():
+        with app.test_client() as client:
+            response = client.get('/teams')
+            results.append((response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=get) for _ in range(2)]
+    threads[0].start()
+    while not query_cache._inflight:
+        time.sleep(0.001)
+    threads[1].start()
+    while query_cache.stats()['coalesced'] < 1:
+        time.sleep(0.001)
+    joined.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert [status for status, _ in results] == [500, 500]
+    assert responses.stats()['entries'] == 0
+
+    state['fail'] = False
+    with app.test_client() as client:
+        response = client.get('/teams')
+    assert (response.status_code, response.get_json()) == (200, [{'id': 1}])
@@ -0,0 +1,125 @@
+"""
+Scraper sources against the recorded pages in fixtures/scraper, served by
+fixture_server.FixtureServer in place of the live sites
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from fixture_server import FixtureServer
+from scraper import (EspnSource, FlashscoreSource, IngestionEngine, ScrapedData, ScrapedMatch, ScrapedPlayer,
+                     ScrapedStanding, SoccerwaySource)
+
+FIXTURES = Path(__file__).resolve().parent.parent / 'fixtures' / 'scraper'
+
+
+@pytest.fixture(scope='module')
+def server():
+    with FixtureServer(str(FIXTURES)) as server:
+        yield server
+
+
+def local(source, server):
+    """``source`` pointed at the fixture server"""
+    source.endpoints = {kind: server.url_for(source.name, kind) for kind in source.endpoints}
+    return source
+
+
+@pytest.fixture(scope='module')
+def results(server):
+    engine = IngestionEngine([local(cls(), server) for cls in (EspnSource, SoccerwaySource, FlashscoreSource)],
+                             retries=1)
+    try:
+        yield engine.scrape()
+    finally:
+        engine.close()
+
+
+def test_espn(results):
+    result = results['espn']
+    assert result.ok
+    assert (len(result.data.matches), len(result.data.standings), len(result.data.players)) == (9, 18, 0)
+    assert result.data.standings[0] == ScrapedStanding(
+        team_name='Guadalajara', position=1, matches_played=17, wins=13, draws=4, losses=0,
+        goals_for=31, goals_against=4, goal_difference=27, points=43, season='2024-25')
+    first = result.data.matches[0]
+    assert (first.home_team_name, first.away_team_name, first.home_score, first.away_score, first.status) == \
+        ('Querétaro', 'Cruz Azul', 0, 3, 'finished')
+    assert first.match_date == datetime(2024, 11, 2, 2, 0, tzinfo=timezone.utc)
+    assert {match.status for match in result.data.matches} == {'finished', 'live', 'upcoming'}
+
+
+def test_soccerway(results):
+    result = results['soccerway']
+    assert result.ok
+    assert (len(result.data.matches), len(result.data.standings), len(result.data.players)) == (45, 18, 20)
+    assert [s.position for s in result.data.standings] == list(range(1, 19))
+    top = result.data.players[0]
+    assert (top.name, top.team_name, top.position, top.goals, top.appearances) == \
+        ('Henry Martín', 'América', 'Forward', 15, 17)
+    assert {match.status for match in result.data.matches} == {'finished', 'live', 'upcoming'}
+
+
+def test_flashscore_without_browser_fails_alone(results):
+    result = results['flashscore']
+    assert not result.ok
+    assert result.error == 'browser unavailable'
+    assert result.data.empty
+    # The other sources ran to completion regardless
+    assert results['espn'].ok and results['soccerway'].ok
+
+
+@pytest.mark.parametrize('kind, matches, standings', [('matches', 27, 0), ('standings', 0, 18)])
+def test_flashscore_parses_rendered_pages(kind, matches, standings):
+    body = (FIXTURES / f'flashscore_{kind}.html').read_text()
+    data = FlashscoreSource().parse(kind, body)
+    assert (len(data.matches), len(data.standings)) == (matches, standings)
+
+
+@pytest.mark.parametrize('source, kind', [
+    (SoccerwaySource, 'standings'), (SoccerwaySource, 'matches'), (SoccerwaySource, 'players'),
+    (FlashscoreSource, 'matches'), (FlashscoreSource, 'standings'),
+])
+def test_lxml_extractor_matches_beautifulsoup(source, kind):
+    body = (FIXTURES / f'{source.name}_{kind}.html').read_text()
+    extracted = source.extractors[kind].run(source(), body)
+    assert not extracted.empty
+    assert extracted == source().parse_soup(kind, body)
+
+
+def test_merge_drops_repeats_across_sources(results):
+    merged = IngestionEngine.merge(results)
+    # One table of 18 teams, however differently ESPN and Soccerway spell them
+    assert len(merged.standings) == 18
+    assert len(merged.players) == 20
+    # The recorded scoreboards share no fixture
+    assert len(merged.matches) == 9 + 45
+    # The first source's rows win
+    assert merged.standings[0].season == '2024-25'
+
+
+def test_deduplicated_matches_spellings_and_time_zones():
+    kickoff = datetime(2024, 11, 2, 2, 0)
+    data = ScrapedData(
+        matches=[
+            ScrapedMatch('Club América', 'Santos Laguna', 1, 0, 'finished', kickoff.replace(tzinfo=timezone.utc)),
+            ScrapedMatch('América', 'Santos', 1, 0, 'finished', kickoff),
+            ScrapedMatch('América', 'Santos', None, None, 'upcoming', datetime(2025, 3, 1, 2, 0)),
+        ],
+        standings=[ScrapedStanding('Club América', 1, season='2024-25'), ScrapedStanding('América', 1)],
+        players=[ScrapedPlayer('Henry Martín', 'Club América'), ScrapedPlayer('Henry Martin', 'América')],
+    )
+    unique = data.deduplicated()
+    assert [m.home_team_name for m in unique.matches] == ['Club América', 'América']
+    assert [s.team_name for s in unique.standings] == ['Club América']
+    assert [p.team_name for p in unique.players] == ['Club América']
+
+
+def test_deduplicated_prefers_resolved_team_ids():
+    # "Chivas" and "Guadalajara" share no spelling, but the resolver knows they are one team
+    ids = {'Chivas': 4, 'Guadalajara': 4}
+    data = ScrapedData(standings=[ScrapedStanding('Chivas', 1), ScrapedStanding('Guadalajara', 1)])
+    assert len(data.deduplicated().standings) == 2
+    assert len(data.deduplicated(ids.get).standings) == 1
@@ -0,0 +1,103 @@
+"""
+StandingsEngine: Liga MX tie-breaks, score corrections and flush bookkeeping
+"""
+
+from datetime import datetime
+
+from standings_engine import StandingsEngine
+
+SEASON = '2024-25'
+
+
+def engine_with(results, teams=(1, 2, 3, 4)):
+    """An engine over ``teams`` with (match_id, home, away, home_score, away_score) results applied"""
+    engine = StandingsEngine(teams, SEASON)
+    for match_id, home, away, home_score, away_score in results:
+        engine.apply(match_id, home, away, home_score, away_score)
+    return engine
+
+
+def test_points_come_first():
+    engine = engine_with([(1, 1, 2, 1, 0), (2, 3, 4, 1, 1)])
+    assert engine.ranking()[0] == 1
+    assert engine.row(1)['points'] == 3 and engine.row(3)['points'] == 1
+
+
+def test_goal_difference_then_goals_for_break_level_points():
+    engine = engine_with([
+        (1, 1, 4, 3, 0),   # team 1: +3, 3 scored
+        (2, 2, 4, 4, 1),   # team 2: +3, 4 scored
+        (3, 3, 4, 1, 0),   # team 3: +1
+    ])
+    assert engine.ranking()[:3] == [2, 1, 3]
+
+
+def test_head_to_head_breaks_level_points_goal_difference_and_goals():
+    # 1 and 2 finish on 3 points, GD 0, one goal each and one away goal each; 2 won their meeting
+    engine = engine_with([
+        (1, 1, 2, 0, 1),
+        (2, 3, 1, 0, 1),
+        (3, 4, 2, 1, 0),
+    ])
+    one, two = engine.row(1), engine.row(2)
+    assert (one['points'], one['goal_difference'], one['goals_for']) == \
+        (two['points'], two['goal_difference'], two['goals_for']) == (3, 0, 1)
+    ranking = engine.ranking()
+    # Team id alone would put 1 first
+    assert ranking.index(2) < ranking.index(1)
+
+
+def test_team_id_is_the_last_resort():
+    engine = engine_with([(1, 3, 4, 0, 0), (2, 1, 2, 0, 0)])
+    assert engine.ranking() == [1, 2, 3, 4]
+
+
+def test_corrected_score_reverses_the_old_result():
+    engine = engine_with([(1, 1, 2, 2, 0)])
+    engine.apply(1, 1, 2, 0, 1)
+    one, two = engine.row(1), engine.row(2)
+    assert (one['matches_played'], one['wins'], one['losses'], one['points']) == (1, 0, 1, 0)
+    assert (two['matches_played'], two['wins'], two['goals_for'], two['points']) == (1, 1, 1, 3)
+    assert engine.ranking()[0] == 2
+
+    # Re-applying the same score changes nothing; withdrawing it empties the table
+    engine.apply(1, 1, 2, 0, 1)
+    assert engine.row(2)['points'] == 3
+    engine.remove(1)
+    assert all(row['matches_played'] == 0 and row['points'] == 0 for row in engine.table())
+
+
+def test_apply_match_withdraws_unfinished_and_other_seasons():
+    engine = StandingsEngine((1, 2), SEASON)
+    match = {'id': 7, 'home_team_id': 1, 'away_team_id': 2, 'home_score': 1, 'away_score': 0,
+             'status': 'finished', 'match_date': datetime(2024, 10, 5)}
+    engine.apply_match(match)
+    assert engine.row(1)['points'] == 3
+    engine.apply_match({**match, 'status': 'live'})
+    assert engine.row(1)['points'] == 0
+    engine.apply_match({**match, 'match_date': datetime(2025, 9, 5)})
+    assert engine.row(1)['matches_played'] == 0
+
+
+def test_changed_rows_only_returns_rows_since_the_last_flush():
+    engine = engine_with([(1, 1, 2, 1, 0)])
+    assert len(engine.changed_rows()) == 4
+    engine.mark_flushed()
+    assert engine.changed_rows() == []
+
+    # 3 and 4 draw: their rows change, and nobody else's position moves
+    engine.apply(2, 3, 4, 0, 0)
+    changed = {row['team_id']: row for row in engine.changed_rows()}
+    assert set(changed) == {3, 4}
+    assert changed[3]['points'] == 1
+
+    # A stored row that disagrees (e.g. written by hand) is rewritten
+    engine.mark_flushed()
+    engine.mark_flushed([{**engine.row(1), 'points': 99}])
+    assert [row['team_id'] for row in engine.changed_rows()] == [1]
+
+
+def test_mark_flushed_ignores_other_seasons():
+    engine = engine_with([(1, 1, 2, 1, 0)])
+    engine.mark_flushed([{**row, 'season': '2023-24'} for row in engine.table()])
+    assert len(engine.changed_rows()) == 4
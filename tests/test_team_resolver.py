@@ -0,0 +1,80 @@
+"""
+TeamResolver: name keys, city keys and the fuzzy-match thresholds
+"""
+
+import pytest
+
+from team_resolver import MIN_MARGIN, TeamResolver, edit_similarity, team_key
+
+TEAMS = [
+    {'id': 1, 'name': 'Club América', 'nickname': 'Las Águilas', 'slug': 'america', 'city': 'Ciudad de México'},
+    {'id': 2, 'name': 'Cruz Azul', 'nickname': 'La Máquina', 'slug': 'cruz-azul', 'city': 'Ciudad de México'},
+    {'id': 3, 'name': 'Pumas UNAM', 'nickname': 'Pumas', 'slug': 'pumas-unam', 'city': 'Ciudad de México'},
+    {'id': 4, 'name': 'Necaxa', 'nickname': 'Rayos', 'slug': 'necaxa', 'city': 'Aguascalientes'},
+    {'id': 5, 'name': 'Atlético San Luis', 'nickname': 'Potosinos', 'slug': 'atletico-san-luis',
+     'city': 'San Luis Potosí'},
+    {'id': 6, 'name': 'Atlético Morelia', 'nickname': 'Canarios', 'slug': 'atletico-morelia', 'city': 'Morelia'},
+    {'id': 7, 'name': 'León', 'nickname': 'La Fiera', 'slug': 'leon', 'city': None},
+]
+
+
+@pytest.fixture
+def resolver():
+    return TeamResolver(TEAMS, aliases=[{'alias': 'Club Universidad Nacional', 'team_id': 3}])
+
+
+@pytest.mark.parametrize('name, key', [
+    ('Club de Fútbol América', 'america'),
+    ('Los Tigres', 'tigres'),
+    ('  LEÓN  FC ', 'leon'),
+    ('Querétaro FC', 'queretaro'),
+    ('Atlético-San Luis', 'atletico san luis'),
+    ('Club de Fútbol', ''),
+])
+def test_team_key_drops_accents_case_punctuation_and_filler(name, key):
+    assert team_key(name) == key
+
+
+def test_names_nicknames_slugs_and_aliases_resolve_exactly(resolver):
+    assert resolver.resolve('América') == 1
+    assert resolver.resolve('La Maquina') == 2
+    assert resolver.resolve('pumas-unam') == 3
+    assert resolver.resolve('Universidad Nacional') == 3
+    assert resolver.report()['exact'] == 4
+
+
+def test_city_keys_only_when_one_team_plays_there(resolver):
+    assert resolver.resolve('Aguascalientes') == 4
+    assert resolver.resolve('Morelia') == 6
+    # Three clubs play in the capital: the city says nothing
+    assert 'ciudad mexico' not in resolver.index
+    assert resolver.resolve('Ciudad de México') is None
+
+
+def test_close_spellings_resolve_fuzzily(resolver):
+    assert resolver.resolve('Cruz Azull') == 2
+    assert resolver.resolve('Atletico San Luiz') == 5
+    matched = {entry['name']: entry for entry in resolver.report()['fuzzy_matches']}
+    assert matched['Cruz Azull']['matched'] == 'cruz azul'
+
+
+def test_ambiguous_matches_are_rejected(resolver):
+    # "Atlético" is as much San Luis as Morelia
+    assert resolver.resolve('Atlético') is None
+    assert resolver.report()['unresolved'] == [{'name': 'Atlético', 'seen': 1}]
+
+
+def test_margin_decides_between_two_close_keys():
+    teams = [
+        {'id': 1, 'name': 'Santos', 'nickname': 'Guerreros', 'slug': 'santos'},
+        {'id': 2, 'name': 'Santis', 'nickname': 'Otros', 'slug': 'santis'},
+    ]
+    resolver = TeamResolver(teams)
+    # "santas" is one edit from each: the best score doesn't lead by MIN_MARGIN
+    assert abs(edit_similarity('santas', 'santos') - edit_similarity('santas', 'santis')) < MIN_MARGIN
+    assert resolver.resolve('Santas') is None
+
+
+def test_unrelated_names_stay_unresolved(resolver):
+    assert resolver.resolve('Real Madrid') is None
+    assert resolver.resolve('') is None